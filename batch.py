@@ -0,0 +1,243 @@
+"""
+AfpParser - batch CLI application: processes many files with a pool of worker processes
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import orjson
+
+from cache import ResultCache
+from cli.batch_cli import BatchInput, run
+from dispatcher import init_dispatcher
+from logger import get_logger
+from metrics import MetricsServer, ParserMetrics
+from metrics.parser_metrics import progress
+from parser.afp.sf_filter import SfFilter
+from writer.writer_factory import create_writer
+
+
+class FileResult(NamedTuple):
+    """Outcome of the processing of one input file."""
+
+    path: str
+    output_path: str
+    size: int
+    # Structured fields scanned (all those of the file), sf_decoded those handed to the writer
+    sf_count: int
+    error_count: int
+    elapsed: float
+    error: Optional[str] = None
+    cached: bool = False
+    bytes_scanned: int = 0
+    documents: int = 0
+    pages: int = 0
+    sf_decoded: int = 0
+
+    @property
+    def sf_per_s(self) -> float:
+        return self.sf_count / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.size / 1e6 / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'path': self.path,
+            'output': self.output_path,
+            'status': 'failed' if self.error else 'ok',
+            'error': self.error,
+            'cached': self.cached,
+            'size_bytes': self.size,
+            'sf_count': self.sf_count,
+            'sf_decoded': self.sf_decoded,
+            'errors': self.error_count,
+            'elapsed': round(self.elapsed, 3),
+            'sf_per_s': round(self.sf_per_s),
+            'mb_per_s': round(self.mb_per_s, 2),
+        }
+
+
+def process_file(batch_input: BatchInput, path: str) -> FileResult:
+    """
+    Process one input file into its output (runs in a worker process).
+
+    Any error is reported in the result, so that a corrupt file does not abort the batch.
+    """
+    start_time = time.perf_counter()
+    output_path = batch_input.output_path(path)
+    size = Path(path).stat().st_size
+    processor = None
+
+    try:
+        cache = None
+        if batch_input.cache_dir:
+            cache = ResultCache(batch_input.cache_dir, batch_input.cache_size * 1024 * 1024)
+            try:
+                sf_filter = SfFilter(batch_input.config_path)
+            except (ValueError, FileNotFoundError):
+                # Ignored by the processor as well
+                sf_filter = SfFilter()
+            cache_key = cache.key(path, sf_filter, batch_input.output_format)
+
+            if cache.get(cache_key, output_path):
+                return FileResult(path, output_path, size, 0, 0, time.perf_counter() - start_time, cached=True)
+
+        dispatcher = init_dispatcher(path, batch_input.config_path, 1, batch_input.use_index, batch_input.decode_all)
+        processor = dispatcher.dispatch(batch_input.filetype)
+        processor.set_writer(create_writer(batch_input.output_format, Path(path).name, output_path))
+        processor.run(output_path)
+        error = None
+
+        if cache is not None:
+            cache.put(cache_key, output_path)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+
+    if processor is not None:
+        bytes_scanned = processor.bytes_scanned()
+        documents, pages = progress(processor)
+    else:
+        bytes_scanned = documents = pages = 0
+
+    return FileResult(
+        path, output_path, size,
+        getattr(processor, 'sf_scanned', 0),
+        getattr(processor, 'error_count', 0),
+        time.perf_counter() - start_time,
+        error,
+        bytes_scanned=bytes_scanned,
+        documents=documents,
+        pages=pages,
+        sf_decoded=getattr(processor, 'sf_count', 0),
+    )
+
+
+def observe_result(metrics: ParserMetrics, result: FileResult) -> None:
+    """Add the run of a batch worker to the metrics of the batch."""
+    if result.cached:
+        metrics.observe_cached(result.elapsed)
+    else:
+        metrics.observe(
+            result.sf_count, result.sf_decoded, result.error_count, result.bytes_scanned, result.documents,
+            result.pages, result.elapsed, "failed" if result.error else "ok",
+        )
+
+
+def write_summary(results: list[FileResult], wall_time: float, summary_path: str) -> dict:
+    """Write the JSON batch summary: per-file results and totals."""
+    size = sum(result.size for result in results)
+    sf_count = sum(result.sf_count for result in results)
+
+    summary = {
+        'files': [result.to_dict() for result in results],
+        'total': {
+            'files': len(results),
+            'failed': sum(1 for result in results if result.error),
+            'cached': sum(1 for result in results if result.cached),
+            'size_bytes': size,
+            'sf_count': sf_count,
+            'sf_decoded': sum(result.sf_decoded for result in results),
+            'errors': sum(result.error_count for result in results),
+            'wall_time': round(wall_time, 3),
+            'sf_per_s': round(sf_count / wall_time) if wall_time else 0,
+            'mb_per_s': round(size / 1e6 / wall_time, 2) if wall_time else 0,
+        },
+    }
+
+    with open(summary_path, 'wb') as summary_file:
+        summary_file.write(orjson.dumps(summary, option=orjson.OPT_INDENT_2))
+
+    return summary['total']
+
+
+def main():
+    """
+    Entry point of the batch application.
+
+    The files are scheduled largest first on a pool of worker processes, which stay
+    alive (imports done) for the whole batch. Each file gets its own output; the
+    summary is logged and written as JSON.
+
+    Returns:
+        int: Exit code (0 if every file was processed, 1 otherwise)
+    """
+    start_time = time.perf_counter()
+
+    logger = get_logger(__name__)
+    logger.info("Batch started")
+
+    try:
+        batch_input = run()
+    except ValueError as e:
+        logger.error(str(e))
+        return 1
+
+    logger.info(f"Batch : {batch_input}")
+
+    paths = batch_input.paths
+    results: dict[str, FileResult] = {}
+
+    # Fed in this process as the workers complete their files
+    metrics = None
+    metrics_server = None
+    if batch_input.metrics_file or batch_input.metrics_port is not None:
+        metrics = ParserMetrics()
+        if batch_input.metrics_port is not None:
+            metrics_server = MetricsServer(metrics.registry, batch_input.metrics_port)
+            metrics_server.start()
+
+    with ProcessPoolExecutor(max_workers=min(batch_input.jobs, len(paths))) as executor:
+        # Submitted largest first: the pool starts them in this order
+        futures = {executor.submit(process_file, batch_input, path): path for path in paths}
+
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # Worker process lost (crash, killed)
+                result = FileResult(path, batch_input.output_path(path), Path(path).stat().st_size,
+                                    0, 0, 0.0, f"{type(e).__name__}: {e}")
+            results[path] = result
+            if metrics is not None:
+                observe_result(metrics, result)
+
+            if result.error:
+                logger.error(f"[{len(results)}/{len(paths)}] {path} : failed - {result.error}")
+            elif result.cached:
+                logger.info(f"[{len(results)}/{len(paths)}] {path} : served from the cache")
+            else:
+                logger.info(
+                    f"[{len(results)}/{len(paths)}] {path} : {result.sf_count} SF en {result.elapsed:.3f}s "
+                    f"({result.sf_per_s:.0f} SF/s, {result.mb_per_s:.2f} MB/s) - {result.error_count} erreurs"
+                )
+
+    wall_time = time.perf_counter() - start_time
+    total = write_summary([results[path] for path in paths], wall_time, batch_input.summary_path)
+
+    logger.info(
+        f"Batch terminé : {total['files']} fichiers ({total['failed']} en échec), {total['sf_count']} SF "
+        f"en {wall_time:.3f}s ({total['sf_per_s']} SF/s, {total['mb_per_s']} MB/s) - {total['errors']} erreurs"
+    )
+    if batch_input.cache_dir:
+        logger.info(
+            f"Cache : {total['cached']}/{total['files']} files served from the cache "
+            f"({ResultCache(batch_input.cache_dir).stats_info()} in total)"
+        )
+    logger.info(f"Summary written : {batch_input.summary_path}")
+
+    if metrics is not None:
+        if batch_input.metrics_file:
+            metrics.registry.write_textfile(batch_input.metrics_file)
+            logger.info(f"Metrics written : {batch_input.metrics_file}")
+        if metrics_server is not None:
+            metrics_server.stop()
+
+    return 1 if total['failed'] else 0
+
+if __name__ == "__main__":
+    # Execute main() and use its return value as the exit code
+    raise SystemExit(main())
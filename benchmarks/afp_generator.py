@@ -0,0 +1,220 @@
+"""
+Deterministic generator of synthetic AFP (MO:DCA) print files.
+
+The file holds a print file (BPF/EPF) with inline resource groups of images, then one
+document (BDT/EDT) of named page groups (BNG/ENG). Each group carries TLEs and NOPs and
+holds pages (BPG/EPG) with TLEs, NOPs, a presentation text object and image objects.
+Medium maps (IMM) change every imm_every groups. The same configuration and seed always
+give the same bytes.
+
+Usage:
+    python benchmarks/afp_generator.py <output.afp> [--documents N] [--pages N] [--image-size BYTES] ...
+"""
+
+import argparse
+import random
+import sys
+from dataclasses import dataclass, fields
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from parser.afp.sfi_config import CARRIAGE_CONTROL, SFI_FLAG_EXTENSION, SFI_HEADER, SFI_HEADER_LEN  # noqa: E402
+
+BPF = b'\xD3\xA8\xA5'
+EPF = b'\xD3\xA9\xA5'
+BRG = b'\xD3\xA8\xC6'
+ERG = b'\xD3\xA9\xC6'
+BRS = b'\xD3\xA8\xCE'
+ERS = b'\xD3\xA9\xCE'
+BDT = b'\xD3\xA8\xA8'
+EDT = b'\xD3\xA9\xA8'
+BNG = b'\xD3\xA8\xAD'
+ENG = b'\xD3\xA9\xAD'
+BPG = b'\xD3\xA8\xAF'
+EPG = b'\xD3\xA9\xAF'
+BPT = b'\xD3\xA8\x9B'
+PTX = b'\xD3\xEE\x9B'
+EPT = b'\xD3\xA9\x9B'
+BIM = b'\xD3\xA8\xFB'
+IPD = b'\xD3\xEE\xFB'
+EIM = b'\xD3\xA9\xFB'
+IMM = b'\xD3\xAB\xCC'
+NOP = b'\xD3\xEE\xEE'
+TLE = b'\xD3\xA0\x90'
+
+IPD_CHUNK = 8192
+"""Image data bytes per IPD structured field."""
+
+FLUSH_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class GeneratorConfig:
+    """Content of a generated file. Counts of TLEs, NOPs and images are per document or page."""
+
+    documents: int = 1000
+    pages: int = 3
+    document_tles: int = 3
+    page_tles: int = 1
+    document_nops: int = 1
+    page_nops: int = 1
+    imm_every: int = 7
+    resource_groups: int = 1
+    resource_images: int = 2
+    page_images: int = 1
+    image_size: int = 2048
+    text_size: int = 200
+    seed: int = 1
+
+
+def encode(text: str) -> bytes:
+    """Encode a string in EBCDIC (code page 500)."""
+    return text.encode('cp500')
+
+
+class AfpFileWriter:
+    """Appends structured fields to a file, counting them."""
+
+    def __init__(self, f) -> None:
+        self._f = f
+        self._buffer = bytearray()
+        self.sf_count = 0
+
+    def sf(self, sf_id: bytes, data: bytes = b'', extension: bytes = b'') -> None:
+        """Write a structured field, with an SFI extension if given."""
+        flags = SFI_FLAG_EXTENSION if extension else 0
+        if extension:
+            extension = bytes([len(extension) + 1]) + extension
+
+        self._buffer += SFI_HEADER.pack(
+            CARRIAGE_CONTROL[0], SFI_HEADER_LEN + len(extension) + len(data), sf_id, flags
+        )
+        self._buffer += extension
+        self._buffer += data
+        self.sf_count += 1
+
+        if len(self._buffer) >= FLUSH_SIZE:
+            self.flush()
+
+    def tle(self, name: str, value: str) -> None:
+        """Write a TLE with a Fully Qualified Name (FQN) and an Attribute Value triplet."""
+        name = encode(name)
+        value = encode(value)
+        self.sf(TLE, bytes([4 + len(name), 0x02, 0x0B, 0x00]) + name + bytes([4 + len(value), 0x36, 0, 0]) + value)
+
+    def image(self, name: str, size: int, rng: random.Random) -> None:
+        """Write an image object of size bytes of (random) image data."""
+        self.sf(BIM, encode(name.ljust(8)))
+        for start in range(0, size, IPD_CHUNK):
+            self.sf(IPD, rng.randbytes(min(IPD_CHUNK, size - start)))
+        self.sf(EIM, encode(name.ljust(8)))
+
+    def flush(self) -> None:
+        self._f.write(self._buffer)
+        self._buffer.clear()
+
+
+def generate(path: str, config: GeneratorConfig = GeneratorConfig()) -> dict:
+    """
+    Write a synthetic AFP file.
+
+    Args:
+        path: Path of the file to write.
+        config: Content of the file.
+
+    Returns:
+        dict: Number of structured fields, documents and pages written, and file size.
+    """
+    rng = random.Random(config.seed)
+
+    with open(path, 'wb') as f:
+        out = AfpFileWriter(f)
+        out.sf(BPF, encode('PRINTFIL'))
+        out.sf(NOP, encode('FILE LEVEL NOP'))
+
+        for group in range(config.resource_groups):
+            out.sf(BRG, encode(f'RG{group:06d}'))
+            for image in range(config.resource_images):
+                out.sf(BRS, encode(f'RS{image:06d}'))
+                out.image(f'RI{image:06d}', config.image_size, rng)
+                out.sf(ERS, encode(f'RS{image:06d}'))
+            out.sf(ERG, encode(f'RG{group:06d}'))
+
+        out.sf(BDT, encode('DOC00001'))
+
+        page_number = 0
+        for doc in range(config.documents):
+            if config.imm_every and doc % config.imm_every == 0:
+                out.sf(IMM, encode(f'TRAY{doc // config.imm_every % 4}'.ljust(8)) + b'\x0c\x02\x84\x00' + encode('MAPNAME1'))
+
+            group_name = encode(f'G{doc:07d}')
+            out.sf(BNG, group_name)
+            for tle in range(config.document_tles):
+                out.tle(f'ACCOUNT_{tle}', f'{rng.randrange(10 ** 10):010d}')
+            for nop in range(config.document_nops):
+                out.sf(NOP, encode(f'doc nop {doc}.{nop}'))
+
+            for page in range(config.pages):
+                page_number += 1
+                page_name = encode(f'P{page_number:07d}')
+                out.sf(BPG, page_name)
+                for tle in range(config.page_tles):
+                    out.tle(f'PAGE_TAG_{tle}', f'page {page_number}')
+                for nop in range(config.page_nops):
+                    out.sf(NOP, encode(f'page nop {page_number}.{nop}'))
+
+                if config.text_size:
+                    out.sf(BPT, page_name)
+                    out.sf(PTX, rng.randbytes(config.text_size))
+                    out.sf(EPT, page_name)
+                for image in range(config.page_images):
+                    out.image(f'I{image:07d}', config.image_size, rng)
+
+                out.sf(EPG, page_name)
+
+            out.sf(ENG, group_name)
+
+        out.sf(EDT, encode('DOC00001'))
+        out.sf(EPF, encode('PRINTFIL'))
+        out.flush()
+        size = f.tell()
+
+    return {
+        'sf_count': out.sf_count,
+        'documents': config.documents,
+        'pages': page_number,
+        'size': size,
+    }
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add an option per GeneratorConfig field (--documents, --image-size...)."""
+    for config_field in fields(GeneratorConfig):
+        parser.add_argument(
+            f"--{config_field.name.replace('_', '-')}",
+            type=int,
+            default=config_field.default,
+            help=f"(default: {config_field.default})",
+        )
+
+
+def config_from_args(args: argparse.Namespace) -> GeneratorConfig:
+    return GeneratorConfig(**{config_field.name: getattr(args, config_field.name)
+                              for config_field in fields(GeneratorConfig)})
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Deterministic generator of synthetic AFP files")
+    parser.add_argument("output")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    stats = generate(args.output, config_from_args(args))
+    print(f"{args.output}: {stats['size']} bytes, {stats['sf_count']} SF, "
+          f"{stats['documents']} documents, {stats['pages']} pages")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,79 @@
+"""
+Benchmark of the compressed JSON outputs.
+
+Parses an AFP file once, then writes its JSON structure with every compression and
+level, reporting the wall time and the number of bytes written.
+
+Usage:
+    python benchmarks/bench_compression.py <afp_file> [--levels 1,3,6,9] [--block-size MiB] [--threads N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from parser.afp import SfStreamer  # noqa: E402
+from parser.afp.sf_filter import SfFilter  # noqa: E402
+from writer.afp_json_writer import AFPJsonWriter  # noqa: E402
+from writer.compressed_output import COMPRESSIONS  # noqa: E402
+
+
+def write_output(records, afp_name: str, output_path: str, **options) -> float:
+    """Write the JSON output of the records, return the wall time."""
+    start = time.perf_counter()
+    with AFPJsonWriter(afp_name, output_path, **options) as writer:
+        for record in records:
+            writer.write(record)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark of the json.gz/json.xz outputs")
+    parser.add_argument("afp_file")
+    parser.add_argument("--levels", default="1,3,6,9", help="Comma-separated compression levels")
+    parser.add_argument("--block-size", type=int, default=4, help="Block size in MiB")
+    parser.add_argument("--threads", type=int, default=None, help="Compression threads (default: CPUs)")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.levels.split(",")]
+    afp_name = Path(args.afp_file).name
+
+    # Parse once: only the writers are measured
+    streamer = SfStreamer(args.afp_file)
+    writer = AFPJsonWriter(afp_name, os.devnull)
+    streamer.set_config(SfFilter().restrict(writer.consumed_sf_names()))
+    records = list(streamer.stream())
+    for record in records:
+        record.decode()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = os.path.join(tmp_dir, "out.json")
+        elapsed = write_output(records, afp_name, output_path)
+        raw_size = os.path.getsize(output_path)
+
+        print(f"{'format':<10}{'level':>6}{'time (s)':>10}{'bytes':>14}{'ratio':>8}")
+        print(f"{'json':<10}{'-':>6}{elapsed:>10.3f}{raw_size:>14}{1:>8.2f}")
+
+        for compression in sorted(COMPRESSIONS):
+            for level in levels:
+                output_path = os.path.join(tmp_dir, f"out.json.{compression}")
+                elapsed = write_output(
+                    records, afp_name, output_path,
+                    compression=compression,
+                    compression_level=level,
+                    compression_block_size=args.block_size * 1024 * 1024,
+                    compression_threads=args.threads,
+                )
+                size = os.path.getsize(output_path)
+                print(f"{'json.' + compression:<10}{level:>6}{elapsed:>10.3f}{size:>14}{raw_size / size:>8.2f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
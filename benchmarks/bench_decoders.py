@@ -0,0 +1,116 @@
+"""
+Benchmark of the compiled structured field decoders.
+
+Decodes the data of every known structured field of a generated TLE/NOP-heavy file
+(or of --afp <file>) with:
+    interpreted: SfParser.parse_sf_data(), walking the SfConfig components and the
+        triplet components through the handlers for every record (the reference path)
+    compiled: the SF_DECODERS decoder of the SF ID, one call on a memoryview slice, as read_sf()
+The decoded values of both paths are compared before the measures.
+
+Usage:
+    python benchmarks/bench_decoders.py [--afp FILE | --documents N --document-tles N ...] [--repeat N]
+"""
+
+import argparse
+import logging
+import mmap
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.afp_generator import GeneratorConfig, add_config_arguments, config_from_args, generate  # noqa: E402
+from parser.afp.sf_handlers import SF_DECODERS  # noqa: E402
+from parser.afp.sf_streamer import SfParser  # noqa: E402
+from parser.afp.sfi_config import SFI_HEADER_LEN  # noqa: E402
+
+TLE_NOP_FILE = GeneratorConfig(documents=20_000, pages=2, document_tles=8, page_tles=3, document_nops=2,
+                               page_nops=2, resource_groups=0, page_images=0)
+"""Default generated file: 20,000 documents of 2 pages, 280,000 TLEs and 120,000 NOPs, no image."""
+
+
+def known_fields(mapped) -> list[tuple[bytes, int, int]]:
+    """Return (sf_id, data_offset, data_len) of the structured fields that have a decoder."""
+    fields = []
+    offset = 0
+    while offset < len(mapped):
+        sf_len, sf_id, flags, extension_len = SfParser.unpack_sfi(mapped, offset)
+        if sf_id in SF_DECODERS:
+            data_offset = offset + 1 + SFI_HEADER_LEN + extension_len
+            fields.append((sf_id, data_offset, sf_len - SFI_HEADER_LEN - extension_len))
+        offset += sf_len + 1
+    return fields
+
+
+def decode_interpreted(mapped, view, fields) -> list:
+    results = []
+    for sf_id, data_offset, data_len in fields:
+        mapped.seek(data_offset)
+        results.append(SfParser.parse_sf_data(mapped, data_len, sf_id))
+    return results
+
+
+def decode_compiled(mapped, view, fields) -> list:
+    results = []
+    decoders = SF_DECODERS
+    for sf_id, data_offset, data_len in fields:
+        results.append(decoders[sf_id].decode(view[data_offset:data_offset + data_len]))
+    return results
+
+
+PATHS = {"interpreted": decode_interpreted, "compiled": decode_compiled}
+
+
+def bench_decode(mapped, view, fields, decode) -> float:
+    start = time.perf_counter()
+    decode(mapped, view, fields)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark of the compiled SF decoders")
+    parser.add_argument("--afp", help="AFP file to measure (default: a generated file)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measure, the best one is reported")
+    add_config_arguments(parser.add_argument_group("generated file (without --afp)"))
+    parser.set_defaults(**TLE_NOP_FILE.__dict__)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        afp_path = args.afp
+        if afp_path is None:
+            afp_path = os.path.join(tmp_dir, "tle_nop.afp")
+            generate(afp_path, config_from_args(args))
+
+        with open(afp_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                fields = known_fields(mapped)
+                print(f"{afp_path}: {os.path.getsize(afp_path) / 1e6:.1f} MB, {len(fields)} decoded SF")
+
+                reference = decode_interpreted(mapped, view, fields)
+                compiled = decode_compiled(mapped, view, fields)
+                for (sf_id, data_offset, _), expected, value in zip(fields, reference, compiled):
+                    if value != expected:
+                        raise AssertionError(f"SF {sf_id.hex().upper()} at offset {data_offset}: {value} != {expected}")
+                del reference, compiled
+
+                print(f"\n{'path':<14}{'time (s)':>10}{'SF/s':>12}")
+                results = {}
+                for name, decode in PATHS.items():
+                    results[name] = min(bench_decode(mapped, view, fields, decode) for _ in range(args.repeat))
+                    print(f"{name:<14}{results[name]:>10.3f}{len(fields) / results[name]:>12.0f}")
+                print(f"speedup: {results['interpreted'] / results['compiled']:.1f}x")
+            finally:
+                view.release()
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,153 @@
+"""
+Benchmark of the EBCDIC name decode cache.
+
+Measures, on a generated TLE-heavy file (or on --afp <file>), the decode time of the
+character data found in TLEs, NOPs and IMMs, without and with the cache, and the hit
+rate of the cache on each kind of data:
+    TLE names: FQN names (cached by the parser)
+    IMM names: medium map names (cached by the parser)
+    TLE values: AttrVal values (not cached by the parser, mostly unique)
+    NOP data: NOP text (not cached by the parser, mostly unique)
+followed by complete JSON runs without and with the cache.
+
+Usage:
+    python benchmarks/bench_ebcdic.py [--afp FILE | --documents N --document-tles N ...] [--repeat N]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.afp_generator import GeneratorConfig, add_config_arguments, config_from_args, generate  # noqa: E402
+from parser.afp import SfStreamer  # noqa: E402
+from parser.afp.ebcdic import DECODE_CACHE, EbcdicDecodeCache, decode_ebcdic  # noqa: E402
+from parser.afp.sf_filter import SfFilter  # noqa: E402
+from processor.afp_stream_processor import AFPStreamProcessor  # noqa: E402
+from writer.writer_factory import create_writer  # noqa: E402
+
+TLE_FILE = GeneratorConfig(documents=100_000, pages=2, document_tles=8, page_tles=2, imm_every=7,
+                           resource_groups=0, page_images=0, text_size=0)
+"""Default generated file: 1,200,000 TLEs, a NOP per document and page, no image."""
+
+FQN_ID = 0x02
+ATTR_VAL_ID = 0x36
+IMM_NAME_LEN = 8
+
+
+def tle_components(data: bytes) -> tuple[list[bytes], list[bytes]]:
+    """Return the FQN names and AttrVal values of a TLE (component data, without header)."""
+    names, values = [], []
+    offset = 0
+    while offset + 1 < len(data):
+        t_len, t_id = data[offset], data[offset + 1]
+        if t_len < 2:
+            break
+        if t_id == FQN_ID:
+            names.append(data[offset + 4:offset + t_len])
+        elif t_id == ATTR_VAL_ID:
+            values.append(data[offset + 4:offset + t_len])
+        offset += t_len
+    return names, values
+
+
+def views(items: list[bytes]) -> list[memoryview]:
+    """Slices of a single read-only buffer, as the parser gets from the mapped file."""
+    buffer = memoryview(b''.join(items))
+    slices = []
+    offset = 0
+    for item in items:
+        slices.append(buffer[offset:offset + len(item)])
+        offset += len(item)
+    return slices
+
+
+def bench_decode(items: list[memoryview], decode) -> float:
+    start = time.perf_counter()
+    for data in items:
+        decode(data)
+    return time.perf_counter() - start
+
+
+def bench_end_to_end(afp_path: str, output_path: str) -> float:
+    processor = AFPStreamProcessor(SfStreamer(afp_path))
+    processor.set_writer(create_writer("json", Path(afp_path).name, output_path))
+    start = time.perf_counter()
+    processor.run(output_path)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark of the EBCDIC name decode cache")
+    parser.add_argument("--afp", help="AFP file to measure (default: a generated file)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measure, the best one is reported")
+    add_config_arguments(parser.add_argument_group("generated file (without --afp)"))
+    parser.set_defaults(**TLE_FILE.__dict__)
+    args = parser.parse_args()
+
+    # Processor logs would be measured too
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        afp_path = args.afp
+        if afp_path is None:
+            afp_path = os.path.join(tmp_dir, "tle.afp")
+            generate(afp_path, config_from_args(args))
+
+        groups = {"TLE names": [], "IMM names": [], "TLE values": [], "NOP data": []}
+        streamer = SfStreamer(afp_path)
+        streamer.set_config(SfFilter().restrict({'TLE', 'NOP', 'IMM'}))
+        for record in streamer.stream():
+            data = record.payload.tobytes()
+            if record.sf_name == 'TLE':
+                names, values = tle_components(data)
+                groups["TLE names"] += names
+                groups["TLE values"] += values
+            elif record.sf_name == 'IMM':
+                groups["IMM names"].append(data[:IMM_NAME_LEN])
+            else:
+                groups["NOP data"].append(data)
+        print(f"{afp_path}: {os.path.getsize(afp_path) / 1e6:.1f} MB")
+
+        print(f"\n{'data':<14}{'strings':>10}{'distinct':>10}{'hits':>8}"
+              f"{'plain (s)':>11}{'cached (s)':>12}{'saving':>8}")
+        for group_name, items in groups.items():
+            if not items:
+                continue
+            items = views(items)
+
+            counted = EbcdicDecodeCache()
+            counted.track()
+            bench_decode(items, counted.decode)
+            hit_rate = counted.stats()["hit_rate"]
+
+            plain = min(bench_decode(items, decode_ebcdic) for _ in range(args.repeat))
+            # A new cache per run: the first occurrences are measured as misses
+            cached = min(bench_decode(items, EbcdicDecodeCache().decode) for _ in range(args.repeat))
+            print(f"{group_name:<14}{len(items):>10}{counted.misses:>10}{hit_rate:>8.1%}"
+                  f"{plain:>11.3f}{cached:>12.3f}{1 - cached / plain:>8.1%}")
+
+        # Alternated runs: a drift of the machine load affects both alike
+        output_path = os.path.join(tmp_dir, "out.json")
+        runs = {"plain": [], "cached": []}
+        for _ in range(args.repeat):
+            DECODE_CACHE.decode = decode_ebcdic
+            try:
+                runs["plain"].append(bench_end_to_end(afp_path, output_path))
+            finally:
+                del DECODE_CACHE.decode
+            DECODE_CACHE.clear()
+            runs["cached"].append(bench_end_to_end(afp_path, output_path))
+        plain, cached = min(runs["plain"]), min(runs["cached"])
+        print(f"\n{'e2e json':<14}{'':>28}{plain:>11.3f}{cached:>12.3f}{1 - cached / plain:>8.1%}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,144 @@
+"""
+Memory benchmark of the in-memory document representation.
+
+Runs each scenario in a fresh process on a generated file of large documents (or on
+--afp <file>) and reports its peak RSS, above the RSS of the process once the modules
+are imported:
+    hold-compact: all the documents built by AfpBuilder kept as CompactDocuments
+    hold-expanded: the same documents kept as DocumentData (one object per page and TLE)
+    json-objects: JSON run with the objects encoder (buffer_size documents held)
+    json-stream: JSON run with the stream encoder (no document object)
+
+Usage:
+    python benchmarks/bench_memory.py [--afp FILE | --documents N --pages N ...] [--scenarios a,b]
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.afp_generator import GeneratorConfig, add_config_arguments, config_from_args, generate  # noqa: E402
+from domain.afp_builder import AfpBuilder  # noqa: E402
+from parser.afp import SfStreamer  # noqa: E402
+from parser.afp.sf_filter import SfFilter  # noqa: E402
+from processor.afp_stream_processor import AFPStreamProcessor  # noqa: E402
+from writer.afp_json_writer import AFPJsonWriter  # noqa: E402
+
+LARGE_DOCUMENTS = GeneratorConfig(documents=100, pages=3000, document_tles=8, page_tles=4, resource_groups=0,
+                                  page_images=0, text_size=0)
+"""Default generated file: 100 documents of 3000 pages, 4 TLEs and a NOP per page."""
+
+
+def build_documents(afp_path: str, expand: bool) -> list:
+    """Build and keep all the documents of a file, compact or expanded (DocumentData)."""
+    documents = []
+
+    def on_begin_document(document) -> None:
+        # The previous document is complete: expanded before the next one is built
+        if expand and documents:
+            documents[-1] = documents[-1].to_data()
+        documents.append(document)
+
+    builder = AfpBuilder(Path(afp_path).name, on_begin_document=on_begin_document)
+    streamer = SfStreamer(afp_path)
+    streamer.set_config(SfFilter().restrict(AfpBuilder.SF_NAMES))
+    for record in streamer.stream():
+        builder.handle(record)
+    if expand and documents:
+        documents[-1] = documents[-1].to_data()
+    return documents
+
+
+def hold(expand: bool):
+    def run(afp_path: str, output_dir: str) -> None:
+        documents = build_documents(afp_path, expand)
+        del documents
+
+    return run
+
+
+def json_run(encoder: str):
+    def run(afp_path: str, output_dir: str) -> None:
+        output_path = os.path.join(output_dir, "out.json")
+        processor = AFPStreamProcessor(SfStreamer(afp_path))
+        processor.set_writer(AFPJsonWriter(Path(afp_path).name, output_path, encoder=encoder))
+        processor.run(output_path)
+
+    return run
+
+
+SCENARIOS = {
+    "hold-compact": hold(expand=False),
+    "hold-expanded": hold(expand=True),
+    "json-objects": json_run("objects"),
+    "json-stream": json_run("stream"),
+}
+
+
+def run_scenario(name: str, afp_path: str) -> dict:
+    """
+    Run a scenario once (in a fresh worker process).
+
+    Returns:
+        dict: Wall time, RSS once imported and peak RSS of the process, in MB.
+    """
+    # Processor logs would be measured too
+    logging.disable(logging.INFO)
+
+    # ru_maxrss is in KiB on Linux
+    imported = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        SCENARIOS[name](afp_path, output_dir)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "elapsed": round(elapsed, 3),
+        "imported_rss_mb": round(imported, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Memory benchmark of the document representation")
+    parser.add_argument("--afp", help="AFP file to measure (default: a generated file)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Scenarios ({', '.join(SCENARIOS)})")
+    add_config_arguments(parser.add_argument_group("generated file (without --afp)"))
+    parser.set_defaults(**LARGE_DOCUMENTS.__dict__)
+    args = parser.parse_args()
+
+    names = args.scenarios.split(",")
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))} ({', '.join(SCENARIOS)})")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        afp_path = args.afp
+        if afp_path is None:
+            afp_path = os.path.join(tmp_dir, "large.afp")
+            generate(afp_path, config_from_args(args))
+        print(f"{afp_path}: {os.path.getsize(afp_path) / 1e6:.1f} MB")
+
+        print(f"\n{'scenario':<16}{'time (s)':>10}{'RSS MB':>9}{'run MB':>9}")
+        # A fresh process per scenario: peak RSS is not shared
+        context = multiprocessing.get_context("spawn")
+        for name in names:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(run_scenario, name, afp_path).result()
+            print(f"{name:<16}{result['elapsed']:>10.3f}{result['peak_rss_mb']:>9}"
+                  f"{result['peak_rss_mb'] - result['imported_rss_mb']:>9.1f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,151 @@
+"""
+Memory benchmark of the records yielded by the streamer.
+
+Runs each scenario in a fresh process on a generated spool (or on --afp <file>):
+    hold-dicts: all the SFs kept as the dicts of earlier versions (SfRecord.to_dict())
+    hold-records: all the SfRecords kept, undecoded
+    hold-decoded: all the SfRecords kept, sf_data decoded
+    stream-dicts: every SF turned into its dict and dropped
+    stream-records: every SF decoded on its record and dropped
+and reports its time, peak RSS above the RSS once the modules are imported, and the
+number of generation 0 garbage collections. The held scenarios are run a second time
+under tracemalloc for the memory (bytes and blocks) retained per structured field.
+
+Usage:
+    python benchmarks/bench_records.py [--afp FILE | --documents N --pages N ...] [--scenarios a,b]
+"""
+
+import argparse
+import gc
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.afp_generator import GeneratorConfig, add_config_arguments, config_from_args, generate  # noqa: E402
+from parser.afp import SfStreamer  # noqa: E402
+
+SPOOL_FILE = GeneratorConfig(documents=5000, pages=3)
+"""Default generated file: 5,000 documents of 3 pages, about 180k structured fields."""
+
+
+def hold_dicts(streamer: SfStreamer) -> list:
+    return [record.to_dict() for record in streamer.stream()]
+
+
+def hold_records(streamer: SfStreamer) -> list:
+    return list(streamer.stream())
+
+
+def hold_decoded(streamer: SfStreamer) -> list:
+    records = list(streamer.stream())
+    for record in records:
+        record.sf_data
+    return records
+
+
+def stream_dicts(streamer: SfStreamer) -> None:
+    for record in streamer.stream():
+        record.to_dict()
+
+
+def stream_records(streamer: SfStreamer) -> None:
+    for record in streamer.stream():
+        record.sf_data
+
+
+SCENARIOS = {
+    "hold-dicts": hold_dicts,
+    "hold-records": hold_records,
+    "hold-decoded": hold_decoded,
+    "stream-dicts": stream_dicts,
+    "stream-records": stream_records,
+}
+
+
+def run_scenario(name: str, afp_path: str, trace: bool) -> dict:
+    """
+    Run a scenario once (in a fresh worker process), under tracemalloc if trace is set.
+
+    Returns:
+        dict: Wall time, RSS once imported and peak RSS in MB, generation 0 collections,
+            and, when traced, the bytes and blocks still allocated while the result is held.
+    """
+    logging.disable(logging.INFO)
+    streamer = SfStreamer(afp_path)
+
+    # ru_maxrss is in KiB on Linux
+    imported = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    if trace:
+        tracemalloc.start()
+    blocks = sys.getallocatedblocks()
+    collections = gc.get_stats()[0]["collections"]
+
+    start = time.perf_counter()
+    held = SCENARIOS[name](streamer)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "elapsed": round(elapsed, 3),
+        "imported_rss_mb": round(imported, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "gc_collections": gc.get_stats()[0]["collections"] - collections,
+    }
+    if trace:
+        result["retained_bytes"] = tracemalloc.get_traced_memory()[0]
+        result["retained_blocks"] = sys.getallocatedblocks() - blocks
+        tracemalloc.stop()
+    del held
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Memory benchmark of the streamed records")
+    parser.add_argument("--afp", help="AFP file to measure (default: a generated file)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Scenarios ({', '.join(SCENARIOS)})")
+    add_config_arguments(parser.add_argument_group("generated file (without --afp)"))
+    parser.set_defaults(**SPOOL_FILE.__dict__)
+    args = parser.parse_args()
+
+    names = args.scenarios.split(",")
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))} ({', '.join(SCENARIOS)})")
+
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        afp_path = args.afp
+        if afp_path is None:
+            afp_path = os.path.join(tmp_dir, "spool.afp")
+            generate(afp_path, config_from_args(args))
+        sf_count = sum(1 for _ in SfStreamer(afp_path).stream())
+        print(f"{afp_path}: {os.path.getsize(afp_path) / 1e6:.1f} MB, {sf_count} SF")
+
+        print(f"\n{'scenario':<16}{'time (s)':>10}{'RSS MB':>9}{'run MB':>9}{'gc gen0':>9}{'B/SF':>8}{'blocks/SF':>11}")
+        # A fresh process per scenario: peak RSS is not shared (the traced run only reads tracemalloc)
+        context = multiprocessing.get_context("spawn")
+        for name in names:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(run_scenario, name, afp_path, False).result()
+                retained = ""
+                if name.startswith("hold-"):
+                    traced = executor.submit(run_scenario, name, afp_path, True).result()
+                    retained = (f"{traced['retained_bytes'] / sf_count:>8.0f}"
+                                f"{traced['retained_blocks'] / sf_count:>11.1f}")
+            print(f"{name:<16}{result['elapsed']:>10.3f}{result['peak_rss_mb']:>9}"
+                  f"{result['peak_rss_mb'] - result['imported_rss_mb']:>9.1f}{result['gc_collections']:>9}{retained}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
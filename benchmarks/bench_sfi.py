@@ -0,0 +1,143 @@
+"""
+Benchmark of the structured field introducer (SFI) decoding.
+
+Walks every structured field of a generated file (or of --afp <file>) with:
+    parse_sfi: SfParser.parse_sfi(), one SFI_HANDLERS call and one read per SFI_STRUCTURE
+        component (the configuration-driven reference path)
+    unpack_sfi: SfParser.unpack_sfi(), one SFI_HEADER unpack over the memory map, as read_sf()
+    unpack_sfi+dict: unpack_sfi() then build_sfi_data(), the cost of an SF that is yielded
+and a complete JSON run, whose SF/s is the one logged by AFPStreamProcessor.run.
+The SFI dicts of both paths are compared before the measures.
+
+Usage:
+    python benchmarks/bench_sfi.py [--afp FILE | --documents N --pages N ...] [--repeat N]
+"""
+
+import argparse
+import logging
+import mmap
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.afp_generator import GeneratorConfig, add_config_arguments, config_from_args, generate  # noqa: E402
+from parser.afp import SfStreamer  # noqa: E402
+from parser.afp.sf_streamer import SfParser  # noqa: E402
+from parser.afp.sfi_config import SFI_HEADER_LEN  # noqa: E402
+from processor.afp_stream_processor import AFPStreamProcessor  # noqa: E402
+from writer.writer_factory import create_writer  # noqa: E402
+
+SPOOL_FILE = GeneratorConfig(documents=5000, pages=3, document_tles=8, page_tles=4)
+"""Default generated file: 5,000 documents of 3 pages, about 250k structured fields."""
+
+
+def walk_parse_sfi(mapped) -> int:
+    count = 0
+    offset = 0
+    file_len = len(mapped)
+    while offset < file_len:
+        # parse_sfi() reads from the byte following the carriage control
+        mapped.seek(offset + 1)
+        sfi_data = SfParser.parse_sfi(mapped)
+        offset += sfi_data['sf_len'] + 1
+        count += 1
+    return count
+
+
+def walk_unpack_sfi(mapped) -> int:
+    count = 0
+    offset = 0
+    file_len = len(mapped)
+    unpack_sfi = SfParser.unpack_sfi
+    while offset < file_len:
+        sf_len, sf_id, flags, extension_len = unpack_sfi(mapped, offset)
+        offset += sf_len + 1
+        count += 1
+    return count
+
+
+def walk_unpack_sfi_dict(mapped) -> int:
+    count = 0
+    offset = 0
+    file_len = len(mapped)
+    unpack_sfi = SfParser.unpack_sfi
+    build_sfi_data = SfParser.build_sfi_data
+    while offset < file_len:
+        sfi = unpack_sfi(mapped, offset)
+        build_sfi_data(mapped, offset + 1 + SFI_HEADER_LEN + sfi[3], sfi)
+        offset += sfi[0] + 1
+        count += 1
+    return count
+
+
+WALKS = {"parse_sfi": walk_parse_sfi, "unpack_sfi": walk_unpack_sfi, "unpack_sfi+dict": walk_unpack_sfi_dict}
+
+
+def check_same_sfi(mapped) -> None:
+    """Compare the SFI dicts built by both paths for every structured field."""
+    offset = 0
+    while offset < len(mapped):
+        mapped.seek(offset + 1)
+        reference = SfParser.parse_sfi(mapped)
+        del reference['sf_id_bytes']
+        sfi = SfParser.unpack_sfi(mapped, offset)
+        sfi_data = SfParser.build_sfi_data(mapped, offset + 1 + SFI_HEADER_LEN + sfi[3], sfi)
+        if sfi_data != reference:
+            raise AssertionError(f"SFI at offset {offset}: {sfi_data} != {reference}")
+        offset += sfi[0] + 1
+
+
+def bench_walk(mapped, walk) -> float:
+    start = time.perf_counter()
+    walk(mapped)
+    return time.perf_counter() - start
+
+
+def bench_run(afp_path: str, output_path: str) -> float:
+    processor = AFPStreamProcessor(SfStreamer(afp_path))
+    processor.set_writer(create_writer("json", Path(afp_path).name, output_path))
+    start = time.perf_counter()
+    processor.run(output_path)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark of the SFI decoding")
+    parser.add_argument("--afp", help="AFP file to measure (default: a generated file)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measure, the best one is reported")
+    add_config_arguments(parser.add_argument_group("generated file (without --afp)"))
+    parser.set_defaults(**SPOOL_FILE.__dict__)
+    args = parser.parse_args()
+
+    # Processor logs would be measured too
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        afp_path = args.afp
+        if afp_path is None:
+            afp_path = os.path.join(tmp_dir, "spool.afp")
+            generate(afp_path, config_from_args(args))
+
+        with open(afp_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            sf_count = walk_unpack_sfi(mapped)
+            print(f"{afp_path}: {os.path.getsize(afp_path) / 1e6:.1f} MB, {sf_count} SF")
+            check_same_sfi(mapped)
+
+            print(f"\n{'measure':<18}{'time (s)':>10}{'SF/s':>12}")
+            for name, walk in WALKS.items():
+                elapsed = min(bench_walk(mapped, walk) for _ in range(args.repeat))
+                print(f"{name:<18}{elapsed:>10.3f}{sf_count / elapsed:>12.0f}")
+
+        output_path = os.path.join(tmp_dir, "out.json")
+        elapsed = min(bench_run(afp_path, output_path) for _ in range(args.repeat))
+        print(f"{'run json':<18}{elapsed:>10.3f}{sf_count / elapsed:>12.0f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
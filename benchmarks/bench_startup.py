@@ -0,0 +1,202 @@
+"""
+Startup benchmark of the command line application.
+
+Runs main.py on a small AFP file in fresh interpreters and measures the wall time of the
+whole process, dominated by the interpreter startup and the imports on such a file. A
+run under `python -X importtime` gives the import time and the slowest top-level
+imports. The modules of LAZY_MODULES must not be imported by a plain JSON run.
+
+The results can be saved as JSON and compared against a stored baseline.
+
+Usage:
+    python benchmarks/bench_startup.py [--afp FILE] [--format json] [--repeat N]
+                                       [--save results.json] [--baseline baseline.json] [--tolerance 0.2]
+                                       [--max-time SECONDS]
+"""
+
+import argparse
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import orjson  # noqa: E402
+
+from benchmarks.afp_generator import GeneratorConfig, generate  # noqa: E402
+
+SMALL_FILE = GeneratorConfig(documents=10, pages=2, resource_groups=0, page_images=0)
+"""Content of the generated small file: a few documents, no image."""
+
+LAZY_MODULES = (
+    "pydantic",
+    "sqlite3",
+    # Not lzma: argparse loads it (through shutil)
+    "gzip",
+    "http.server",
+    "cProfile",
+    "tracemalloc",
+    "concurrent.futures.process",
+    "processor.afp_parallel_processor",
+    "processor.afp_pipelined_processor",
+    "processor.profiler",
+    "cache.result_cache",
+    "metrics.server",
+)
+"""Modules only imported when an option needs them (output format, --jobs, --profile...)."""
+
+TOP_IMPORTS = 10
+
+
+def run_main(afp_path: str, output_format: str, work_dir: str, importtime: bool = False) -> tuple[float, str]:
+    """
+    Run main.py in a fresh interpreter.
+
+    Returns:
+        tuple: (wall time in seconds, standard error)
+    """
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += [
+        str(ROOT / "main.py"), "-f", afp_path, "-t", "afp", "-o", output_format,
+        "--output", os.path.join(work_dir, f"out.{output_format}"),
+    ]
+
+    start = time.perf_counter()
+    # In work_dir: the log file of the application is written there
+    result = subprocess.run(command, cwd=work_dir, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+
+    if result.returncode != 0:
+        raise RuntimeError(f"main.py failed ({result.returncode}):\n{result.stderr}")
+    return elapsed, result.stderr
+
+
+def parse_importtime(stderr: str) -> tuple[float, list[tuple[str, float]], set[str]]:
+    """
+    Parse the `-X importtime` lines.
+
+    Returns:
+        tuple: (total import time in ms, top-level imports with their cumulative time in ms,
+        names of all the modules imported)
+    """
+    total = 0.0
+    top_level = []
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line[len("import time:"):].split("|")
+        module = name.strip()
+        modules.add(module)
+        # Nested imports are indented by 2 spaces per level
+        if not name[1:].startswith(" "):
+            cumulative_ms = int(cumulative) / 1000
+            total += cumulative_ms
+            top_level.append((module, cumulative_ms))
+
+    top_level.sort(key=lambda item: item[1], reverse=True)
+    return total, top_level, modules
+
+
+def measure(afp_path: str, output_format: str, repeat: int) -> dict:
+    """Measure the startup of main.py on a file: best wall time, import time and lazy modules imported."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Warm up the file system cache and the bytecode cache
+        run_main(afp_path, output_format, work_dir)
+        best = min(run_main(afp_path, output_format, work_dir)[0] for _ in range(repeat))
+        baseline = min(_run_python(["-c", "pass"]) for _ in range(repeat))
+        _, stderr = run_main(afp_path, output_format, work_dir, importtime=True)
+
+    import_ms, top_level, modules = parse_importtime(stderr)
+    return {
+        "elapsed": round(best, 4),
+        "interpreter": round(baseline, 4),
+        "import_ms": round(import_ms, 1),
+        "top_imports": [{"module": name, "ms": round(ms, 1)} for name, ms in top_level[:TOP_IMPORTS]],
+        "lazy_modules_imported": sorted(name for name in LAZY_MODULES if name in modules),
+    }
+
+
+def _run_python(args: list[str]) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], check=True)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Startup benchmark of main.py")
+    parser.add_argument("--afp", help="AFP file to process (default: a small generated file)")
+    parser.add_argument("--format", default="json", help="Output format (json by default)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs measured, the best one is kept")
+    parser.add_argument("--save", help="Path of the JSON results")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.20,
+                        help="Wall time increase against the baseline reported as a regression (default: 0.20)")
+    parser.add_argument("--max-time", type=float,
+                        help="Wall time in seconds above which the run is reported as a regression")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.afp:
+            afp_path = args.afp
+            source = {"path": afp_path}
+        else:
+            afp_path = os.path.join(tmp_dir, "small.afp")
+            source = {"generator": SMALL_FILE.__dict__, **generate(afp_path, SMALL_FILE)}
+        source["size"] = os.path.getsize(afp_path)
+
+        result = measure(afp_path, args.format, args.repeat)
+
+    print(f"main.py -o {args.format} : {result['elapsed']:.3f}s "
+          f"(interpreter alone {result['interpreter']:.3f}s, imports {result['import_ms']:.1f} ms)")
+    print(f"\n{'top-level import':<40}{'ms':>8}")
+    for entry in result["top_imports"]:
+        print(f"{entry['module']:<40}{entry['ms']:>8.1f}")
+
+    regressions = []
+    if args.format == "json" and result["lazy_modules_imported"]:
+        regressions.append(f"modules imported eagerly: {', '.join(result['lazy_modules_imported'])}")
+    if args.max_time is not None and result["elapsed"] > args.max_time:
+        regressions.append(f"{result['elapsed']:.3f}s above --max-time {args.max_time:.3f}s")
+
+    report = {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "input": source,
+        "format": args.format,
+        "repeat": args.repeat,
+        "result": result,
+    }
+
+    if args.save:
+        with open(args.save, "wb") as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+        print(f"\nResults saved: {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, "rb") as f:
+            reference = orjson.loads(f.read())["result"]
+        change = result["elapsed"] / reference["elapsed"] - 1
+        print(f"\nbaseline {reference['elapsed']:.3f}s ({reference['import_ms']:.1f} ms of imports), "
+              f"now {result['elapsed']:.3f}s ({change:+.1%})")
+        if change > args.tolerance:
+            regressions.append(f"{change:+.1%} against the baseline (tolerance {args.tolerance:.0%})")
+
+    if regressions:
+        print(f"\nRegressions: {'; '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
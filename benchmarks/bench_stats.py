@@ -0,0 +1,94 @@
+"""
+Benchmark of the header-only statistics mode (--stats).
+
+Measures, on a generated file (or on --afp <file>), the MB/s of:
+    read: sequential read of the file in 1 MiB blocks (upper bound of a single pass)
+    stats: SpoolStats walk of the structured field introducers
+    json: complete JSON run, which gives the same counts today
+The best of --repeat runs is reported: the file is read from the page cache.
+
+Usage:
+    python benchmarks/bench_stats.py [--afp FILE | --documents N --image-size BYTES ...] [--repeat N]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.afp_generator import GeneratorConfig, add_config_arguments, config_from_args, generate  # noqa: E402
+from parser.afp import SfStreamer  # noqa: E402
+from parser.afp.spool_stats import SpoolStats  # noqa: E402
+from processor.afp_stream_processor import AFPStreamProcessor  # noqa: E402
+from writer.writer_factory import create_writer  # noqa: E402
+
+SPOOL_FILE = GeneratorConfig(documents=5000, pages=3, image_size=16384)
+"""Default generated file (250 MB): 5,000 documents of 3 pages with a 16 KiB image per page."""
+
+READ_BLOCK = 1024 * 1024
+
+
+def bench_read(afp_path: str, output_path: str) -> float:
+    block = bytearray(READ_BLOCK)
+    start = time.perf_counter()
+    with open(afp_path, "rb", buffering=0) as f:
+        while f.readinto(block):
+            pass
+    return time.perf_counter() - start
+
+
+def bench_stats(afp_path: str, output_path: str) -> float:
+    start = time.perf_counter()
+    SpoolStats.build(afp_path)
+    return time.perf_counter() - start
+
+
+def bench_json(afp_path: str, output_path: str) -> float:
+    processor = AFPStreamProcessor(SfStreamer(afp_path))
+    processor.set_writer(create_writer("json", Path(afp_path).name, output_path))
+    start = time.perf_counter()
+    processor.run(output_path)
+    return time.perf_counter() - start
+
+
+SCENARIOS = {"read": bench_read, "stats": bench_stats, "json": bench_json}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark of the header-only statistics mode")
+    parser.add_argument("--afp", help="AFP file to measure (default: a generated file)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measure, the best one is reported")
+    add_config_arguments(parser.add_argument_group("generated file (without --afp)"))
+    parser.set_defaults(**SPOOL_FILE.__dict__)
+    args = parser.parse_args()
+
+    # Processor logs would be measured too
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        afp_path = args.afp
+        if afp_path is None:
+            afp_path = os.path.join(tmp_dir, "spool.afp")
+            generate(afp_path, config_from_args(args))
+        size_mb = os.path.getsize(afp_path) / 1e6
+
+        stats = SpoolStats.build(afp_path)
+        print(f"{afp_path}: {size_mb:.1f} MB, {stats.sf_count} SF, {stats.nb_of_docs} documents, "
+              f"{stats.nb_of_pages} pages")
+
+        output_path = os.path.join(tmp_dir, "out.json")
+        print(f"\n{'scenario':<10}{'time (s)':>10}{'MB/s':>10}")
+        for name, bench in SCENARIOS.items():
+            elapsed = min(bench(afp_path, output_path) for _ in range(args.repeat))
+            print(f"{name:<10}{elapsed:>10.3f}{size_mb / elapsed:>10.1f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,235 @@
+"""
+End-to-end benchmark suite.
+
+Measures the streamer alone, the writer alone and complete runs (streamer, processor
+and writer) on an AFP file, by default a file written by afp_generator. Each scenario
+runs in a fresh process, which gives its own peak RSS. The results are saved as JSON
+and can be compared against a stored baseline.
+
+Usage:
+    python benchmarks/bench_suite.py [--afp FILE | generator options] [--scenarios a,b] [--repeat N]
+                                     [--save results.json] [--baseline baseline.json] [--tolerance 0.1]
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orjson  # noqa: E402
+
+from benchmarks.afp_generator import add_config_arguments, config_from_args, generate  # noqa: E402
+from domain.afp_builder import AfpBuilder  # noqa: E402
+from parser.afp import SfStreamer  # noqa: E402
+from parser.afp.sf_filter import SfFilter  # noqa: E402
+from processor.afp_stream_processor import AFPStreamProcessor  # noqa: E402
+from writer.writer_factory import create_writer  # noqa: E402
+
+
+def bench_streamer(afp_path: str, output_dir: str) -> int:
+    """Stream and decode every structured field."""
+    count = 0
+    for record in SfStreamer(afp_path).stream():
+        record.sf_data
+        count += 1
+    return count
+
+
+def bench_streamer_filtered(afp_path: str, output_dir: str) -> int:
+    """Stream and decode the structured fields used by the JSON writer, skip the others."""
+    streamer = SfStreamer(afp_path)
+    streamer.set_config(SfFilter().restrict(AfpBuilder.SF_NAMES))
+    count = 0
+    for record in streamer.stream():
+        record.decode()
+        count += 1
+    return count
+
+
+def prepare_records(afp_path: str) -> list:
+    """Parse and decode the records written by the JSON writer (not measured)."""
+    streamer = SfStreamer(afp_path)
+    streamer.set_config(SfFilter().restrict(AfpBuilder.SF_NAMES))
+    records = list(streamer.stream())
+    for record in records:
+        record.decode()
+    return records
+
+
+def bench_writer(output_format: str):
+    """Write already decoded records: measures the writer alone."""
+
+    def run(records: list, afp_path: str, output_dir: str) -> int:
+        with create_writer(output_format, Path(afp_path).name, os.path.join(output_dir, f"out.{output_format}")) as writer:
+            for record in records:
+                writer.write(record)
+        return len(records)
+
+    return run
+
+
+def bench_end_to_end(output_format: str):
+    """Complete run, as main.py does: streamer, processor and writer."""
+
+    def run(afp_path: str, output_dir: str) -> int:
+        output_path = os.path.join(output_dir, f"out.{output_format}")
+        processor = AFPStreamProcessor(SfStreamer(afp_path))
+        processor.set_writer(create_writer(output_format, Path(afp_path).name, output_path))
+        processor.run(output_path)
+        return processor.sf_count
+
+    return run
+
+
+SCENARIOS = {
+    "streamer": bench_streamer,
+    "streamer-filtered": bench_streamer_filtered,
+    "writer-json": bench_writer("json"),
+    "writer-ndjson": bench_writer("ndjson"),
+    "writer-sqlite": bench_writer("sqlite"),
+    "e2e-json": bench_end_to_end("json"),
+    "e2e-ndjson": bench_end_to_end("ndjson"),
+    "e2e-sqlite": bench_end_to_end("sqlite"),
+}
+"""Scenario name -> function returning the number of structured fields handled."""
+
+WRITER_PREFIX = "writer-"
+
+
+def run_scenario(name: str, afp_path: str, repeat: int) -> dict:
+    """
+    Run a scenario repeat times (in a worker process), keep the best time.
+
+    Returns:
+        dict: Best wall time, SF count, SF/s, MB/s of the input and peak RSS of the process.
+    """
+    # Processor logs would be measured too
+    logging.disable(logging.INFO)
+
+    scenario = SCENARIOS[name]
+    if name.startswith(WRITER_PREFIX):
+        records = prepare_records(afp_path)
+
+        def measured(output_dir: str) -> int:
+            return scenario(records, afp_path, output_dir)
+    else:
+        def measured(output_dir: str) -> int:
+            return scenario(afp_path, output_dir)
+
+    best = float("inf")
+    sf_count = 0
+    with tempfile.TemporaryDirectory() as output_dir:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            sf_count = measured(output_dir)
+            best = min(best, time.perf_counter() - start)
+
+    size = os.path.getsize(afp_path)
+    return {
+        "elapsed": round(best, 4),
+        "sf_count": sf_count,
+        "sf_per_s": round(sf_count / best),
+        "mb_per_s": round(size / 1e6 / best, 2),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Print the results against a baseline.
+
+    Returns:
+        list: Scenarios whose SF/s dropped by more than tolerance.
+    """
+    regressions = []
+    print(f"\n{'scenario':<20}{'SF/s':>12}{'baseline':>12}{'change':>9}{'RSS MB':>9}{'baseline':>10}")
+    for name, result in results["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+
+        change = result["sf_per_s"] / reference["sf_per_s"] - 1
+        if change < -tolerance:
+            regressions.append(name)
+        print(f"{name:<20}{result['sf_per_s']:>12}{reference['sf_per_s']:>12}{change:>+9.1%}"
+              f"{result['peak_rss_mb']:>9}{reference['peak_rss_mb']:>10}")
+
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="End-to-end benchmark suite")
+    parser.add_argument("--afp", help="AFP file to measure (default: a generated file)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario, the best one is kept")
+    parser.add_argument("--save", help="Path of the JSON results")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="SF/s drop against the baseline reported as a regression (default: 0.10)")
+    add_config_arguments(parser.add_argument_group("generated file (without --afp)"))
+    args = parser.parse_args()
+
+    names = args.scenarios.split(",")
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))} ({', '.join(SCENARIOS)})")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.afp:
+            afp_path = args.afp
+            source = {"path": afp_path}
+        else:
+            config = config_from_args(args)
+            afp_path = os.path.join(tmp_dir, "generated.afp")
+            source = {"generator": config.__dict__, **generate(afp_path, config)}
+        source["size"] = os.path.getsize(afp_path)
+
+        print(f"{'scenario':<20}{'time (s)':>10}{'SF':>10}{'SF/s':>12}{'MB/s':>9}{'RSS MB':>9}")
+        results = {}
+        # A fresh process per scenario: imports, caches and peak RSS are not shared
+        context = multiprocessing.get_context("spawn")
+        for name in names:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(run_scenario, name, afp_path, args.repeat).result()
+            results[name] = result
+            print(f"{name:<20}{result['elapsed']:>10.3f}{result['sf_count']:>10}{result['sf_per_s']:>12}"
+                  f"{result['mb_per_s']:>9}{result['peak_rss_mb']:>9}")
+
+    report = {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "input": source,
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+    if args.save:
+        with open(args.save, "wb") as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+        print(f"\nResults saved: {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, "rb") as f:
+            baseline = orjson.loads(f.read())
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
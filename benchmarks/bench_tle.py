@@ -0,0 +1,109 @@
+"""
+Benchmark of the TLE (Tag Logical Element) fast path.
+
+Compares, on a generated file with millions of TLEs (or on --afp <file>):
+    decode: name/value extraction from the TLE data, by decoding sf_data and scanning its
+        triplet dicts (dict path) or with decode_tle() (fast path).
+    e2e: complete JSON runs, the builder reading the TLEs through either path.
+
+Usage:
+    python benchmarks/bench_tle.py [--afp FILE | --documents N --document-tles N ...] [--repeat N]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.afp_generator import GeneratorConfig, add_config_arguments, config_from_args, generate  # noqa: E402
+from domain.afp_builder import AfpBuilder  # noqa: E402
+from parser.afp import SfStreamer  # noqa: E402
+from parser.afp.sf_filter import SfFilter  # noqa: E402
+from parser.afp.sf_handlers import SF_DECODERS, TLE_ID, decode_tle  # noqa: E402
+from processor.afp_stream_processor import AFPStreamProcessor  # noqa: E402
+from writer.writer_factory import create_writer  # noqa: E402
+
+TLE_FILE = GeneratorConfig(documents=200_000, pages=1, document_tles=8, page_tles=2, document_nops=0,
+                           page_nops=0, resource_groups=0, page_images=0, text_size=0)
+"""Default generated file: 2,000,000 TLEs, no image."""
+
+
+def dict_path(data) -> tuple[str, str]:
+    """Name/value extraction through sf_data, as the builder did before the fast path."""
+    triplets = SF_DECODERS[TLE_ID].decode(data).get('TRIPLETS', [])
+    name = next((item['FQN'].get('fqn_name', '') for item in triplets if 'FQN' in item), None)
+    value = next((item['AttrVal'].get('att_val', '') for item in triplets if 'AttrVal' in item), '')
+    return name or '', value
+
+
+def dict_tag_logical_element(builder: AfpBuilder, record) -> None:
+    name, value = dict_path(record.payload)
+    if name:
+        builder.add_tle(name, value)
+
+
+def bench_decode(payloads: list, extract) -> float:
+    start = time.perf_counter()
+    for data in payloads:
+        extract(data)
+    return time.perf_counter() - start
+
+
+def bench_end_to_end(afp_path: str, output_path: str) -> float:
+    processor = AFPStreamProcessor(SfStreamer(afp_path))
+    processor.set_writer(create_writer("json", Path(afp_path).name, output_path))
+    start = time.perf_counter()
+    processor.run(output_path)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark of the TLE fast path")
+    parser.add_argument("--afp", help="AFP file to measure (default: a generated file)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measure, the best one is reported")
+    add_config_arguments(parser.add_argument_group("generated file (without --afp)"))
+    parser.set_defaults(**TLE_FILE.__dict__)
+    args = parser.parse_args()
+
+    # Processor logs would be measured too
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        afp_path = args.afp
+        if afp_path is None:
+            afp_path = os.path.join(tmp_dir, "tle.afp")
+            generate(afp_path, config_from_args(args))
+
+        streamer = SfStreamer(afp_path)
+        streamer.set_config(SfFilter().restrict({'TLE'}))
+        payloads = [record.payload.tobytes() for record in streamer.stream()]
+        print(f"{afp_path}: {os.path.getsize(afp_path) / 1e6:.1f} MB, {len(payloads)} TLEs")
+
+        print(f"\n{'measure':<16}{'dict (s)':>10}{'fast (s)':>10}{'speedup':>9}{'fast TLE/s':>14}")
+        results = {}
+        for path_name, extract in (("dict", dict_path), ("fast", decode_tle)):
+            results[path_name] = min(bench_decode(payloads, extract) for _ in range(args.repeat))
+        print(f"{'decode':<16}{results['dict']:>10.3f}{results['fast']:>10.3f}"
+              f"{results['dict'] / results['fast']:>8.1f}x{len(payloads) / results['fast']:>14.0f}")
+
+        output_path = os.path.join(tmp_dir, "out.json")
+        fast_path = AfpBuilder.tag_logical_element
+        try:
+            AfpBuilder.tag_logical_element = dict_tag_logical_element
+            results["dict"] = min(bench_end_to_end(afp_path, output_path) for _ in range(args.repeat))
+        finally:
+            AfpBuilder.tag_logical_element = fast_path
+        results["fast"] = min(bench_end_to_end(afp_path, output_path) for _ in range(args.repeat))
+        print(f"{'e2e json':<16}{results['dict']:>10.3f}{results['fast']:>10.3f}"
+              f"{results['dict'] / results['fast']:>8.1f}x{len(payloads) / results['fast']:>14.0f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,67 @@
+"""
+Benchmark of the output writers.
+
+Parses an AFP file once, then writes its structure with each uncompressed output
+format, reporting the wall time, the load throughput and the number of bytes written.
+
+Usage:
+    python benchmarks/bench_writers.py <afp_file> [--formats json,ndjson,sqlite] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from parser.afp import SfStreamer  # noqa: E402
+from parser.afp.sf_filter import SfFilter  # noqa: E402
+from writer.writer_factory import create_writer  # noqa: E402
+
+
+def write_output(records, output_format: str, afp_name: str, output_path: str) -> float:
+    """Write the output of the records, return the wall time."""
+    start = time.perf_counter()
+    with create_writer(output_format, afp_name, output_path) as writer:
+        for record in records:
+            writer.write(record)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark of the output writers")
+    parser.add_argument("afp_file")
+    parser.add_argument("--formats", default="json,ndjson,sqlite", help="Comma-separated output formats")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per format, the best one is reported")
+    args = parser.parse_args()
+
+    formats = args.formats.split(",")
+    afp_name = Path(args.afp_file).name
+
+    # Parse once: only the writers are measured
+    streamer = SfStreamer(args.afp_file)
+    writer = create_writer(formats[0], afp_name, os.devnull)
+    streamer.set_config(SfFilter().restrict(writer.consumed_sf_names()))
+    records = list(streamer.stream())
+    for record in records:
+        record.decode()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{'format':<10}{'time (s)':>10}{'SF/s':>12}{'bytes':>14}")
+        for output_format in formats:
+            output_path = os.path.join(tmp_dir, f"out.{output_format}")
+            elapsed = min(
+                write_output(records, output_format, afp_name, output_path)
+                for _ in range(args.repeat)
+            )
+            size = os.path.getsize(output_path)
+            print(f"{output_format:<10}{elapsed:>10.3f}{len(records) / elapsed:>12.0f}{size:>14}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,9 @@
+"""
+Cache module.
+
+Provides a local, content-addressed cache of the parse results.
+"""
+
+from .result_cache import ResultCache
+
+__all__ = ["ResultCache"]
@@ -0,0 +1,247 @@
+"""
+Module for the content-addressed cache of parse results.
+
+An output is stored under a key derived from the content of the input file, its name
+(written in the output), the structured field filter, the output format and options,
+and the parser version. A repeated request is served with a hard link to the stored
+output (a copy across file systems) instead of a parse.
+
+The entries are evicted least recently used first when the cache exceeds its size.
+"""
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+
+import orjson
+
+from logger import get_logger
+from parser.afp import __version__
+from parser.afp.sf_filter import SfFilter
+
+CACHE_VERSION = 1
+"""Incremented when the key or the layout of the cache changes."""
+
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+
+ENTRY_SUFFIX = ".out"
+META_SUFFIX = ".meta"
+STATS_FILE = "stats.json"
+
+
+def fingerprint(path) -> str:
+    """
+    Hash the content of a file (BLAKE2b, 256 bits).
+
+    The whole file is hashed: at several hundred MB/s, it costs a small fraction of a parse.
+    """
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=32)).hexdigest()
+
+
+class ResultCache:
+    """
+    Local cache of the outputs of the parser, addressed by content.
+
+    Each entry is a pair of files in the cache directory: <key>.out, the output, and
+    <key>.meta, its size and modification time, checked on every hit so that an output
+    rewritten through its hard link is never served. The modification time of the
+    .meta file records the last use of the entry.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        """
+        Open (and create if needed) the cache directory.
+
+        Args:
+            cache_dir: Directory of the cache entries.
+            max_size: Size in bytes above which the least recently used entries are evicted.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+
+        # Lookups of this process, the totals are kept in stats.json
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.logger = get_logger(__name__)
+
+    def key(self, afp_path: str, sf_filter: SfFilter, output_format: str, options: Optional[dict] = None) -> str:
+        """
+        Compute the cache key of an output.
+
+        Args:
+            afp_path: Path of the input file.
+            sf_filter: Structured field filter of the configuration.
+            output_format: Output format.
+            options: Writer options changing the output bytes (e.g. compression level).
+
+        Returns:
+            str: Hexadecimal key.
+        """
+        sf_names = sf_filter.sf_names_to_parse
+        payload = orjson.dumps({
+            'cache': CACHE_VERSION,
+            'version': __version__,
+            'content': fingerprint(afp_path),
+            'name': Path(afp_path).name,
+            'sf_names': sorted(sf_names) if sf_names is not None else None,
+            'format': output_format,
+            'options': options or {},
+        }, option=orjson.OPT_SORT_KEYS)
+        return hashlib.blake2b(payload, digest_size=32).hexdigest()
+
+    def get(self, key: str, output_path: str) -> bool:
+        """
+        Serve a cached output.
+
+        Args:
+            key: Cache key of the output.
+            output_path: Path where the output is expected, replaced if it exists.
+
+        Returns:
+            bool: True on a hit (output_path holds the output), False on a miss. On a miss,
+            an output_path hard linked to other files (a former hit) is unlinked, so that the
+            parse writes a new file instead of rewriting the cache entry.
+        """
+        entry, meta = self._paths(key)
+
+        try:
+            expected = orjson.loads(meta.read_bytes())
+            stat = entry.stat()
+            valid = (stat.st_size, stat.st_mtime_ns) == (expected['size'], expected['mtime_ns'])
+        except FileNotFoundError:
+            valid = False
+        except (KeyError, TypeError, orjson.JSONDecodeError):
+            valid = False
+            self._remove(key)
+        else:
+            if not valid:
+                self.logger.warning(f"Cache entry {key[:16]} modified since stored, dropped")
+                self._remove(key)
+
+        if not valid:
+            output = Path(output_path)
+            if output.is_file() and output.stat().st_nlink > 1:
+                output.unlink()
+
+            self.misses += 1
+            self._record_lookup(hit=False)
+            return False
+
+        self._link(entry, output_path)
+        # Last use, for the LRU eviction
+        os.utime(meta)
+
+        self.hits += 1
+        self._record_lookup(hit=True)
+        return True
+
+    def put(self, key: str, output_path: str) -> None:
+        """
+        Store an output, then evict the least recently used entries beyond the cache size.
+
+        Args:
+            key: Cache key of the output.
+            output_path: Path of the output to store.
+        """
+        entry, meta = self._paths(key)
+        suffix = f".{os.getpid()}.tmp"
+
+        # Atomic replacements: a concurrent process never sees a partial entry
+        tmp_entry = entry.with_name(entry.name + suffix)
+        self._link(output_path, tmp_entry)
+        os.replace(tmp_entry, entry)
+
+        stat = entry.stat()
+        tmp_meta = meta.with_name(meta.name + suffix)
+        tmp_meta.write_bytes(orjson.dumps({
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'source': output_path,
+        }))
+        os.replace(tmp_meta, meta)
+
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        Remove the least recently used entries until the cache fits in max_size.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        entries = []
+        total = 0
+        for meta in self.cache_dir.glob(f"*{META_SUFFIX}"):
+            key = meta.name.removesuffix(META_SUFFIX)
+            try:
+                meta_stat = meta.stat()
+                size = meta_stat.st_size + self._paths(key)[0].stat().st_size
+            except FileNotFoundError:
+                # Removed by a concurrent process
+                continue
+            entries.append((meta_stat.st_mtime_ns, size, key))
+            total += size
+
+        removed = 0
+        entries.sort()
+        for _, size, key in entries:
+            if total <= self.max_size:
+                break
+            self._remove(key)
+            total -= size
+            removed += 1
+
+        self.evictions += removed
+        return removed
+
+    def stats(self) -> dict:
+        """Return the hit and miss totals of the cache (all processes)."""
+        try:
+            return orjson.loads((self.cache_dir / STATS_FILE).read_bytes())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            return {'hits': 0, 'misses': 0}
+
+    def stats_info(self) -> str:
+        """Get the hit and miss totals as a log message."""
+        stats = self.stats()
+        lookups = stats['hits'] + stats['misses']
+        rate = stats['hits'] / lookups if lookups else 0.0
+        return f"{stats['hits']} hits, {stats['misses']} misses ({rate:.0%} hit rate)"
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.cache_dir / f"{key}{ENTRY_SUFFIX}", self.cache_dir / f"{key}{META_SUFFIX}"
+
+    def _remove(self, key: str) -> None:
+        for path in self._paths(key):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _record_lookup(self, hit: bool) -> None:
+        # Read-modify-write without lock: concurrent processes may lose a count
+        stats = self.stats()
+        stats['hits' if hit else 'misses'] += 1
+
+        tmp_path = self.cache_dir / f"{STATS_FILE}.{os.getpid()}.tmp"
+        tmp_path.write_bytes(orjson.dumps(stats))
+        os.replace(tmp_path, self.cache_dir / STATS_FILE)
+
+    @staticmethod
+    def _link(source, target) -> None:
+        """Hard link source to target (replaced if it exists), copy if linking fails."""
+        target = Path(target)
+        if target.exists() or target.is_symlink():
+            target.unlink()
+
+        try:
+            os.link(source, target)
+        except OSError:
+            # Other file system, or no hard link support
+            shutil.copyfile(source, target)
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import argparse
+import glob
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from cli.cli import OUTPUT_FORMATS, VALID_TYPES
+
+SUFFIXES = {"afp": ".afp"}
+"""File type -> suffix of the files picked up in an input directory."""
+
+DEFAULT_SUMMARY = "batch_summary.json"
+
+
+def parse_args(argv: Optional[list[str]]) -> argparse.Namespace:
+    """Parse command line arguments"""
+
+    parser = argparse.ArgumentParser(
+        description=f"Batch file parsing tool ({", ".join(VALID_TYPES)}): one output per input file."
+    )
+    parser.add_argument(
+        "-i", "--input",
+        required=True,
+        help="Directory (files of the given type) or glob pattern of the files to analyze",
+    )
+    parser.add_argument(
+        "-t", "--type",
+        required=True,
+        choices=sorted(VALID_TYPES),
+        help=f"File mime type ({", ".join(VALID_TYPES)}). "
+    )
+    parser.add_argument(
+        "-c", "--config",
+        required=False,
+        help="Path to a JSON configuration file",
+    )
+    parser.add_argument(
+        "-o", "--output-format",
+        default="json",
+        choices=sorted(OUTPUT_FORMATS),
+        help="Output format (json by default)"
+    )
+    parser.add_argument(
+        "--output-dir",
+        required=False,
+        help="Directory of the outputs (default: next to each input file)",
+    )
+    parser.add_argument(
+        "--summary",
+        default=DEFAULT_SUMMARY,
+        help=f"Path of the JSON batch summary ({DEFAULT_SUMMARY} by default)",
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes, one file at a time each (number of CPUs by default)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        required=False,
+        help="Directory of the result cache: an input already parsed with the same options is served from it",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=1024,
+        help="Size in MiB of the result cache, least recently used outputs are evicted (1024 by default)",
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help="Use (and create if needed) a structured field index saved next to each file",
+    )
+    parser.add_argument(
+        "--all-sf",
+        action="store_true",
+        help="Decode every structured field, not only those used by the output format",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        required=False,
+        help="Write Prometheus metrics of the batch to this file at its end (node-exporter textfile collector)",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics on http://127.0.0.1:<port>/metrics during the batch",
+    )
+    return parser.parse_args(argv)
+
+
+def find_files(pattern: str, filetype: str) -> list[str]:
+    """
+    Return the files to process, largest first.
+
+    Args:
+        pattern: Directory (its files with the suffix of the file type) or glob pattern
+        filetype: File type
+
+    Returns:
+        Paths of the files, sorted by decreasing size
+    """
+    if os.path.isdir(pattern):
+        suffix = SUFFIXES[filetype]
+        paths = [entry.path for entry in os.scandir(pattern) if entry.name.lower().endswith(suffix)]
+    else:
+        paths = glob.glob(pattern)
+
+    files = [path for path in paths if os.path.isfile(path)]
+    # Largest first: the longest files do not end up alone at the end of the batch
+    files.sort(key=lambda path: (-os.path.getsize(path), path))
+    return files
+
+
+def validate_args(args: argparse.Namespace) -> None:
+    if args.config:
+        config_path = Path(args.config)
+        if not config_path.exists():
+            raise ValueError(f"Configuration file not found: {config_path}")
+        if not config_path.is_file():
+            raise ValueError(f"The configuration path is not a file: {config_path}")
+
+    if args.output_dir and not Path(args.output_dir).is_dir():
+        raise ValueError(f"The output directory does not exist: {args.output_dir}")
+    if args.jobs < 1:
+        raise ValueError(f"The number of jobs must be at least 1: {args.jobs}")
+    if args.cache_dir and args.cache_size < 1:
+        raise ValueError(f"The cache size must be at least 1 MiB: {args.cache_size}")
+    if args.metrics_port is not None and not 0 <= args.metrics_port <= 65535:
+        raise ValueError(f"The metrics port must be between 0 and 65535: {args.metrics_port}")
+
+@dataclass(frozen=True)
+class BatchInput:
+    paths: tuple[str, ...]
+    filetype: str
+    config_path: Optional[str] = None
+    output_format: str = "json"
+    output_dir: Optional[str] = None
+    summary_path: str = DEFAULT_SUMMARY
+    jobs: int = 1
+    use_index: bool = False
+    decode_all: bool = False
+    cache_dir: Optional[str] = None
+    cache_size: int = 1024
+    metrics_file: Optional[str] = None
+    metrics_port: Optional[int] = None
+
+    def output_path(self, path: str) -> str:
+        """Return the output path of an input file: <file>_structure.<format>, in output_dir if set."""
+        input_path = Path(path)
+        output_dir = Path(self.output_dir) if self.output_dir else input_path.parent
+        return str(output_dir / f"{input_path.stem}_structure.{self.output_format}")
+
+    def __str__(self) -> str:
+        config_str = f", Config : {self.config_path}" if self.config_path else ""
+        output_dir_str = f", Output dir : {self.output_dir}" if self.output_dir else ""
+        index_str = ", Index" if self.use_index else ""
+        all_sf_str = ", All SF" if self.decode_all else ""
+        cache_str = f", Cache : {self.cache_dir}" if self.cache_dir else ""
+        metrics_file_str = f", Metrics file : {self.metrics_file}" if self.metrics_file else ""
+        metrics_port_str = f", Metrics port : {self.metrics_port}" if self.metrics_port is not None else ""
+        return (f"Files : {len(self.paths)}, Type : {self.filetype}, Output : {self.output_format}, "
+                f"Jobs : {self.jobs}{config_str}{output_dir_str}{index_str}{all_sf_str}{cache_str}"
+                f"{metrics_file_str}{metrics_port_str}")
+
+def build_batch_input(args: argparse.Namespace) -> BatchInput:
+    validate_args(args)
+
+    filetype = args.type.lower()
+    paths = find_files(args.input, filetype)
+    if not paths:
+        raise ValueError(f"No file found: {args.input}")
+
+    batch_input = BatchInput(
+        paths=tuple(paths),
+        filetype=filetype,
+        config_path=args.config,
+        output_format=args.output_format,
+        output_dir=args.output_dir,
+        summary_path=args.summary,
+        jobs=args.jobs,
+        use_index=args.index,
+        decode_all=args.all_sf,
+        cache_dir=args.cache_dir,
+        cache_size=args.cache_size,
+        metrics_file=args.metrics_file,
+        metrics_port=args.metrics_port,
+    )
+    check_output_paths(batch_input)
+    return batch_input
+
+def check_output_paths(batch_input: BatchInput) -> None:
+    """
+    Check that no two input files have the same output path.
+
+    Raises:
+        ValueError: If inputs of the same name (e.g. from several directories with
+            --output-dir) would be written to the same output file.
+    """
+    inputs_by_output: dict[str, list[str]] = {}
+    for path in batch_input.paths:
+        output_path = os.path.normcase(os.path.abspath(batch_input.output_path(path)))
+        inputs_by_output.setdefault(output_path, []).append(path)
+
+    conflicts = [inputs for inputs in inputs_by_output.values() if len(inputs) > 1]
+    if conflicts:
+        raise ValueError(
+            f"Several input files would be written to the same output: "
+            f"{'; '.join(', '.join(inputs) for inputs in conflicts)} (rename them or remove --output-dir)"
+        )
+
+def run(argv: Optional[list[str]] = None) -> BatchInput:
+    """Entry point of the batch CLI"""
+
+    args = parse_args(argv)
+
+    # A dataclass is created from the parsed arguments after validation
+    return build_batch_input(args)
@@ -7,7 +7,9 @@ from pathlib import Path
 from typing import Optional
 
 VALID_TYPES = {"afp"}
-OUTPUT_FORMATS = {"json"}
+OUTPUT_FORMATS = {"json", "json.gz", "json.xz", "ndjson", "sqlite"}
+COMPRESSED_FORMATS = {"json.gz", "json.xz"}
+STDOUT = "-"
 
 def parse_args(argv: Optional[list[str]]) -> argparse.Namespace:
     """Parse command line arguments"""
@@ -37,6 +39,92 @@ def parse_args(argv: Optional[list[str]]) -> argparse.Namespace:
         choices=sorted(OUTPUT_FORMATS),
         help="Output format (json by default)"
     )
+    parser.add_argument(
+        "--output",
+        required=False,
+        help=f"Output file path, '{STDOUT}' for the standard output (ndjson only). "
+             "Default: <file>_structure.<output format>",
+    )
+    parser.add_argument(
+        "--compression-level",
+        type=int,
+        help="Compression level of json.gz/json.xz outputs (0-9, default: 6 for gz, 3 for xz)",
+    )
+    parser.add_argument(
+        "--compression-block-size",
+        type=int,
+        help="Size in MiB of the blocks compressed in parallel for json.gz/json.xz outputs (default: 4)",
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes, the file is split at document boundaries (1 by default)",
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help="Use (and create if needed) a structured field index saved next to the file",
+    )
+    parser.add_argument(
+        "--all-sf",
+        action="store_true",
+        help="Decode every structured field, not only those used by the output format",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Write the output on a background thread while parsing (single process only)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        required=False,
+        help="Directory of the result cache: an input already parsed with the same options is served from it",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=1024,
+        help="Size in MiB of the result cache, least recently used outputs are evicted (1024 by default)",
+    )
+    parser.add_argument(
+        "--profile",
+        required=False,
+        help="Profile the run (counters per SF type, time per stage) and write the report to this path "
+             "(JSON if it ends with .json, text tables otherwise)",
+    )
+    parser.add_argument(
+        "--profile-capture",
+        choices=["cprofile", "tracemalloc"],
+        help="Add a cProfile or tracemalloc capture of the run to the --profile report",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        required=False,
+        help="Write Prometheus metrics of the run to this file at its end (node-exporter textfile collector)",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics on http://127.0.0.1:<port>/metrics during the run",
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Parse the file while it is being written, until EPF or the idle timeout",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=60.0,
+        help="Seconds without growth of the file after which --follow stops (60 by default)",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Only summarize the file from its structured field introducers (counts and bytes per SF type, "
+             "documents, pages, medium maps), written to --output if given (JSON if it ends with .json)",
+    )
     return parser.parse_args(argv)
 
 
@@ -55,16 +143,84 @@ def validate_args(args: argparse.Namespace) -> None:
         if not config_path.is_file():
             raise ValueError(f"The configuration path is not a file: {config_path}")
 
+    if args.jobs < 1:
+        raise ValueError(f"The number of jobs must be at least 1: {args.jobs}")
+    if args.stats:
+        parse_options = args.jobs > 1 or args.index or args.pipeline or args.follow or args.cache_dir
+        if parse_options or args.profile or args.metrics_file or args.metrics_port is not None:
+            raise ValueError("--stats cannot be combined with --jobs, --index, --pipeline, --follow, --cache-dir, "
+                             "--profile or the metrics options")
+        if args.output == STDOUT:
+            raise ValueError("The --stats report cannot be written to the standard output")
+    if args.output == STDOUT:
+        if args.output_format != "ndjson":
+            raise ValueError("The standard output is only supported with the ndjson output format")
+        if args.jobs > 1:
+            raise ValueError("The standard output cannot be combined with --jobs")
+
+    compression_options = args.compression_level is not None or args.compression_block_size is not None
+    if compression_options and args.output_format not in COMPRESSED_FORMATS:
+        raise ValueError(f"Compression options require a compressed output format ({', '.join(sorted(COMPRESSED_FORMATS))})")
+    if args.compression_level is not None and not 0 <= args.compression_level <= 9:
+        raise ValueError(f"The compression level must be between 0 and 9: {args.compression_level}")
+    if args.compression_block_size is not None and args.compression_block_size < 1:
+        raise ValueError(f"The compression block size must be at least 1 MiB: {args.compression_block_size}")
+    if args.pipeline and args.jobs > 1:
+        raise ValueError("--pipeline cannot be combined with --jobs")
+    if args.follow:
+        if args.jobs > 1 or args.index or args.pipeline:
+            raise ValueError("--follow cannot be combined with --jobs, --index or --pipeline")
+        if args.idle_timeout <= 0:
+            raise ValueError(f"The idle timeout must be positive: {args.idle_timeout}")
+    if args.profile_capture and not args.profile:
+        raise ValueError("--profile-capture requires --profile")
+    if args.profile and (args.jobs > 1 or args.pipeline):
+        raise ValueError("--profile cannot be combined with --jobs or --pipeline")
+    if args.metrics_port is not None and not 0 <= args.metrics_port <= 65535:
+        raise ValueError(f"The metrics port must be between 0 and 65535: {args.metrics_port}")
+    if args.cache_dir:
+        if args.output == STDOUT or args.follow:
+            raise ValueError("--cache-dir cannot be combined with the standard output or --follow")
+        if args.cache_size < 1:
+            raise ValueError(f"The cache size must be at least 1 MiB: {args.cache_size}")
+
 @dataclass(frozen=True)
 class CliInput:
     path: str
     filetype: Optional[str]
     config_path: Optional[str] = None
     output_format: str = "json"
+    output_path: Optional[str] = None
+    jobs: int = 1
+    use_index: bool = False
+    decode_all: bool = False
+    pipeline: bool = False
+    follow_timeout: Optional[float] = None
+    cache_dir: Optional[str] = None
+    cache_size: int = 1024
+    profile_path: Optional[str] = None
+    profile_capture: Optional[str] = None
+    metrics_file: Optional[str] = None
+    metrics_port: Optional[int] = None
+    compression_level: Optional[int] = None
+    compression_block_size: Optional[int] = None
+    stats: bool = False
 
     def __str__(self) -> str:
         config_str = f", Config : {self.config_path}" if self.config_path else ""
-        return f"Path : {self.path}, Type : {self.filetype}, Output : {self.output_format}{config_str}"
+        jobs_str = f", Jobs : {self.jobs}" if self.jobs > 1 else ""
+        index_str = ", Index" if self.use_index else ""
+        all_sf_str = ", All SF" if self.decode_all else ""
+        pipeline_str = ", Pipeline" if self.pipeline else ""
+        follow_str = f", Follow : {self.follow_timeout}s idle timeout" if self.follow_timeout is not None else ""
+        cache_str = f", Cache : {self.cache_dir}" if self.cache_dir else ""
+        profile_str = f", Profile : {self.profile_path}" if self.profile_path else ""
+        metrics_file_str = f", Metrics file : {self.metrics_file}" if self.metrics_file else ""
+        metrics_port_str = f", Metrics port : {self.metrics_port}" if self.metrics_port is not None else ""
+        stats_str = ", Stats" if self.stats else ""
+        return (f"Path : {self.path}, Type : {self.filetype}, Output : {self.output_format}"
+                f"{config_str}{jobs_str}{index_str}{all_sf_str}{pipeline_str}{follow_str}{cache_str}{profile_str}"
+                f"{metrics_file_str}{metrics_port_str}{stats_str}")
 
 def build_cli_input(args: argparse.Namespace) -> CliInput:
     validate_args(args)
@@ -73,6 +229,21 @@ def build_cli_input(args: argparse.Namespace) -> CliInput:
         filetype=args.type.lower(),
         config_path=args.config if hasattr(args, 'config') else None,
         output_format=args.output_format if hasattr(args, 'output_format') else "json",
+        output_path=args.output if hasattr(args, 'output') else None,
+        jobs=args.jobs if hasattr(args, 'jobs') else 1,
+        use_index=args.index if hasattr(args, 'index') else False,
+        decode_all=args.all_sf if hasattr(args, 'all_sf') else False,
+        pipeline=args.pipeline if hasattr(args, 'pipeline') else False,
+        follow_timeout=args.idle_timeout if getattr(args, 'follow', False) else None,
+        cache_dir=args.cache_dir if hasattr(args, 'cache_dir') else None,
+        cache_size=args.cache_size if hasattr(args, 'cache_size') else 1024,
+        profile_path=args.profile if hasattr(args, 'profile') else None,
+        profile_capture=args.profile_capture if hasattr(args, 'profile_capture') else None,
+        metrics_file=args.metrics_file if hasattr(args, 'metrics_file') else None,
+        metrics_port=args.metrics_port if hasattr(args, 'metrics_port') else None,
+        compression_level=args.compression_level if hasattr(args, 'compression_level') else None,
+        compression_block_size=args.compression_block_size if hasattr(args, 'compression_block_size') else None,
+        stats=args.stats if hasattr(args, 'stats') else False,
     )
 
 def run(argv: Optional[list[str]] = None):
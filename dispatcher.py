@@ -1,12 +1,18 @@
 
-from typing import Dict, Callable
+from __future__ import annotations
 
-from parser.afp import SfStreamer
-from processor.afp_stream_processor import AFPStreamProcessor
-from processor.file_processor import Processor
+from typing import TYPE_CHECKING, Dict, Callable
+
+if TYPE_CHECKING:
+    from processor.file_processor import Processor
 
 class ParserDispatcher:
-    """Routes processing to the appropriate parser based on logical file type."""
+    """
+    Routes processing to the appropriate parser based on logical file type.
+
+    The factories import their parser and processor when called: a dispatcher costs
+    nothing for the file types (and processing modes) that are not dispatched.
+    """
 
     def __init__(self, registry: Dict[str, Callable[[], Processor]]) -> None:
         # Registry maps file types to processor factories
@@ -21,10 +27,32 @@ class ParserDispatcher:
 
         return factory()
 
-def init_dispatcher(path: str, config: str) -> ParserDispatcher:
+def init_dispatcher(path: str, config: str, jobs: int = 1, use_index: bool = False,
+                    decode_all: bool = False, pipeline: bool = False,
+                    follow_timeout: float | None = None) -> ParserDispatcher:
     """Initializes the dispatcher with available parsers."""
+
+    def create_afp_processor() -> Processor:
+        from parser.afp import SfStreamer
+
+        sf_streamer = SfStreamer(path)
+        if use_index:
+            sf_streamer.use_index()
+        if follow_timeout is not None:
+            sf_streamer.follow(follow_timeout)
+
+        if jobs > 1:
+            from processor.afp_parallel_processor import ParallelAFPStreamProcessor
+            return ParallelAFPStreamProcessor(sf_streamer, config, jobs, decode_all)
+        if pipeline:
+            from processor.afp_pipelined_processor import PipelinedAFPStreamProcessor
+            return PipelinedAFPStreamProcessor(sf_streamer, config, decode_all)
+
+        from processor.afp_stream_processor import AFPStreamProcessor
+        return AFPStreamProcessor(sf_streamer, config, decode_all)
+
     return ParserDispatcher(
         registry={
-            "afp": lambda: AFPStreamProcessor(SfStreamer(path), config),
+            "afp": create_afp_processor,
         }
-    )
\ No newline at end of file
+    )
@@ -18,8 +18,8 @@ class Page(BaseModel):
 
     page_number: str = Field(default=None, description="Page number")
     bac_papier: str = Field(default="NA", description="IMM value for paper tray selection")
-    tle: Optional[list[Tle]] = Field(default=[], description="Page-specific TLEs")
-    nop: Optional[list[str]] = Field(default=[], description="Page-specific NOPs")
+    tle: Optional[list[Tle]] = Field(default_factory=list, description="Page-specific TLEs")
+    nop: Optional[list[str]] = Field(default_factory=list, description="Page-specific NOPs")
 
     def add_tle(self, tle: Tle) -> None:
         """Add a TLE to the page."""
@@ -42,8 +42,8 @@ class Document(BaseModel):
 
     doc_number: str = Field(default=None, description="Document number")
     pages: List[Page] = Field(default_factory=list, description="Document pages list")
-    tle: Optional[list[Tle]] = Field(default=[], description="Document-specific TLEs")
-    nop: Optional[list[str]] = Field(default=[], description="Document-specific NOPs")
+    tle: Optional[list[Tle]] = Field(default_factory=list, description="Document-specific TLEs")
+    nop: Optional[list[str]] = Field(default_factory=list, description="Document-specific NOPs")
 
     def add_page(self, page: Page) -> None:
         """Add a file to the document."""
@@ -67,7 +67,7 @@ class Afp(BaseModel):
     """Represents an AFP file."""
 
     name: str = Field(default=None, description="AFP file name")
-    nop: Optional[list[str]] = Field(default=[], description="AFP-specific NOPs")
+    nop: Optional[list[str]] = Field(default_factory=list, description="AFP-specific NOPs")
     nb_of_docs: int = Field(default=0, description="Number of documents in the AFP file")
     nb_of_pages: int = Field(default=0, description="Number of pages in the AFP file")
 
@@ -0,0 +1,115 @@
+from typing import Callable, Optional
+
+from domain.afp_compact import CompactDocument, NameTable
+from domain.afp_data import AfpData
+
+
+class AfpBuilder:
+    """
+    Builds the AFP document structure from parsed structured fields.
+
+    BNG starts a document, BPG starts a page of the current document, TLE and NOP
+    are attached to the current object (AFP, document or page) and IMM selects the
+    medium map ('bac_papier') of the following pages. The documents are compact
+    (domain.afp_compact), their TLE and medium map names being shared by all the
+    documents of the builder.
+    """
+
+    SF_NAMES = frozenset({'BNG', 'BPG', 'TLE', 'NOP', 'IMM'})
+    """Structured fields used to build the structure, all others are ignored."""
+
+    def __init__(
+        self,
+        afp_file_name: Optional[str] = None,
+        doc_offset: int = 0,
+        page_offset: int = 0,
+        on_begin_document: Optional[Callable[[CompactDocument], None]] = None,
+        names: Optional[NameTable] = None,
+        media: Optional[NameTable] = None,
+    ) -> None:
+        """
+        Initialize the builder.
+
+        Args:
+            afp_file_name: Name of the AFP file
+            doc_offset: Number of documents preceding the first BNG handled
+            page_offset: Number of pages preceding the first BPG handled
+            on_begin_document: Called with each new document, after the document count is updated
+            names: Table of the TLE names, to share it with the documents of another builder
+            media: Table of the medium map names, same
+        """
+        self.afp = AfpData(name=afp_file_name)
+        self.curr_doc: Optional[CompactDocument] = None
+        self.doc_count = doc_offset
+        self.page_count = page_offset
+        self.names = names if names is not None else NameTable()
+        self.media = media if media is not None else NameTable()
+        self.curr_obj = self.afp
+        self.cur_media = "NA"
+
+        self._on_begin_document = on_begin_document
+
+    def handle(self, record) -> None:
+        """Update the structure with an AFP structured field (SfRecord)."""
+        sf_name = record.sf_name
+
+        if sf_name == 'BNG':
+            self.begin_document()
+        elif sf_name == 'BPG':
+            self.begin_page()
+        elif sf_name == 'TLE':
+            self.tag_logical_element(record)
+        elif sf_name == 'NOP':
+            self.no_operation(record)
+        elif sf_name == 'IMM':
+            self.invoke_medium_map(record)
+
+    def begin_document(self) -> CompactDocument:
+        """Handle BNG (Begin Named Group) - start of document."""
+        self.doc_count += 1
+
+        self.curr_doc = CompactDocument(f"{self.doc_count}", self.names, self.media)
+        self.curr_obj = self.curr_doc
+
+        if self._on_begin_document:
+            self._on_begin_document(self.curr_doc)
+
+        return self.curr_doc
+
+    def begin_page(self) -> None:
+        """Handle BPG (Begin Page) - start of page."""
+        self.page_count += 1
+        # The document attaches the following TLEs and NOPs to its last page
+        self.curr_doc.add_page(self.page_count, self.cur_media)
+
+    def tag_logical_element(self, record) -> None:
+        """Handle TLE (Tag Logical Element) - metadata."""
+        # Name of the first FQN and value of the first AttrVal triplet, without decoding sf_data
+        tle_name, tle_value = record.tle
+
+        if tle_name:
+            self.add_tle(tle_name, tle_value)
+
+    def no_operation(self, record) -> None:
+        """Handle NOP (No Operation) - comment/annotation."""
+        nop_value = record.sf_data.get('UndfData')
+        if nop_value:
+            self.add_nop(nop_value)
+
+    def add_tle(self, name: str, value: str) -> None:
+        """Attach a TLE to the current object."""
+        self.curr_obj.add_tle(name, value)
+
+    def add_nop(self, value: str) -> None:
+        """Attach a NOP to the current object."""
+        self.curr_obj.add_nop(value)
+
+    def invoke_medium_map(self, record) -> None:
+        """Handle IMM (Invoke Medium Map) - paper tray info."""
+        self.cur_media = record.sf_data.get('MMPName', 'NA')
+
+    def finalize(self) -> AfpData:
+        """Set the document and page counts on the AFP object and return it."""
+        self.afp.set_nb_of_docs(self.doc_count)
+        self.afp.set_nb_of_pages(self.page_count)
+        return self.afp
@@ -0,0 +1,184 @@
+"""
+Compact in-memory AFP documents.
+
+A CompactDocument keeps its pages, TLEs and NOPs in flat columns instead of one object
+per page and per TLE: page numbers, medium maps and TLE names are integers in arrays,
+the names and medium maps being indexes into NameTables shared by all the documents of
+a builder, the TLE values and NOPs are UTF-8 text in TextColumns, and the TLEs and NOPs
+of each page are delimited by offsets into the TLE and NOP columns.
+
+The DocumentData (to_data()) or pydantic Document (to_model()) of a document is built
+on demand, when it is serialized or returned to the caller.
+"""
+
+from __future__ import annotations
+
+import sys
+from array import array
+from typing import TYPE_CHECKING, Optional
+
+from domain.afp_data import DocumentData, PageData, TleData
+
+if TYPE_CHECKING:
+    from domain.afp import Document
+
+
+class NameTable:
+    """Interned strings numbered in order of first use."""
+
+    __slots__ = ('names', '_indexes')
+
+    def __init__(self) -> None:
+        self.names: list[str] = []
+        self._indexes: dict[str, int] = {}
+
+    def index(self, name: str) -> int:
+        """Return the index of a name, adding it to the table on first use."""
+        index = self._indexes.get(name)
+        if index is None:
+            index = self._indexes[name] = len(self.names)
+            self.names.append(sys.intern(name))
+        return index
+
+    def __getitem__(self, index: int) -> str:
+        return self.names[index]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class TextColumn:
+    """Strings stored end to end as UTF-8, with the end offset of each one."""
+
+    __slots__ = ('_text', '_ends')
+
+    def __init__(self) -> None:
+        self._text = bytearray()
+        self._ends = array('I')
+
+    def append(self, value: str) -> None:
+        self._text += value.encode('utf-8')
+        self._ends.append(len(self._text))
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self._ends)
+        start = self._ends[index - 1] if index > 0 else 0
+        return self._text[start:self._ends[index]].decode('utf-8')
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    def slice(self, start: int, end: int) -> list[str]:
+        """Return the strings from start to end - 1."""
+        text = self._text
+        ends = self._ends
+        offset = ends[start - 1] if start > 0 else 0
+        values = []
+        for index in range(start, end):
+            values.append(text[offset:ends[index]].decode('utf-8'))
+            offset = ends[index]
+        return values
+
+
+class CompactDocument:
+    """
+    Group of pages (BNG) stored in columns, see DocumentData.
+
+    The TLEs and NOPs added before the first page belong to the document, the
+    following ones to the last page added, as AfpBuilder attaches them.
+    """
+
+    __slots__ = ('doc_number', 'names', 'media', 'page_numbers', 'page_media', 'page_tle_start',
+                 'page_nop_start', 'tle_names', 'tle_values', 'nops')
+
+    def __init__(self, doc_number: Optional[str] = None, names: Optional[NameTable] = None,
+                 media: Optional[NameTable] = None) -> None:
+        """
+        Args:
+            doc_number: Document number.
+            names: Table of the TLE names, shared with the other documents of the builder.
+            media: Table of the medium map names ('bac_papier'), shared as well.
+        """
+        self.doc_number = doc_number
+        self.names = names if names is not None else NameTable()
+        self.media = media if media is not None else NameTable()
+
+        # One entry per page
+        self.page_numbers = array('I')
+        self.page_media = array('I')
+        self.page_tle_start = array('I')
+        self.page_nop_start = array('I')
+
+        # Document TLEs and NOPs first, then those of each page
+        self.tle_names = array('I')
+        self.tle_values = TextColumn()
+        self.nops = TextColumn()
+
+    def add_page(self, page_number: int, media: str) -> None:
+        """Add a page, which receives the TLEs and NOPs added next."""
+        self.page_numbers.append(page_number)
+        self.page_media.append(self.media.index(media))
+        self.page_tle_start.append(len(self.tle_values))
+        self.page_nop_start.append(len(self.nops))
+
+    def add_tle(self, name: str, value: str) -> None:
+        self.tle_names.append(self.names.index(name))
+        self.tle_values.append(value)
+
+    def add_nop(self, nop: str) -> None:
+        self.nops.append(nop)
+
+    @property
+    def page_count(self) -> int:
+        return len(self.page_numbers)
+
+    @property
+    def pages(self) -> list[PageData]:
+        return [self.page(index) for index in range(self.page_count)]
+
+    @property
+    def tle(self) -> list[TleData]:
+        return self._tles(0, self.page_tle_start[0] if self.page_numbers else len(self.tle_values))
+
+    @property
+    def nop(self) -> list[str]:
+        return self.nops.slice(0, self.page_nop_start[0] if self.page_numbers else len(self.nops))
+
+    def page(self, index: int) -> PageData:
+        """
+        Build a page of the document.
+
+        Args:
+            index: Position of the page in the document, from 0 (negative from the end).
+
+        Raises:
+            IndexError: If the page does not exist.
+        """
+        count = self.page_count
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError(f"Page index {index} out of range ({count} pages)")
+
+        last = index + 1 == count
+        tle_end = len(self.tle_values) if last else self.page_tle_start[index + 1]
+        nop_end = len(self.nops) if last else self.page_nop_start[index + 1]
+        return PageData(
+            page_number=f"{self.page_numbers[index]}",
+            bac_papier=self.media[self.page_media[index]],
+            tle=self._tles(self.page_tle_start[index], tle_end),
+            nop=self.nops.slice(self.page_nop_start[index], nop_end),
+        )
+
+    def to_data(self) -> DocumentData:
+        """Build the DocumentData of the document (serialized natively by orjson)."""
+        return DocumentData(doc_number=self.doc_number, pages=self.pages, tle=self.tle, nop=self.nop)
+
+    def to_model(self) -> Document:
+        return self.to_data().to_model()
+
+    def _tles(self, start: int, end: int) -> list[TleData]:
+        names = self.names.names
+        return [TleData(names[name], value)
+                for name, value in zip(self.tle_names[start:end], self.tle_values.slice(start, end))]
@@ -0,0 +1,105 @@
+"""
+Lightweight AFP structure used on the writer hot path.
+
+Slotted dataclasses mirroring the pydantic models of domain.afp, without validation.
+orjson serializes them natively, with the same keys in the same order as the
+model_dump() of the corresponding models. The pydantic models remain the public
+schema: to_model() converts (and validates) an object when needed. pydantic is only
+imported by to_model(), the writers never load it.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from domain.afp import Afp, Document, Page, Tle
+
+
+@dataclass(slots=True)
+class TleData:
+    """Tag Logical Element (TLE), see domain.afp.Tle."""
+
+    name: str
+    value: str = ""
+
+    def to_model(self) -> Tle:
+        from domain.afp import Tle
+        return Tle(name=self.name, value=self.value)
+
+
+@dataclass(slots=True)
+class PageData:
+    """AFP page (BPG), see domain.afp.Page."""
+
+    page_number: Optional[str] = None
+    bac_papier: str = "NA"
+    tle: list[TleData] = field(default_factory=list)
+    nop: list[str] = field(default_factory=list)
+
+    def add_tle(self, tle: TleData) -> None:
+        self.tle.append(tle)
+
+    def add_nop(self, nop: str) -> None:
+        self.nop.append(nop)
+
+    def to_model(self) -> Page:
+        from domain.afp import Page
+        return Page(
+            page_number=self.page_number,
+            bac_papier=self.bac_papier,
+            tle=[tle.to_model() for tle in self.tle],
+            nop=list(self.nop),
+        )
+
+
+@dataclass(slots=True)
+class DocumentData:
+    """Group of pages (BNG), see domain.afp.Document."""
+
+    doc_number: Optional[str] = None
+    pages: list[PageData] = field(default_factory=list)
+    tle: list[TleData] = field(default_factory=list)
+    nop: list[str] = field(default_factory=list)
+
+    def add_page(self, page: PageData) -> None:
+        self.pages.append(page)
+
+    def add_tle(self, tle: TleData) -> None:
+        self.tle.append(tle)
+
+    def add_nop(self, nop: str) -> None:
+        self.nop.append(nop)
+
+    def to_model(self) -> Document:
+        from domain.afp import Document
+        return Document(
+            doc_number=self.doc_number,
+            pages=[page.to_model() for page in self.pages],
+            tle=[tle.to_model() for tle in self.tle],
+            nop=list(self.nop),
+        )
+
+
+@dataclass(slots=True)
+class AfpData:
+    """AFP file, see domain.afp.Afp."""
+
+    name: Optional[str] = None
+    nop: list[str] = field(default_factory=list)
+    nb_of_docs: int = 0
+    nb_of_pages: int = 0
+
+    def add_nop(self, nop: str) -> None:
+        self.nop.append(nop)
+
+    def set_nb_of_docs(self, nb_of_docs: int) -> None:
+        self.nb_of_docs = nb_of_docs
+
+    def set_nb_of_pages(self, nb_of_pages: int) -> None:
+        self.nb_of_pages = nb_of_pages
+
+    def to_model(self) -> Afp:
+        from domain.afp import Afp
+        return Afp(name=self.name, nop=list(self.nop), nb_of_docs=self.nb_of_docs, nb_of_pages=self.nb_of_pages)
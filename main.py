@@ -10,6 +10,9 @@ from dispatcher import init_dispatcher
 from logger import get_logger
 from writer.writer_factory import create_writer
 
+# The modules of the optional features (cache, metrics, profiler, stats) are imported by main()
+# when their option is given: the startup of a plain run does not pay for them.
+
 
 def main():
     """
@@ -40,41 +43,123 @@ def main():
     t1 = time.perf_counter()
     logger.info(f"[TIMING] After CLI: {t1 - start_time:.3f}s")
 
-    # Initialize the dispatcher with the input file path and config
-    # The dispatcher determines which parser to use based on file type
-    dispatcher = init_dispatcher(cli_input.path, cli_input.config_path)
+    # Header-only summary of the file: nothing is parsed nor written but the report
+    if cli_input.stats:
+        from parser.afp.spool_stats import SpoolStats
+
+        stats = SpoolStats.build(cli_input.path)
+        if stats.truncated_at is not None:
+            logger.warning(f"Unexpected end of file at offset {stats.truncated_at}: the last structured field is not counted")
+        if cli_input.output_path:
+            stats.write_report(cli_input.output_path)
+            logger.info(f"Stats written : {cli_input.output_path}")
+        logger.info(f"Stats of {cli_input.path}\n{stats.format_table()}")
+        logger.info(f"Total time: {time.perf_counter() - start_time:.3f}s")
+        return 0
+
+    # Create output path based on format, unless given
+    output_path = cli_input.output_path or cli_input.path.replace('.afp', f'_structure.{cli_input.output_format}')
+
+    writer_options = {}
+    if cli_input.compression_level is not None:
+        writer_options['compression_level'] = cli_input.compression_level
+    if cli_input.compression_block_size is not None:
+        writer_options['compression_block_size'] = cli_input.compression_block_size * 1024 * 1024
+
+    # Metrics of the run, exported to a file at its end and/or served during it
+    metrics = None
+    metrics_server = None
+    if cli_input.metrics_file or cli_input.metrics_port is not None:
+        from metrics import MetricsServer, ParserMetrics
+
+        metrics = ParserMetrics()
+        if cli_input.metrics_port is not None:
+            metrics_server = MetricsServer(metrics.registry, cli_input.metrics_port)
+            metrics_server.start()
+
+    try:
+        # Serve the output from the result cache if the input was already parsed with the same options
+        cache = None
+        if cli_input.cache_dir:
+            from cache import ResultCache
+            from parser.afp.sf_filter import SfFilter
+
+            cache = ResultCache(cli_input.cache_dir, cli_input.cache_size * 1024 * 1024)
+            try:
+                sf_filter = SfFilter(cli_input.config_path)
+            except (ValueError, FileNotFoundError):
+                # Ignored by the processor as well
+                sf_filter = SfFilter()
+            cache_key = cache.key(cli_input.path, sf_filter, cli_input.output_format, writer_options)
+
+            if cache.get(cache_key, output_path):
+                logger.info(f"Cache hit : {output_path} ({cache.stats_info()})")
+                if metrics is not None:
+                    metrics.observe_cached(time.perf_counter() - start_time)
+                logger.info(f"Total time: {time.perf_counter() - start_time:.3f}s")
+                return 0
+            logger.info(f"Cache miss ({cache.stats_info()})")
+
+        # Initialize the dispatcher with the input file path and config
+        # The dispatcher determines which parser to use based on file type
+        dispatcher = init_dispatcher(
+            cli_input.path, cli_input.config_path, cli_input.jobs, cli_input.use_index, cli_input.decode_all,
+            cli_input.pipeline, cli_input.follow_timeout
+        )
     
-    t2 = time.perf_counter()
-    logger.info(f"[TIMING] After init_dispatcher: {t2 - t1:.3f}s")
+        t2 = time.perf_counter()
+        logger.info(f"[TIMING] After init_dispatcher: {t2 - t1:.3f}s")
     
-    logger.info(f"Dispatcher created for {cli_input.path}")
-    logger.info(f"Filetype: {cli_input.filetype}")
+        logger.info(f"Dispatcher created for {cli_input.path}")
+        logger.info(f"Filetype: {cli_input.filetype}")
 
-    # Get the appropriate parser processor for the detected file type
-    parser_processor = dispatcher.dispatch(cli_input.filetype)
+        # Get the appropriate parser processor for the detected file type
+        parser_processor = dispatcher.dispatch(cli_input.filetype)
     
-    t3 = time.perf_counter()
-    logger.info(f"[TIMING] After dispatch: {t3 - t2:.3f}s")
-
-    # Create output path based on format
-    output_path = cli_input.path.replace('.afp', f'_structure.{cli_input.output_format}')
+        t3 = time.perf_counter()
+        logger.info(f"[TIMING] After dispatch: {t3 - t2:.3f}s")
 
-    # Create and inject the writer based on the output format
-    writer = create_writer(cli_input.output_format, Path(cli_input.path).name, output_path)
+        # Create and inject the writer based on the output format
+        writer = create_writer(cli_input.output_format, Path(cli_input.path).name, output_path, **writer_options)
     
-    t4 = time.perf_counter()
-    logger.info(f"[TIMING] After create_writer: {t4 - t3:.3f}s")
+        t4 = time.perf_counter()
+        logger.info(f"[TIMING] After create_writer: {t4 - t3:.3f}s")
     
-    parser_processor.set_writer(writer)
-
-    elapsed = time.perf_counter() - start_time
-    logger.info(f"Time before parse: {elapsed:.3f}s")
-
-    # Execute the parser and write output
-    parser_processor.run(output_path)
-    elapsed = time.perf_counter() - start_time
-    logger.info(f"Total time: {elapsed:.3f}s")
-    return 0
+        parser_processor.set_writer(writer)
+
+        profiler = None
+        if cli_input.profile_path:
+            from processor.profiler import RunProfiler
+
+            profiler = RunProfiler(cli_input.profile_capture)
+            parser_processor.set_profiler(profiler)
+        if metrics is not None:
+            parser_processor.set_metrics(metrics)
+
+        elapsed = time.perf_counter() - start_time
+        logger.info(f"Time before parse: {elapsed:.3f}s")
+
+        # Execute the parser and write output
+        parser_processor.run(output_path)
+
+        if profiler is not None:
+            profiler.write_report(cli_input.profile_path)
+            logger.info(f"Profile written : {cli_input.profile_path}\n{profiler.format_table()}")
+
+        if cache is not None:
+            cache.put(cache_key, output_path)
+            logger.info(f"Output cached : {cache_key[:16]}")
+
+        elapsed = time.perf_counter() - start_time
+        logger.info(f"Total time: {elapsed:.3f}s")
+        return 0
+    finally:
+        if metrics is not None:
+            if cli_input.metrics_file:
+                metrics.registry.write_textfile(cli_input.metrics_file)
+                logger.info(f"Metrics written : {cli_input.metrics_file}")
+            if metrics_server is not None:
+                metrics_server.stop()
 
 if __name__ == "__main__":
     # Execute main() and use its return value as the exit code
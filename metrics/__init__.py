@@ -0,0 +1,12 @@
+"""
+Metrics module.
+
+Provides the metrics of the parse runs, exported in the Prometheus text format to a
+file or a local HTTP endpoint.
+"""
+
+from .parser_metrics import ParserMetrics
+from .registry import MetricsRegistry
+from .server import MetricsServer
+
+__all__ = ["MetricsRegistry", "MetricsServer", "ParserMetrics"]
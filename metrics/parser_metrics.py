@@ -0,0 +1,118 @@
+"""
+Module for the metrics of the parse runs.
+
+The totals are updated once per run, from the counters the processors already keep
+(sf_scanned, sf_count, error_count) and from the writer: the per-SF loop is left untouched. The
+progress of the run in progress is read from the processor when the metrics are
+exported, so a scrape during a long run sees it advance.
+"""
+
+import time
+from typing import Optional
+
+from metrics.registry import MetricsRegistry
+
+PREFIX = "afp_parser"
+
+STATUSES = ("ok", "failed", "cached")
+
+
+class ParserMetrics:
+    """Metrics of the parse runs of a process, fed by the processors (see set_metrics())."""
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None) -> None:
+        self.registry = registry or MetricsRegistry()
+        registry = self.registry
+
+        self.runs = registry.counter(f"{PREFIX}_runs_total", "Parse runs by outcome", ("status",))
+        self.sf_scanned = registry.counter(
+            f"{PREFIX}_sf_scanned_total", "Structured fields of the AFP input scanned (decoded, filtered out or skipped)"
+        )
+        self.sf_decoded = registry.counter(
+            f"{PREFIX}_sf_decoded_total", "Structured fields decoded for the writer (depends on the output format)"
+        )
+        self.errors = registry.counter(f"{PREFIX}_errors_total", "Structured fields that could not be processed")
+        self.bytes_scanned = registry.counter(f"{PREFIX}_bytes_scanned_total", "Bytes of AFP input scanned")
+        self.documents = registry.counter(f"{PREFIX}_documents_total", "Documents written")
+        self.pages = registry.counter(f"{PREFIX}_pages_total", "Pages written")
+        self.duration = registry.histogram(f"{PREFIX}_run_duration_seconds", "Duration of the parse runs")
+        self.last_run = registry.gauge(
+            f"{PREFIX}_last_run_timestamp_seconds", "Unix time of the end of the last run", ("status",)
+        )
+
+        self.in_progress = registry.gauge(f"{PREFIX}_run_in_progress", "1 while a parse run is in progress")
+        self.current_bytes = registry.gauge(f"{PREFIX}_current_run_bytes_scanned", "Bytes scanned by the run in progress")
+        self.current_documents = registry.gauge(f"{PREFIX}_current_run_documents", "Documents written by the run in progress")
+        self.current_pages = registry.gauge(f"{PREFIX}_current_run_pages", "Pages written by the run in progress")
+        self.current_elapsed = registry.gauge(f"{PREFIX}_current_run_elapsed_seconds", "Duration of the run in progress")
+
+        for status in STATUSES:
+            self.runs.inc(0, status=status)
+        self.in_progress.set(0)
+
+        self._processor = None
+        self._run_start = 0.0
+        registry.add_collector(self._collect_progress)
+
+    def start_run(self, processor) -> None:
+        """Follow the progress of a processor until end_run()."""
+        self._processor = processor
+        self._run_start = time.perf_counter()
+        self.in_progress.set(1)
+
+    def end_run(self, processor, elapsed: float, failed: bool = False) -> None:
+        """
+        Add a completed run to the totals.
+
+        Args:
+            processor: Processor of the run (sf_scanned, sf_count, error_count, writer, bytes_scanned()).
+            elapsed: Duration of the run in seconds.
+            failed: True if the run raised.
+        """
+        documents, pages = progress(processor)
+        self.observe(
+            processor.sf_scanned, processor.sf_count, processor.error_count, processor.bytes_scanned(),
+            documents, pages, elapsed, "failed" if failed else "ok",
+        )
+        self._processor = None
+        self.in_progress.set(0)
+        self._collect_progress()
+
+    def observe(self, sf_scanned: int, sf_decoded: int, error_count: int, bytes_scanned: int, documents: int,
+                pages: int, elapsed: float, status: str = "ok") -> None:
+        """Add a run to the totals (also used for the runs of the batch workers)."""
+        self.runs.inc(status=status)
+        self.sf_scanned.inc(sf_scanned)
+        self.sf_decoded.inc(sf_decoded)
+        self.errors.inc(error_count)
+        self.bytes_scanned.inc(bytes_scanned)
+        self.documents.inc(documents)
+        self.pages.inc(pages)
+        self.duration.observe(elapsed)
+        self.last_run.set(round(time.time(), 3), status=status)
+
+    def observe_cached(self, elapsed: float) -> None:
+        """Count a run served from the result cache."""
+        self.runs.inc(status="cached")
+        self.duration.observe(elapsed)
+        self.last_run.set(round(time.time(), 3), status="cached")
+
+    def _collect_progress(self) -> None:
+        processor = self._processor
+        if processor is None:
+            for gauge in (self.current_bytes, self.current_documents, self.current_pages, self.current_elapsed):
+                gauge.set(0)
+            return
+
+        documents, pages = progress(processor)
+        self.current_bytes.set(processor.bytes_scanned())
+        self.current_documents.set(documents)
+        self.current_pages.set(pages)
+        self.current_elapsed.set(round(time.perf_counter() - self._run_start, 3))
+
+
+def progress(processor) -> tuple[int, int]:
+    """Documents and pages written by the writer of a processor, (0, 0) if it does not count them."""
+    writer = processor.writer
+    counts = writer.progress() if writer is not None else None
+    return counts or (0, 0)
@@ -0,0 +1,191 @@
+"""
+Module for a minimal metrics registry exported in the Prometheus text format (0.0.4).
+
+Counters, gauges and histograms hold their values per label set. Collectors registered
+with add_collector() are called on every export, so that values read from a running
+processor cost nothing until they are scraped.
+"""
+
+import math
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Iterable
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+"""Upper bounds in seconds of the duration histograms."""
+
+
+def format_value(value: float) -> str:
+    """Format a sample value as Prometheus expects it."""
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Metric:
+    """Base of the metric types: a name, a help text and values per label set."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"Metric '{self.name}' expects the labels ({', '.join(self.label_names)})")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        """Return the samples of the metric as (name suffix, formatted labels, value)."""
+        with self._lock:
+            items = list(self._values.items())
+        return [("", format_labels(self.label_names, key), value) for key, value in items]
+
+    def render(self) -> list[str]:
+        documentation = self.documentation.replace("\\", "\\\\").replace("\n", "\\n")
+        lines = [f"# HELP {self.name} {documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonic total (e.g. structured fields processed)."""
+
+    type = "counter"
+
+    def inc(self, value: float = 1, **labels) -> None:
+        if value < 0:
+            raise ValueError(f"Counter '{self.name}' cannot decrease: {value}")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+
+class Gauge(Metric):
+    """Value that goes up and down (e.g. bytes scanned by the current run)."""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, value: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+
+class Histogram(Metric):
+    """Distribution of observations in cumulative buckets, with their sum and count."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Label set -> [count per bucket..., count above the last bucket, sum]
+        self._observations: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            observations = self._observations.get(key)
+            if observations is None:
+                observations = self._observations[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    observations[index] += 1
+                    break
+            else:
+                observations[len(self.buckets)] += 1
+            observations[-1] += value
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        with self._lock:
+            items = [(key, list(observations)) for key, observations in self._observations.items()]
+
+        names = self.label_names + ("le",)
+        samples = []
+        for key, observations in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), observations):
+                cumulative += count
+                samples.append(("_bucket", format_labels(names, key + (format_value(float(bound)),)), cumulative))
+            labels = format_labels(self.label_names, key)
+            samples.append(("_sum", labels, observations[-1]))
+            samples.append(("_count", labels, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """Set of metrics exported together."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+
+    def counter(self, name: str, documentation: str, label_names: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Register a function updating metrics, called before every export."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Export all the metrics in the Prometheus text format."""
+        for collector in self._collectors:
+            collector()
+
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """
+        Write the metrics to a file, e.g. for the node-exporter textfile collector.
+
+        The file is replaced atomically: the collector never reads a partial export.
+        """
+        path = Path(path)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(self.render(), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' already registered")
+        self._metrics[metric.name] = metric
+        return metric
@@ -0,0 +1,80 @@
+"""
+Module for the local HTTP endpoint serving the metrics during long runs.
+"""
+
+import threading
+
+from logger import get_logger
+from metrics.registry import CONTENT_TYPE, MetricsRegistry
+
+METRICS_PATH = "/metrics"
+
+
+class MetricsServer:
+    """
+    HTTP server exporting a registry on GET /metrics, from a daemon thread.
+
+    Usage:
+        with MetricsServer(registry, 9464):
+            processor.run(output_path)
+    """
+
+    def __init__(self, registry: MetricsRegistry, port: int, host: str = "127.0.0.1") -> None:
+        """
+        Args:
+            registry: Metrics to export.
+            port: TCP port, 0 for any free port (see the port attribute once started).
+            host: Interface to listen on, local only by default.
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread: threading.Thread | None = None
+        self.logger = get_logger(__name__)
+
+    def start(self) -> None:
+        # Imported here: a registry only written to a file does not load the HTTP stack
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self.registry
+        logger = self.logger
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?", 1)[0] != METRICS_PATH:
+                    self.send_error(404)
+                    return
+
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args) -> None:
+                logger.debug(f"Metrics request from {self.client_address[0]} : {format % args}")
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Metrics served on http://{self.host}:{self.port}{METRICS_PATH}")
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+
+    def __enter__(self) -> 'MetricsServer':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
@@ -0,0 +1,134 @@
+"""
+Module for skipping Begin/End container subtrees of an AFP file in a single jump.
+
+Resource groups, image, graphics, bar code and text objects, object containers,
+overlays and page segments hold most of the bytes of a print file but rarely a
+structured field the writers use. When the Begin SF of such a container is filtered
+out, the streamer moves straight to its matching End SF if no wanted SF lies in
+between, instead of reading every child SF.
+
+With the SF index, the End SF and the wanted SFs are searched in the packed ID array
+of the index. Without it, the subtree is walked with a header-only loop: a byte search
+of the End ID over the object data would read every payload byte, where the walk only
+reads the introducers.
+"""
+
+import struct
+from typing import Optional
+
+from parser.afp.sfi_config import CARRIAGE_CONTROL, SFI_HEADER
+
+BEGIN_CLASS: bytes = b'\xD3\xA8'
+"""Class and type codes of the Begin SFs, the End SF has class code A9 and the same category."""
+
+END_CLASS: bytes = b'\xD3\xA9'
+
+CONTAINER_CATEGORIES: tuple[bytes, ...] = (
+    b'\xC6',  # BRG/ERG: resource group
+    b'\xCE',  # BRS/ERS: resource
+    b'\xFB',  # BIM/EIM: image object
+    b'\xBB',  # BGR/EGR: graphics object
+    b'\xEB',  # BBC/EBC: bar code object
+    b'\x9B',  # BPT/EPT: presentation text object
+    b'\x92',  # BOC/EOC: object container
+    b'\xDF',  # BMO/EMO: overlay
+    b'\x5F',  # BPS/EPS: page segment
+)
+
+CONTAINERS: dict[bytes, bytes] = {
+    BEGIN_CLASS + category: END_CLASS + category for category in CONTAINER_CATEGORIES
+}
+"""Begin SF ID -> End SF ID of the containers that can be skipped."""
+
+
+def skip_container(buf, offset: int, sf_len: int, sf_id: bytes, limit: int, wanted_ids) -> tuple[int, int]:
+    """
+    Walk the subtree of a container with a header-only loop.
+
+    Only the SF introducers are read, in a tight loop tracking the nesting depth of
+    the container type; the object data is never touched.
+
+    Args:
+        buf: Buffer (memoryview or mmap) over the whole file.
+        offset: Offset of the Begin SF.
+        sf_len: SFLength of the Begin SF.
+        sf_id: ID of the Begin SF (a key of CONTAINERS).
+        limit: Offset where the walk stops (end of the streaming range).
+        wanted_ids: IDs of the SFs that must not be skipped (set or dict).
+
+    Returns:
+        tuple: (offset, skipped) where offset is where regular reading resumes: the
+        matching End SF, the first wanted SF inside the container, the first malformed
+        SF or limit; skipped is the number of child SFs walked over.
+    """
+    end_id = CONTAINERS[sf_id]
+    control_byte = CARRIAGE_CONTROL[0]
+    unpack_from = SFI_HEADER.unpack_from
+    depth = 1
+    skipped = 0
+    offset += sf_len + 1
+
+    try:
+        while offset < limit:
+            control, child_len, child_id, _ = unpack_from(buf, offset)
+            if control != control_byte:
+                break
+
+            if child_id == end_id:
+                depth -= 1
+                if depth == 0:
+                    break
+            elif child_id == sf_id:
+                depth += 1
+
+            if child_id in wanted_ids:
+                break
+            offset += child_len + 1
+            skipped += 1
+    except struct.error:
+        # Truncated SF: reported by the regular path
+        pass
+
+    return min(offset, limit), skipped
+
+
+def find_container_end_indexed(sf_index, offset: int, sf_id: bytes, limit: int,
+                               wanted_ids: list[bytes]) -> Optional[int]:
+    """
+    Locate the End SF of a container with the SF index.
+
+    Only the packed ID array of the index is searched, the AFP file is not read.
+
+    Args:
+        sf_index: Index of the file.
+        offset: Offset of the Begin SF.
+        sf_id: ID of the Begin SF (a key of CONTAINERS).
+        limit: Offset where the search stops (end of the streaming range).
+        wanted_ids: IDs of the SFs that must not be skipped.
+
+    Returns:
+        int: Offset of the matching End SF, None if it is not found before limit or
+        if a wanted SF lies inside the container.
+    """
+    first, last = sf_index.row_range(offset + 1, limit)
+    end_id = CONTAINERS[sf_id]
+    depth = 1
+    end_row = None
+
+    for row in sf_index.find_rows((sf_id, end_id), first, last):
+        if sf_index.sf_id(row) == sf_id:
+            depth += 1
+            continue
+
+        depth -= 1
+        if depth == 0:
+            end_row = row
+            break
+
+    if end_row is None:
+        return None
+
+    for _ in sf_index.find_rows(wanted_ids, first, end_row):
+        return None
+
+    return sf_index.offsets[end_row]
@@ -0,0 +1,211 @@
+"""
+Module for compiling structured field and triplet configurations into decoders.
+
+The component lists of sf_config.SF_CONFIGS and triplet_config.TRIPLET_CONFIG are
+resolved once (offsets computed, handlers bound) into one decoder function per ID,
+so decoding a record is a single call on its data buffer.
+"""
+
+import functools
+from typing import Any, Callable, NamedTuple, Optional
+
+Decoder = Callable[[Any], Any]
+"""Function decoding a data buffer (bytes or memoryview) into its parsed value."""
+
+
+class SfDecoder(NamedTuple):
+    short_name: str
+    decode: Decoder
+
+
+class CompiledField(NamedTuple):
+    name: str
+    start: int
+    end: Optional[int]
+    decode: Decoder
+
+
+class TripletExtractor(NamedTuple):
+    """Single component pulled out of a triplet (see compile_extractor_table())."""
+
+    slot: int
+    start: int
+    decode: Decoder
+
+
+TRIPLET_HEADER_LEN = 2
+"""t_len and t_id bytes preceding the components of a triplet."""
+
+
+def compile_fields(components, handlers: dict, ccsid: Optional[int] = None) -> list[CompiledField]:
+    """
+    Resolve the offsets of a component list and bind the component handlers.
+
+    Offsets are accumulated from the component lengths, as the sequential reader does.
+    A length of 0 means the component spans the remaining data, so it ends the list.
+    Components without handler or whose handler discards its value only advance
+    the position.
+
+    Args:
+        components: FieldDataComponent or TripletComponent list.
+        handlers: Registry mapping component types to handlers exposing decode().
+        ccsid: If set, bound to the decode() of the handlers of character data (uses_ccsid).
+
+    Returns:
+        list[CompiledField]: Fields to decode, in order.
+    """
+    fields = []
+    position = 0
+
+    for component in components:
+        handler = handlers.get(component.type)
+
+        if component.length == 0:
+            start, end = position, None
+        else:
+            start, end = position, position + component.length
+
+        if handler and not handler.discards_value:
+            decode = handler.decode
+            if ccsid is not None and handler.uses_ccsid:
+                decode = functools.partial(decode, ccsid=ccsid)
+            fields.append(CompiledField(component.name, start, end, decode))
+
+        if end is None:
+            # Variable length: it consumes the remaining data, nothing can follow
+            break
+
+        position = end
+
+    return fields
+
+
+def compile_decoder(components, handlers: dict, wrap_name: Optional[str] = None,
+                    ccsid: Optional[int] = None) -> Decoder:
+    """
+    Build the decoder function of a component list.
+
+    Args:
+        components: FieldDataComponent or TripletComponent list.
+        handlers: Registry mapping component types to handlers exposing decode().
+        wrap_name: If set, the parsed dict is returned wrapped as {wrap_name: parsed}.
+        ccsid: Code page of the character data (see compile_fields()).
+
+    Returns:
+        Decoder: Function returning the dict of parsed components (None values omitted).
+    """
+    fields = compile_fields(components, handlers, ccsid)
+
+    if not fields:
+        def decoder(data):
+            return {}
+
+    elif len(fields) == 1:
+        # Most structures hold a single component: no loop, no slice if it spans all the data
+        name, start, end, decode = fields[0]
+
+        if start == 0 and end is None:
+            def decoder(data):
+                value = decode(data)
+                return {name: value} if value is not None else {}
+        else:
+            def decoder(data):
+                value = decode(data[start:end])
+                return {name: value} if value is not None else {}
+
+    else:
+        def decoder(data):
+            parsed = {}
+            for name, start, end, decode in fields:
+                value = decode(data[start:end])
+                if value is not None:
+                    parsed[name] = value
+            return parsed
+
+    if wrap_name is None:
+        return decoder
+
+    unwrapped = decoder
+    return lambda data: {wrap_name: unwrapped(data)}
+
+
+def compile_sf_table(configs: dict, handlers: dict) -> dict[bytes, SfDecoder]:
+    """
+    Compile every SF configuration into its decoder.
+
+    Args:
+        configs: SF_CONFIGS mapping 3-byte SF IDs to SfConfig.
+        handlers: SF_HANDLERS registry.
+
+    Returns:
+        dict: 3-byte SF ID -> SfDecoder(short_name, decode).
+    """
+    return {
+        sf_id: SfDecoder(config.short_name, compile_decoder(config.struct, handlers))
+        for sf_id, config in configs.items()
+    }
+
+
+def compile_triplet_table(configs: dict, handlers: dict, ccsid: Optional[int] = None) -> list[Optional[Decoder]]:
+    """
+    Compile every triplet configuration into a 256-entry table indexed by triplet ID.
+
+    Each decoder takes the triplet content (after t_len and t_id) and returns
+    {short_name: components}. Unknown IDs are None.
+
+    Args:
+        configs: TRIPLET_CONFIG mapping 1-byte triplet IDs to Triplet.
+        handlers: TRIPLET_HANDLERS registry.
+        ccsid: Code page of the character data, the handlers' default if None.
+
+    Returns:
+        list: Decoder or None for each triplet ID from 0x00 to 0xFF.
+    """
+    table: list[Optional[Decoder]] = [None] * 256
+
+    for t_id, config in configs.items():
+        table[t_id[0]] = compile_decoder(config.struct, handlers, wrap_name=config.short_name, ccsid=ccsid)
+
+    return table
+
+
+def compile_extractor_table(configs: dict, handlers: dict, fields: dict[str, str]) -> list[Optional[TripletExtractor]]:
+    """
+    Compile a 256-entry table pulling a single component out of some triplet types.
+
+    Used by the fast paths that only need a few values of a structured field: its
+    triplets are walked without decoding any other component or building any dict.
+
+    Args:
+        configs: TRIPLET_CONFIG mapping 1-byte triplet IDs to Triplet.
+        handlers: TRIPLET_HANDLERS registry.
+        fields: Triplet short name -> name of the component to extract, which must span
+            the rest of the triplet. The slot of an extractor is the position of its
+            triplet in this dict.
+
+    Returns:
+        list: TripletExtractor or None for each triplet ID from 0x00 to 0xFF, with the
+        offset of the component from the start of the triplet (t_len included).
+
+    Raises:
+        ValueError: If a component is missing from its triplet configuration, or does
+            not span the rest of the triplet.
+    """
+    table: list[Optional[TripletExtractor]] = [None] * 256
+    slots = {short_name: slot for slot, short_name in enumerate(fields)}
+
+    for t_id, config in configs.items():
+        slot = slots.get(config.short_name)
+        if slot is None:
+            continue
+
+        component = fields[config.short_name]
+        field = next((field for field in compile_fields(config.struct, handlers) if field.name == component), None)
+        if field is None:
+            raise ValueError(f"No decoded component '{component}' in triplet {config.short_name}")
+        if field.end is not None:
+            raise ValueError(f"Component '{component}' of triplet {config.short_name} has a fixed length")
+
+        table[t_id[0]] = TripletExtractor(slot, field.start + TRIPLET_HEADER_LEN, field.decode)
+
+    return table
@@ -0,0 +1,128 @@
+"""
+Module for locating the documents and pages of an AFP file.
+
+The DocumentTable is built in one header-only pass (or from the sidecar SF index) and
+gives, for every document (BNG) and page (BPG), its byte range, the number of pages
+preceding it and the IMM in force at its start, as packed arrays.
+"""
+
+from array import array
+
+BNG_ID: bytes = b'\xD3\xA8\xAD'
+"""Begin Named Page Group: start of a document."""
+
+BPG_ID: bytes = b'\xD3\xA8\xAF'
+"""Begin Page: start of a page."""
+
+IMM_ID: bytes = b'\xD3\xAB\xCC'
+"""Invoke Medium Map: medium map (paper tray) of the following pages."""
+
+NO_MEDIA: int = -1
+"""Media offset of documents/pages preceded by no IMM."""
+
+
+class DocumentTable:
+    """
+    Offset table of the documents and pages of an AFP file.
+
+    Documents and pages are numbered from 1, as in the writer output. A document spans
+    from its BNG to the next BNG (or the end of the file); a page spans from its BPG to
+    the next BPG or BNG.
+
+    Attributes:
+        doc_offsets: Offset of each BNG.
+        doc_first_page: Number of pages preceding each document.
+        doc_media: Offset of the IMM in force at each BNG (NO_MEDIA if none).
+        page_offsets: Offset of each BPG.
+        page_doc: Number of the document holding each page (0 if before the first BNG).
+        page_media: Offset of the IMM in force at each BPG (NO_MEDIA if none).
+        end: Offset where the last document ends.
+    """
+
+    def __init__(self, end: int) -> None:
+        self.doc_offsets = array('Q')
+        self.doc_first_page = array('Q')
+        self.doc_media = array('q')
+        self.page_offsets = array('Q')
+        self.page_doc = array('Q')
+        self.page_media = array('q')
+        self.end = end
+
+    @classmethod
+    def build(cls, sf_streamer) -> 'DocumentTable':
+        """
+        Build the table of the whole file of a streamer.
+
+        Uses the streamer's SF index when set (only BNG/BPG/IMM rows are visited),
+        otherwise walks the structured field introducers.
+        """
+        table = cls(sf_streamer.afp_len)
+        media = NO_MEDIA
+
+        for offset, sf_id in cls._scan(sf_streamer):
+            if sf_id == BNG_ID:
+                table.doc_offsets.append(offset)
+                table.doc_first_page.append(len(table.page_offsets))
+                table.doc_media.append(media)
+            elif sf_id == BPG_ID:
+                table.page_offsets.append(offset)
+                table.page_doc.append(len(table.doc_offsets))
+                table.page_media.append(media)
+            elif sf_id == IMM_ID:
+                media = offset
+
+        return table
+
+    @staticmethod
+    def _scan(sf_streamer):
+        sf_index = sf_streamer.sf_index
+
+        if sf_index is not None:
+            offsets = sf_index.offsets
+            for row in sf_index.find_rows([BNG_ID, BPG_ID, IMM_ID]):
+                yield offsets[row], sf_index.sf_id(row)
+        else:
+            for offset, sf_id, _, _ in sf_streamer.iter_sf_headers(0, sf_streamer.afp_len):
+                yield offset, sf_id
+
+    @property
+    def nb_of_docs(self) -> int:
+        return len(self.doc_offsets)
+
+    @property
+    def nb_of_pages(self) -> int:
+        return len(self.page_offsets)
+
+    def document_range(self, doc_number: int) -> tuple[int, int]:
+        """
+        Return the byte range of a document.
+
+        Raises:
+            IndexError: If the document does not exist.
+        """
+        if not 1 <= doc_number <= self.nb_of_docs:
+            raise IndexError(f"Document {doc_number} out of range (1-{self.nb_of_docs})")
+
+        start = self.doc_offsets[doc_number - 1]
+        end = self.doc_offsets[doc_number] if doc_number < self.nb_of_docs else self.end
+        return start, end
+
+    def page_range(self, page_number: int) -> tuple[int, int]:
+        """
+        Return the byte range of a page.
+
+        Raises:
+            IndexError: If the page does not exist.
+        """
+        if not 1 <= page_number <= self.nb_of_pages:
+            raise IndexError(f"Page {page_number} out of range (1-{self.nb_of_pages})")
+
+        start = self.page_offsets[page_number - 1]
+        end = self.page_offsets[page_number] if page_number < self.nb_of_pages else self.end
+
+        # The page also ends where the next document begins
+        doc_number = self.page_doc[page_number - 1]
+        if doc_number < self.nb_of_docs:
+            end = min(end, self.doc_offsets[doc_number])
+
+        return start, end
@@ -0,0 +1,178 @@
+"""
+Module for decoding EBCDIC character data found in AFP structured fields and triplets.
+
+Names (TLE attribute names, medium map names...) repeat millions of times in a spool:
+they are decoded through DECODE_CACHE, keyed by CCSID and raw bytes, which returns the
+same interned string on every hit instead of decoding it again.
+"""
+
+import codecs
+import functools
+import sys
+from encodings import cp500
+from typing import Callable
+
+_charmap_decode = codecs.charmap_decode
+_CP500_TABLE: str = cp500.decoding_table
+
+DEFAULT_CCSID = 500
+"""Code page of the character data without a CCSID triplet (0x01): international EBCDIC."""
+
+CCSID_CODECS: dict[int, str] = {
+    37: 'cp037',
+    273: 'cp273',
+    367: 'ascii',
+    424: 'cp424',
+    500: 'cp500',
+    819: 'latin-1',
+    850: 'cp850',
+    875: 'cp875',
+    1026: 'cp1026',
+    1140: 'cp1140',
+    1200: 'utf-16-be',
+    1208: 'utf-8',
+}
+"""Python codec of each supported CCSID (or CPGID), the others are decoded as DEFAULT_CCSID."""
+
+DECODE_CACHE_ENTRIES = 32768
+"""Strings kept by each generation of the decode cache."""
+
+
+def decode_ebcdic(data, ccsid: int = DEFAULT_CCSID) -> str:
+    """
+    Decode EBCDIC (by default code page 500) bytes and strip trailing blanks.
+
+    Uses the code page table directly, which avoids the codec registry lookup
+    done by bytes.decode('cp500') on every call.
+
+    Args:
+        data: Bytes or memoryview slice of the file.
+        ccsid: Code page of the data (see CCSID_CODECS).
+
+    Returns:
+        str: Decoded text without trailing whitespace.
+    """
+    if ccsid == DEFAULT_CCSID:
+        return _charmap_decode(data, 'replace', _CP500_TABLE)[0].rstrip()
+    return text_decoder(ccsid)(data)
+
+
+@functools.cache
+def text_decoder(ccsid: int) -> Callable[..., str]:
+    """
+    Return the decoder of a CCSID, unsupported ones being decoded as DEFAULT_CCSID.
+
+    Returns:
+        Callable: Function decoding bytes or a memoryview and stripping trailing blanks.
+    """
+    codec = CCSID_CODECS.get(ccsid, CCSID_CODECS[DEFAULT_CCSID])
+    if codec == CCSID_CODECS[DEFAULT_CCSID]:
+        return decode_ebcdic
+
+    decode = codecs.getdecoder(codec)
+    return lambda data: decode(data, 'replace')[0].rstrip()
+
+
+class EbcdicDecodeCache:
+    """
+    Bounded cache of decoded character data, keyed by CCSID and raw bytes.
+
+    The decoded strings are interned, so a repeated name is a single object in all
+    the documents built. A hit is a single dict lookup on the memoryview of the file,
+    without copy, so no bookkeeping is done on hits: the least recently used strings
+    are evicted by generation. When the current generation is full it becomes the
+    previous one, whose strings are moved back on their next use and dropped with it
+    otherwise.
+
+    Lookups are only counted while tracked (see track()); misses always are. Not
+    thread-safe: a run decodes on a single thread.
+    """
+
+    def __init__(self, max_entries: int = DECODE_CACHE_ENTRIES) -> None:
+        """
+        Args:
+            max_entries: Strings kept by each generation (at most twice as many in total).
+        """
+        if max_entries < 1:
+            raise ValueError(f"Invalid decode cache size {max_entries}")
+
+        self.max_entries = max_entries
+        self.lookups = 0
+        self.misses = 0
+        # Keys: raw bytes for DEFAULT_CCSID, (ccsid, raw bytes) for the other code pages
+        self._entries: dict = {}
+        self._previous: dict = {}
+
+    def decode(self, data, ccsid: int = DEFAULT_CCSID) -> str:
+        """
+        Decode character data and strip trailing blanks.
+
+        Args:
+            data: Bytes or memoryview slice of the file.
+            ccsid: Code page of the data (see CCSID_CODECS).
+
+        Returns:
+            str: Decoded text without trailing whitespace (interned).
+        """
+        if ccsid == DEFAULT_CCSID:
+            try:
+                # A read-only memoryview hashes and compares as its bytes
+                text = self._entries.get(data)
+            except (TypeError, ValueError):
+                # Writable buffers (bytearray, memoryview over one) are not hashable
+                text = None
+            if text is not None:
+                return text
+
+        return self._resolve(data, ccsid)
+
+    def _resolve(self, data, ccsid: int) -> str:
+        """Slow path of decode(): previous generation, then decoding."""
+        key = bytes(data) if ccsid == DEFAULT_CCSID else (ccsid, bytes(data))
+        entries = self._entries
+        text = entries.get(key)
+        if text is not None:
+            return text
+
+        text = self._previous.get(key)
+        if text is None:
+            self.misses += 1
+            text = sys.intern(text_decoder(ccsid)(data))
+
+        if len(entries) >= self.max_entries:
+            self._previous = entries
+            entries = self._entries = {}
+        entries[key] = text
+        return text
+
+    def track(self, enabled: bool = True) -> None:
+        """Count the lookups for the hit rate, at the cost of a counter increment per decode."""
+        if enabled:
+            self.decode = self._tracked_decode
+        else:
+            self.__dict__.pop('decode', None)
+
+    def _tracked_decode(self, data, ccsid: int = DEFAULT_CCSID) -> str:
+        self.lookups += 1
+        return EbcdicDecodeCache.decode(self, data, ccsid)
+
+    def stats(self) -> dict:
+        """Return the lookups (tracked ones), misses, hit rate and size of the cache."""
+        hits = max(self.lookups - self.misses, 0)
+        return {
+            "lookups": self.lookups,
+            "misses": self.misses,
+            "hit_rate": round(hits / self.lookups, 4) if self.lookups else None,
+            "entries": len(self._entries) + len(self._previous),
+        }
+
+    def clear(self) -> None:
+        """Drop the cached strings and reset the counters."""
+        self._entries = {}
+        self._previous = {}
+        self.lookups = 0
+        self.misses = 0
+
+
+DECODE_CACHE = EbcdicDecodeCache()
+"""Cache of the names decoded by the process (see the triplet and SF handlers)."""
@@ -5,6 +5,7 @@ from typing import NamedTuple
 SF_DATA_CMPNT_TYPE_HEXA = 1       # Raw bytes (hex)
 SF_DATA_CMPNT_TYPE_CHAR = 2       # Character data
 SF_DATA_CMPNT_TYPE_TRIPLETS = 3    # Triplet
+SF_DATA_CMPNT_TYPE_NAME = 4       # Character data naming a resource (decoded through the name cache)
 
 class FieldDataComponent(NamedTuple):
     offset: int
@@ -22,7 +23,7 @@ TLE_DATA_STRUCTURE: list[FieldDataComponent] = [
 ]
 
 IMM_DATA_STRUCTURE: list[FieldDataComponent] = [
-    FieldDataComponent(0, 7, "MMPName", SF_DATA_CMPNT_TYPE_CHAR, True),  # Name of the medium map to be invoked
+    FieldDataComponent(0, 7, "MMPName", SF_DATA_CMPNT_TYPE_NAME, True),  # Name of the medium map to be invoked
     FieldDataComponent(8, 0,  "NA", SF_DATA_CMPNT_TYPE_HEXA, False)
 ]
 
@@ -3,7 +3,7 @@ Module for filtering structured fields based on JSON configuration.
 """
 
 import json
-from typing import Optional
+from typing import Iterable, Optional
 
 
 class SfFilter:
@@ -64,6 +64,28 @@ class SfFilter:
         
         return sf_name in self.sf_names_to_parse
 
+    def restrict(self, sf_names: Optional[Iterable[str]]) -> 'SfFilter':
+        """
+        Return a filter parsing only the SFs allowed by this filter and listed in sf_names.
+
+        Args:
+            sf_names: Short names of the structured fields to keep. If None, the filter is unchanged.
+
+        Returns:
+            SfFilter: New filter, this filter is not modified.
+        """
+        restricted = SfFilter()
+        restricted.sf_names_to_parse = self.sf_names_to_parse
+
+        if sf_names is not None:
+            sf_names = set(sf_names)
+            if self.sf_names_to_parse is None:
+                restricted.sf_names_to_parse = sf_names
+            else:
+                restricted.sf_names_to_parse = self.sf_names_to_parse & sf_names
+
+        return restricted
+
     def get_filter_info(self) -> str:
         """Get information about the current filter."""
         if self.sf_names_to_parse is None:
@@ -1,7 +1,11 @@
 """Handlers for parsing SFI components."""
 
+import functools
 from abc import ABC, abstractmethod
 from typing import Any, Optional
+from parser.afp.decoder_compiler import Decoder, compile_extractor_table, compile_sf_table, compile_triplet_table
+from parser.afp.ebcdic import CCSID_CODECS, DECODE_CACHE, DEFAULT_CCSID, decode_ebcdic
+from parser.afp.sf_config import SF_CONFIGS
 from parser.afp.triplet_config import TRIPLET_CONFIG
 from parser.afp.triplet_handlers import TRIPLET_HANDLERS
 
@@ -9,6 +13,9 @@ from parser.afp.triplet_handlers import TRIPLET_HANDLERS
 class SfComponentHandler(ABC):
     """Base class for SF component handlers."""
 
+    discards_value: bool = False
+    """True if decode() always returns None (the component is skipped by compiled decoders)."""
+
     @abstractmethod
     def parse(self, f, component_length) -> Optional[Any]:
         """
@@ -26,10 +33,27 @@ class SfComponentHandler(ABC):
         """
         pass
 
+    @abstractmethod
+    def decode(self, data) -> Optional[Any]:
+        """
+        Decode an SF component from its data buffer.
+
+        Args:
+            data: Component bytes (bytes or memoryview slice of the file)
+
+        Returns:
+            Parsed value or None to skip
+        """
+        pass
+
     @staticmethod
     def parse_char(f, component_length) -> Optional[str]:
         return f.read(component_length).decode('cp500', errors='replace').rstrip()
 
+    @staticmethod
+    def decode_char(data) -> Optional[str]:
+        return decode_ebcdic(data)
+
 
 class HexaHandler(SfComponentHandler):
     """Handler for TYPE_RAW (raw bytes as hex)."""
@@ -41,6 +65,11 @@ class HexaHandler(SfComponentHandler):
         else:
             return None
 
+    def decode(self, data) -> Optional[str]:
+        if len(data) > 1:
+            return data.hex().upper()
+        return None
+
 
 class CharHandler(SfComponentHandler):
     """Handler for TYPE_CHAR (single ASCII character)."""
@@ -48,6 +77,19 @@ class CharHandler(SfComponentHandler):
     def parse(self, f, component_length) -> Optional[tuple[str, Any]]:
         return self.parse_char(f, component_length)
 
+    def decode(self, data) -> Optional[str]:
+        return self.decode_char(data)
+
+
+class NameHandler(SfComponentHandler):
+    """Handler for TYPE_NAME (resource name, repeated across the file: decoded through the cache)."""
+
+    def parse(self, f, component_length) -> Optional[tuple[str, Any]]:
+        return self.parse_char(f, component_length)
+
+    def decode(self, data) -> Optional[str]:
+        return DECODE_CACHE.decode(data)
+
 
 class TripletHandler(SfComponentHandler):
     """Handler for TYPE_TRIPLET (repeating triplet structures)."""
@@ -109,10 +151,141 @@ class TripletHandler(SfComponentHandler):
 
         return triplets
 
+    def decode(self, data) -> Optional[list[Any]]:
+        # Character data is decoded in the code page of the CCSID triplet, which may
+        # follow the triplets it applies to: looked up first, as decode_tle() does
+        decoders = triplet_decoders(find_ccsid(data))
+        offset = 0
+        data_len = len(data)
+        triplets = []
+
+        while offset < data_len:
+            t_len = data[offset]
+            if t_len < 2:
+                raise ValueError(f"Invalid triplet length {t_len} at data offset {offset}")
+
+            decoder = decoders[data[offset + 1]]
+
+            if decoder is None:
+                # Unknown triplet: keep raw content (including t_len and t_id)
+                triplets.append({
+                    "NA": data[offset:offset + t_len].hex().upper()
+                })
+            else:
+                triplets.append(decoder(data[offset + 2:offset + t_len]))
+
+            offset += t_len
+
+        return triplets
+
+
+def decode_tle(data) -> tuple[str, str]:
+    """
+    Fast path of the TLE (Tag Logical Element) structured field.
+
+    Walks the triplets of the SF data and only decodes the name of the first FQN
+    (0x02) and the value of the first AttrVal (0x36) triplets, through TLE_EXTRACTORS:
+    no other component is decoded and no dict is built. The result is the one found
+    in the decoded sf_data (first FQN 'fqn_name', first AttrVal 'att_val'), except
+    that both are decoded in the code page of the CCSID triplet (0x01) if there is one.
+
+    Args:
+        data: TLE data (bytes or memoryview slice of the file).
+
+    Returns:
+        tuple: (name, value), '' for a missing name or value.
+
+    Raises:
+        ValueError: If a triplet length is invalid, as TripletHandler.decode().
+    """
+    name = value = ccsid = None
+    offset = 0
+    data_len = len(data)
+    extractors = TLE_EXTRACTORS
+
+    while offset < data_len:
+        t_len = data[offset]
+        if t_len < 2:
+            raise ValueError(f"Invalid triplet length {t_len} at data offset {offset}")
+
+        end = offset + t_len
+        t_id = data[offset + 1]
+        extractor = extractors[t_id]
+        if extractor is not None:
+            # Decoded once the code page is known: the CCSID triplet may come last.
+            # Only the first triplet of each kind counts, as in sf_data.
+            slot, start, decode = extractor
+            if slot == TLE_NAME:
+                if name is None:
+                    name, name_decode = data[offset + start:end], decode
+            elif value is None:
+                value, value_decode = data[offset + start:end], decode
+        elif t_id == CCSID_TRIPLET_ID and ccsid is None and t_len >= 6:
+            # GCSGID (2 bytes) then CPGID, or 0x0000 then CCSID: the code page either way
+            ccsid = int.from_bytes(data[offset + 4:offset + 6], 'big')
+
+        offset = end
+
+    if ccsid is None:
+        ccsid = DEFAULT_CCSID
+    return (
+        name_decode(name, ccsid) or '' if name is not None else '',
+        value_decode(value, ccsid) or '' if value is not None else '',
+    )
+
 
 # Registry
 SF_HANDLERS = {
     1: HexaHandler(),
     2: CharHandler(),
     3: TripletHandler(),
+    4: NameHandler(),
 }
+
+# Decoders compiled from the configurations at import time:
+# editing sf_config.py or triplet_config.py is enough to add a new SF or triplet type.
+TRIPLET_DECODERS = compile_triplet_table(TRIPLET_CONFIG, TRIPLET_HANDLERS)
+SF_DECODERS = compile_sf_table(SF_CONFIGS, SF_HANDLERS)
+
+TLE_ID: bytes = b'\xD3\xA0\x90'
+"""Tag Logical Element, decoded by decode_tle() on the writer path."""
+
+# Components pulled out of the TLE triplets, slot 0 (TLE_NAME) then slot 1
+TLE_NAME = 0
+CCSID_TRIPLET_ID = 0x01
+TLE_EXTRACTORS = compile_extractor_table(TRIPLET_CONFIG, TRIPLET_HANDLERS, {'FQN': 'fqn_name', 'AttrVal': 'att_val'})
+
+
+def find_ccsid(data) -> int:
+    """
+    Return the code page of the first CCSID triplet (0x01) of triplet data, DEFAULT_CCSID if none.
+
+    Raises:
+        ValueError: If a triplet length is invalid, as TripletHandler.decode().
+    """
+    offset = 0
+    data_len = len(data)
+
+    while offset < data_len:
+        t_len = data[offset]
+        if t_len < 2:
+            raise ValueError(f"Invalid triplet length {t_len} at data offset {offset}")
+        if data[offset + 1] == CCSID_TRIPLET_ID and t_len >= 6:
+            # GCSGID (2 bytes) then CPGID, or 0x0000 then CCSID: the code page either way
+            return int.from_bytes(data[offset + 4:offset + 6], 'big')
+        offset += t_len
+
+    return DEFAULT_CCSID
+
+
+def triplet_decoders(ccsid: int) -> list[Optional[Decoder]]:
+    """Return the triplet decoder table decoding the character data in the code page of a CCSID."""
+    if ccsid == DEFAULT_CCSID or ccsid not in CCSID_CODECS:
+        # Unsupported code pages are decoded as DEFAULT_CCSID (see text_decoder())
+        return TRIPLET_DECODERS
+    return _compile_ccsid_triplet_table(ccsid)
+
+
+@functools.cache
+def _compile_ccsid_triplet_table(ccsid: int) -> list[Optional[Decoder]]:
+    return compile_triplet_table(TRIPLET_CONFIG, TRIPLET_HANDLERS, ccsid)
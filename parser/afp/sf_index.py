@@ -0,0 +1,299 @@
+"""
+Module for the persistent structured field index of an AFP file.
+
+The index holds one row per structured field (offset, 3-byte ID, length, flags) stored
+as packed arrays in a sidecar file next to the AFP file. It is keyed by the file size,
+modification time and a hash of the first bytes of the file, so a stale index is
+detected and rebuilt. A saved index is loaded through mmap: no Python object is
+created per row and the header walk of the AFP file is skipped.
+
+Sidecar layout (native byte order, recorded in the header):
+    header  : SF_INDEX_HEADER
+    offsets : count x uint64
+    lengths : count x uint16
+    sf_ids  : count x 3 bytes
+    flags   : count x uint8
+"""
+
+import hashlib
+import heapq
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from parser.afp.sfi_config import CARRIAGE_CONTROL, SFI_HEADER
+
+SF_INDEX_SUFFIX = ".sfidx"
+"""Suffix appended to the AFP file name to build the default sidecar path."""
+
+SF_INDEX_MAGIC = b"AFPSFIDX"
+SF_INDEX_VERSION = 1
+
+SF_INDEX_HEADER = struct.Struct("=8sHBxQQ16sQ12x")
+"""magic, version, byte order (0 little / 1 big), file size, mtime (ns), head hash, row count (64 bytes)."""
+
+HEAD_HASH_SIZE = 64 * 1024
+"""Number of bytes at the start of the AFP file covered by the head hash."""
+
+MAX_FIND_IDS = 16
+"""Above this number of wanted SF IDs, rows are scanned sequentially instead of searched."""
+
+
+class SfIndex:
+    """
+    Packed table of the structured fields of an AFP file.
+
+    Attributes:
+        offsets: Offset of the carriage control byte of each SF (uint64 sequence).
+        lengths: SFLength of each SF (uint16 sequence).
+        flags: SFI flags of each SF (uint8 sequence).
+        loaded: True if the index was loaded from a sidecar file, False if built.
+    """
+
+    def __init__(self, offsets, lengths, sf_ids, flags, loaded: bool = False, mapped: Optional[mmap.mmap] = None,
+                 ids_base: int = 0) -> None:
+        self.offsets = offsets
+        self.lengths = lengths
+        self.flags = flags
+        self.loaded = loaded
+
+        # Raw ID storage (bytearray or the sidecar mmap) supporting find()
+        self._sf_ids = sf_ids
+        self._ids_base = ids_base
+        self._ids_end = ids_base + 3 * len(offsets)
+        self._mapped = mapped
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def sf_id(self, row: int) -> bytes:
+        """Return the raw 3-byte ID of the given row."""
+        start = self._ids_base + 3 * row
+        return bytes(self._sf_ids[start:start + 3])
+
+    def rows(self, start: int = 0, end: Optional[int] = None) -> Iterator[tuple[int, bytes, int, int]]:
+        """
+        Iterate over the rows whose SF starts in the given byte range.
+
+        Yields:
+            tuple: (offset, sf_id, sf_len, flags), as SfStreamer.iter_sf_headers().
+        """
+        first, last = self.row_range(start, end)
+        offsets, lengths, flags = self.offsets, self.lengths, self.flags
+        for row in range(first, last):
+            yield offsets[row], self.sf_id(row), lengths[row], flags[row]
+
+    def row_range(self, start: int = 0, end: Optional[int] = None) -> tuple[int, int]:
+        """Return the [first, last) rows of the SFs starting in the [start, end) byte range."""
+        first = bisect_left(self.offsets, start)
+        last = len(self) if end is None else bisect_left(self.offsets, end)
+        return first, last
+
+    def find_rows(self, sf_ids: Optional[Iterable[bytes]], first: int = 0, last: Optional[int] = None) -> Iterator[int]:
+        """
+        Iterate in file order over the rows holding one of the given SF IDs.
+
+        Each ID is searched with a C-level find() over the packed ID array, so rows
+        of other types are never visited. With many IDs (or None) all rows are returned.
+
+        Args:
+            sf_ids: Raw 3-byte IDs to look for, None for all rows.
+            first: First row to consider.
+            last: Row where the search stops (None for the end of the index).
+
+        Yields:
+            int: Row numbers in increasing order.
+        """
+        last = len(self) if last is None else last
+
+        if sf_ids is None:
+            yield from range(first, last)
+            return
+
+        sf_ids = set(sf_ids)
+        if len(sf_ids) > MAX_FIND_IDS:
+            yield from range(first, last)
+            return
+
+        yield from heapq.merge(*(self._find_id(sf_id, first, last) for sf_id in sf_ids))
+
+    def _find_id(self, sf_id: bytes, first: int, last: int) -> Iterator[int]:
+        ids, base = self._sf_ids, self._ids_base
+        end = base + 3 * last
+        position = ids.find(sf_id, base + 3 * first, end)
+
+        while position != -1:
+            relative = position - base
+            if relative % 3 == 0:
+                yield relative // 3
+                position = ids.find(sf_id, position + 3, end)
+            else:
+                # Match straddling two rows
+                position = ids.find(sf_id, position + 1, end)
+
+    @staticmethod
+    def default_path(afp_path) -> Path:
+        """Return the default sidecar path of an AFP file."""
+        afp_path = Path(afp_path)
+        return afp_path.with_name(afp_path.name + SF_INDEX_SUFFIX)
+
+    @staticmethod
+    def source_key(afp_path) -> tuple[int, int, bytes]:
+        """
+        Compute the key identifying the indexed content of an AFP file.
+
+        Returns:
+            tuple: (file size, mtime in ns, hash of the first bytes of the file).
+        """
+        stat = Path(afp_path).stat()
+        with open(afp_path, "rb") as f:
+            head_hash = hashlib.blake2b(f.read(HEAD_HASH_SIZE), digest_size=16).digest()
+        return stat.st_size, stat.st_mtime_ns, head_hash
+
+    @classmethod
+    def build(cls, afp_path) -> 'SfIndex':
+        """
+        Build the index of an AFP file with a header-only walk.
+
+        Raises:
+            EOFError: If an introducer is truncated.
+            ValueError: If an AFP structure error is detected.
+        """
+        offsets = array("Q")
+        lengths = array("H")
+        flags = array("B")
+        sf_ids = bytearray()
+
+        control_byte = CARRIAGE_CONTROL[0]
+        unpack_from = SFI_HEADER.unpack_from
+
+        with open(afp_path, "rb") as f:
+            file_len = Path(afp_path).stat().st_size
+            if file_len == 0:
+                return cls(offsets, lengths, sf_ids, flags)
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mmapped_file:
+                offset = 0
+                while offset < file_len:
+                    try:
+                        control, sf_len, sf_id, sf_flags = unpack_from(mmapped_file, offset)
+                    except struct.error:
+                        raise EOFError(f"Unexpected end of file at offset {offset}")
+                    if control != control_byte:
+                        raise ValueError(f"AFP structure error at offset {offset}: The file is not a valid AFP file")
+
+                    offsets.append(offset)
+                    lengths.append(sf_len)
+                    sf_ids += sf_id
+                    flags.append(sf_flags)
+                    offset += sf_len + 1
+
+        return cls(offsets, lengths, sf_ids, flags)
+
+    def save(self, index_path, source_key: tuple[int, int, bytes]) -> None:
+        """
+        Write the index to a sidecar file.
+
+        Args:
+            index_path: Path of the sidecar file.
+            source_key: Key of the indexed AFP file, as returned by source_key().
+        """
+        file_size, mtime_ns, head_hash = source_key
+        byte_order = 0 if sys.byteorder == "little" else 1
+
+        tmp_path = Path(str(index_path) + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(SF_INDEX_HEADER.pack(
+                SF_INDEX_MAGIC, SF_INDEX_VERSION, byte_order, file_size, mtime_ns, head_hash, len(self)
+            ))
+            f.write(memoryview(self.offsets).cast("B"))
+            f.write(memoryview(self.lengths).cast("B"))
+            f.write(self._sf_ids[self._ids_base:self._ids_end])
+            f.write(memoryview(self.flags).cast("B"))
+
+        # Atomic replacement: a concurrent reader never sees a partial index
+        tmp_path.replace(index_path)
+
+    @classmethod
+    def load(cls, index_path, source_key: tuple[int, int, bytes]) -> Optional['SfIndex']:
+        """
+        Load a sidecar index through mmap.
+
+        Args:
+            index_path: Path of the sidecar file.
+            source_key: Key of the AFP file, as returned by source_key().
+
+        Returns:
+            SfIndex: The index, or None if the sidecar is missing, invalid or stale.
+        """
+        try:
+            with open(index_path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            magic, version, byte_order, file_size, mtime_ns, head_hash, count = \
+                SF_INDEX_HEADER.unpack_from(mapped, 0)
+        except struct.error:
+            mapped.close()
+            return None
+
+        expected_order = 0 if sys.byteorder == "little" else 1
+        offsets_start = SF_INDEX_HEADER.size
+        lengths_start = offsets_start + 8 * count
+        ids_start = lengths_start + 2 * count
+        flags_start = ids_start + 3 * count
+
+        if (magic != SF_INDEX_MAGIC or version != SF_INDEX_VERSION or byte_order != expected_order
+                or (file_size, mtime_ns, head_hash) != tuple(source_key)
+                or len(mapped) != flags_start + count):
+            mapped.close()
+            return None
+
+        view = memoryview(mapped)
+        return cls(
+            view[offsets_start:lengths_start].cast("Q"),
+            view[lengths_start:ids_start].cast("H"),
+            mapped,
+            view[flags_start:flags_start + count],
+            loaded=True,
+            mapped=mapped,
+            ids_base=ids_start,
+        )
+
+    @classmethod
+    def open(cls, afp_path, index_path=None, save: bool = True) -> 'SfIndex':
+        """
+        Load the sidecar index of an AFP file, building (and saving) it if missing or stale.
+
+        Args:
+            afp_path: Path of the AFP file.
+            index_path: Path of the sidecar file (default: <afp_path>.sfidx).
+            save: Save a newly built index to the sidecar file.
+
+        Returns:
+            SfIndex: Up-to-date index of the file.
+        """
+        index_path = Path(index_path) if index_path else cls.default_path(afp_path)
+        source_key = cls.source_key(afp_path)
+
+        index = cls.load(index_path, source_key)
+        if index is not None:
+            return index
+
+        index = cls.build(afp_path)
+
+        if save:
+            try:
+                index.save(index_path, source_key)
+            except OSError:
+                # Read-only location: keep the in-memory index
+                pass
+
+        return index
+
@@ -0,0 +1,154 @@
+"""
+Module for the record type yielded by the AFP structured field streamer.
+
+An SfRecord holds the introducer fields of a structured field and a zero-copy
+reference to its data in the memory-mapped file. The SFI dictionary and the decoded
+data are only built on first access, so structured fields a writer does not look
+into cost a single small object.
+"""
+
+from parser.afp.sf_handlers import TLE_ID, decode_tle
+from parser.afp.sfi_config import SFI_FLAG_EXTENSION, SFI_HEADER_LEN
+
+_UNDECODED = object()
+
+
+class SfRecord:
+    """
+    Structured field read from an AFP file.
+
+    While the stream is on a record, its data is a view of the memory-mapped file.
+    The streamer detaches a record (copying its data) when it moves on, so records
+    stay valid after the file is closed.
+
+    Attributes:
+        offset: Offset of the carriage control byte of the SF.
+        sf_id: Raw 3-byte ID.
+        sf_len: SFLength (introducer and data, without the carriage control byte).
+        flags: SFI flags.
+        extension_len: Length of the SFI extension (0 if none).
+    """
+
+    __slots__ = (
+        'offset', 'sf_id', 'sf_len', 'flags', 'extension_len',
+        '_decoder', '_buffer', '_data_offset', '_data_end', '_sf_data', '_tle',
+    )
+
+    def __init__(self, offset: int, sf_id: bytes, sf_len: int, flags: int, extension_len: int,
+                 decoder, buffer, data_offset: int, data_end: int) -> None:
+        """
+        Initialize the record.
+
+        Args:
+            offset: Offset of the carriage control byte of the SF.
+            sf_id: Raw 3-byte ID.
+            sf_len: SFLength of the SF.
+            flags: SFI flags.
+            extension_len: Length of the SFI extension.
+            decoder: Compiled SfDecoder of the SF type.
+            buffer: Memoryview over the file.
+            data_offset: Offset of the SF data in buffer.
+            data_end: Offset of the end of the SF data in buffer.
+        """
+        self.offset = offset
+        self.sf_id = sf_id
+        self.sf_len = sf_len
+        self.flags = flags
+        self.extension_len = extension_len
+
+        self._decoder = decoder
+        self._buffer = buffer
+        self._data_offset = data_offset
+        self._data_end = data_end
+        self._sf_data = _UNDECODED
+        self._tle = None
+
+    @property
+    def sf_name(self) -> str:
+        """Short name of the structured field (e.g., "BDT", "EPG")."""
+        return self._decoder.short_name
+
+    @property
+    def end_offset(self) -> int:
+        """Offset of the next structured field."""
+        return self.offset + self.sf_len + 1
+
+    @property
+    def payload(self):
+        """Raw SF data (memoryview while the stream is on the record, bytes once detached)."""
+        return self._buffer[self._data_offset:self._data_end]
+
+    @property
+    def sf_data(self) -> dict:
+        """Decoded SF data, decoded on first access."""
+        if self._sf_data is _UNDECODED:
+            self._sf_data = self._decoder.decode(self._buffer[self._data_offset:self._data_end])
+        return self._sf_data
+
+    @property
+    def tle(self) -> tuple[str, str]:
+        """
+        (name, value) of a TLE, decoded on first access by the fast path (decode_tle()).
+
+        sf_data is not built: the writers only read the name and the value of a TLE.
+        """
+        if self._tle is None:
+            self._tle = decode_tle(self._buffer[self._data_offset:self._data_end])
+        return self._tle
+
+    def decode(self) -> tuple[str, str] | dict:
+        """
+        Decode the record as the writers read it: tle for a TLE, sf_data otherwise.
+
+        Returns:
+            tuple | dict: The (name, value) pair of a TLE, the decoded SF data otherwise.
+        """
+        return self.tle if self.sf_id == TLE_ID else self.sf_data
+
+    @property
+    def sfi_data(self) -> dict:
+        """Parsed SFI data, as SfParser.build_sfi_data()."""
+        has_extension = bool(self.flags & SFI_FLAG_EXTENSION)
+
+        sfi_data = {
+            'sf_len': self.sf_len,
+            'sf_id': self.sf_id.hex().upper(),
+            'flags': f"{self.flags:08b}",
+        }
+
+        if has_extension:
+            sfi_data['extension_len'] = self.extension_len
+            if self.extension_len > 1:
+                extension = self._buffer[self._data_offset - self.extension_len + 1:self._data_offset]
+                sfi_data['extension_data'] = extension.hex().upper()
+
+        sfi_data['has_extension'] = has_extension
+        sfi_data['sf_data_len'] = self.sf_len - SFI_HEADER_LEN - self.extension_len
+
+        return sfi_data
+
+    def detach(self) -> None:
+        """Copy the SF data (and SFI extension) out of the file, releasing the file view."""
+        buffer = self._buffer
+        if buffer.__class__ is memoryview:
+            start = self._data_offset - self.extension_len
+            # Slicing the object behind the view (mmap) copies in a single step
+            self._buffer = buffer.obj[start:self._data_end]
+            self._data_end -= start
+            self._data_offset -= start
+
+    def to_dict(self) -> dict:
+        """
+        Return the record as the dictionary yielded by earlier versions of the streamer.
+
+        Returns:
+            dict: Keys 'sf_name', 'sfi_data' and 'sf_data'.
+        """
+        return {
+            'sf_name': self.sf_name,
+            'sfi_data': self.sfi_data,
+            'sf_data': self.sf_data,
+        }
+
+    def __repr__(self) -> str:
+        return f"SfRecord({self.sf_name}, offset={self.offset}, sf_len={self.sf_len})"
@@ -6,14 +6,33 @@ of structured fields from AFP files using memory mapping for optimal performance
 """
 
 from parser.afp.sf_config import SF_CONFIGS
-from parser.afp.sf_handlers import SF_HANDLERS
+from parser.afp.sf_handlers import SF_HANDLERS, SF_DECODERS
 from parser.file_parser import FileParser
 from parser.afp.sfi_handlers import SFI_HANDLERS
 
 from pathlib import Path
 from parser.afp.sfi_config import *
 from parser.afp.sf_filter import SfFilter
+from parser.afp.sf_index import SfIndex
+from parser.afp.sf_record import SfRecord
+from parser.afp.container_skip import CONTAINERS, find_container_end_indexed, skip_container
+from parser.afp.document_table import DocumentTable, NO_MEDIA
+from domain.afp_compact import CompactDocument, NameTable
+from domain.afp_builder import AfpBuilder
+from logger import get_logger
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable
 import mmap
+import os
+import struct
+import time
+
+if TYPE_CHECKING:
+    # pydantic models, only loaded by the random access methods (CompactDocument.to_model())
+    from domain.afp import Document, Page
+
+EPF_ID: bytes = b'\xD3\xA9\xA5'
+"""End Print File: last structured field of a print file, ends the follow mode."""
 
 class SfStreamer(FileParser):
     """
@@ -65,22 +84,296 @@ class SfStreamer(FileParser):
         except OSError as e:
             raise OSError(f"Cannot read file information for '{afp_path}': {e}")
         
+        # Structured fields walked by the last stream(): decoded, filtered out or skipped
+        self.sf_scanned = 0
+
+        # Follow mode (idle timeout, poll interval), see follow()
+        self._follow: tuple[float, float] | None = None
+        # Called by stream() in follow mode each time it waits for the file to grow
+        self.on_wait: Callable[[], None] | None = None
+
         # Store the filter : initiliazed as if no config...
-        self.sf_filter = SfFilter()
+        self.set_config(SfFilter())
+
+        # Optional structured field index replacing the header walk
+        self.sf_index: SfIndex | None = None
+
+        # Offsets of documents and pages, built on first random access
+        self._document_table: DocumentTable | None = None
+
+    @property
+    def path(self) -> Path:
+        """Path of the AFP file."""
+        return self._path
 
     def set_config(self, config: SfFilter) -> None:
         self.sf_filter = config
 
+        # Compiled decoders of the SFs passing the filter: any other SF is skipped with a seek
+        self._decoders = {
+            sf_id: decoder for sf_id, decoder in SF_DECODERS.items()
+            if config.should_parse(decoder.short_name)
+        }
+
+        # Containers whose subtree is skipped in one jump when their Begin SF is filtered out.
+        # Not in follow mode: the end of a growing file may lie inside the container.
+        if self._follow is None:
+            self._containers = {sf_id for sf_id in CONTAINERS if sf_id not in self._decoders}
+        else:
+            self._containers = set()
+
+    def follow(self, idle_timeout: float = 60.0, poll_interval: float = 0.5) -> None:
+        """
+        Stream the file while it is still being written.
+
+        stream() reads the complete structured fields available, then waits for the
+        file to grow (a partial trailing SF is read once complete) and maps it again.
+        It stops after EPF (End Print File) or when the file has not grown for
+        idle_timeout seconds; a structured field still incomplete then is left out
+        with a warning, its offset being kept in afp_offset.
+
+        Args:
+            idle_timeout: Seconds without growth after which streaming stops.
+            poll_interval: Seconds between two checks of the file size.
+        """
+        self._follow = (idle_timeout, poll_interval)
+        self.set_config(self.sf_filter)
+
+    @property
+    def following(self) -> bool:
+        """True if stream() follows the growth of the file."""
+        return self._follow is not None
+
+    def use_index(self, index_path: str | None = None, build: bool = True) -> SfIndex | None:
+        """
+        Use the sidecar structured field index of the file.
+
+        The index is loaded through mmap if it is up to date, otherwise it is built
+        with a header-only walk and saved next to the file for later runs.
+
+        Args:
+            index_path: Path of the sidecar file (default: <afp_path>.sfidx).
+            build: Build the index if it is missing or stale. If False, the index is
+                only used when an up-to-date sidecar file exists.
+
+        Returns:
+            SfIndex: Index used by stream() and iter_sf_headers(), or None.
+        """
+        if build:
+            self.sf_index = SfIndex.open(self._path, index_path)
+        else:
+            self.sf_index = SfIndex.load(
+                index_path or SfIndex.default_path(self._path), SfIndex.source_key(self._path)
+            )
+        return self.sf_index
+
+    def set_range(self, start: int, end: int | None = None) -> None:
+        """
+        Restrict streaming to a byte range of the file.
+
+        Args:
+            start: Offset of the first structured field to read (must be an SF boundary).
+            end: Offset where streaming stops (SF boundary or None for the end of file).
+        """
+        self.afp_offset = start
+        if end is not None:
+            self.afp_len = end
+
+    def iter_sf_headers(self, start: int | None = None, end: int | None = None):
+        """
+        Walk the structured field introducers of the file without reading any data.
+
+        Args:
+            start: Offset of the first structured field (default: current offset).
+            end: Offset where the walk stops (default: end of the streaming range).
+
+        Yields:
+            tuple: (offset, sf_id, sf_len, flags) for every structured field, where
+            offset is the position of the carriage control byte and sf_id the raw 3-byte ID.
+
+        Raises:
+            EOFError: If an introducer is truncated.
+            ValueError: If an AFP structure error is detected.
+            OSError: If a file access error occurs.
+        """
+        offset = self.afp_offset if start is None else start
+        end = self.afp_len if end is None else end
+
+        if self.sf_index is not None:
+            yield from self.sf_index.rows(offset, end)
+            return
+
+        try:
+            with open(self._path, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mmapped_file:
+                    while offset < end:
+                        try:
+                            sf_len, sf_id, flags, _ = SfParser.unpack_sfi(mmapped_file, offset)
+                        except EOFError:
+                            raise EOFError(f"Unexpected end of file at offset {offset}")
+                        except ValueError as e:
+                            raise ValueError(f"AFP structure error at offset {offset}: {e}")
+                        yield offset, sf_id, sf_len, flags
+                        offset += sf_len + 1
+
+        except OSError as e:
+            raise OSError(f"File access error: {e}")
+
+    @contextmanager
+    def _mapped_view(self):
+        """Map the file and yield a memoryview over it, for random access reads."""
+        try:
+            with open(self._path, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mmapped_file, \
+                        memoryview(mmapped_file) as view:
+                    yield view
+        except OSError as e:
+            raise OSError(f"File access error: {e}")
+
+    def read_at(self, offset: int) -> SfRecord | None:
+        """
+        Read the single structured field starting at the given offset.
+
+        The streaming offset is left unchanged.
+
+        Args:
+            offset: Offset of the carriage control byte of the structured field.
+
+        Returns:
+            SfRecord: Structured field (detached from the file), None if the SF is unknown or filtered out.
+        """
+        with self._mapped_view() as view:
+            record = self._read_at(view, offset)
+            if record is not None:
+                record.detach()
+            return record
+
+    def _read_at(self, view, offset: int) -> SfRecord | None:
+        saved_offset = self.afp_offset
+        try:
+            self.afp_offset = offset
+            return self.read_sf(view)
+        finally:
+            self.afp_offset = saved_offset
+
+    # ===== Random access to documents and pages =====
+
+    def document_table(self) -> DocumentTable:
+        """
+        Return the offset table of the documents and pages of the file.
+
+        The table is built on first use with a header-only pass (or from the SF index).
+        """
+        if self._document_table is None:
+            self._document_table = DocumentTable.build(self)
+        return self._document_table
+
+    def get_document(self, doc_number: int, compact: bool = False) -> 'Document | CompactDocument | None':
+        """
+        Build a single document by seeking straight to its BNG.
+
+        Args:
+            doc_number: Document number, from 1 (as 'doc_number' in the writer output).
+            compact: Return the CompactDocument instead of the pydantic model.
+
+        Returns:
+            Document: The document as built by the writer, with the same page numbers
+            and medium maps as in a full run. None if BNG is filtered out.
+
+        Raises:
+            IndexError: If the document does not exist.
+        """
+        table = self.document_table()
+        with self._mapped_view() as view:
+            document = self._build_document(view, table, doc_number)
+        if document is None or compact:
+            return document
+        return document.to_model()
+
+    def iter_documents(self, start: int = 1, stop: int | None = None, compact: bool = False):
+        """
+        Build a range of documents, mapping the file once.
+
+        Args:
+            start: First document number (from 1).
+            stop: Document number where iteration stops (excluded, default: after the last one).
+            compact: Yield CompactDocuments instead of pydantic models, sharing their
+                TLE and medium map names.
+
+        Yields:
+            Document: The documents from start to stop - 1.
+        """
+        table = self.document_table()
+        stop = table.nb_of_docs + 1 if stop is None else min(stop, table.nb_of_docs + 1)
+        names, media = NameTable(), NameTable()
+
+        with self._mapped_view() as view:
+            for doc_number in range(start, stop):
+                document = self._build_document(view, table, doc_number, names, media)
+                yield document if document is None or compact else document.to_model()
+
+    def get_page(self, page_number: int) -> 'Page | None':
+        """
+        Build a single page by seeking straight to its BPG.
+
+        Args:
+            page_number: Page number, from 1 (as 'page_number' in the writer output).
+
+        Returns:
+            Page: The page as built by the writer, None if BPG is filtered out.
+
+        Raises:
+            IndexError: If the page does not exist.
+        """
+        table = self.document_table()
+        start, end = table.page_range(page_number)
+
+        # The page is attached to a document numbered as the one holding it
+        builder = AfpBuilder(self._path.name, max(table.page_doc[page_number - 1] - 1, 0), page_number - 1)
+        builder.begin_document()
+
+        with self._mapped_view() as view:
+            self._replay(view, builder, table.page_media[page_number - 1], start, end)
+
+        if not builder.curr_doc.page_count:
+            return None
+        return builder.curr_doc.page(-1).to_model()
+
+    def _build_document(self, view, table: DocumentTable, doc_number: int, names: NameTable | None = None,
+                        media: NameTable | None = None) -> CompactDocument | None:
+        start, end = table.document_range(doc_number)
+        builder = AfpBuilder(self._path.name, doc_number - 1, table.doc_first_page[doc_number - 1],
+                             names=names, media=media)
+        self._replay(view, builder, table.doc_media[doc_number - 1], start, end)
+        return builder.curr_doc
+
+    def _replay(self, view, builder: AfpBuilder, media_offset: int, start: int, end: int) -> None:
+        """Feed the IMM in force and the structured fields of a byte range to a builder."""
+        if media_offset != NO_MEDIA:
+            record = self._read_at(view, media_offset)
+            if record is not None:
+                builder.handle(record)
+
+        saved_offset = self.afp_offset
+        try:
+            self.afp_offset = start
+            while self.afp_offset < end:
+                record = self.read_sf(view)
+                if record is not None:
+                    builder.handle(record)
+        finally:
+            self.afp_offset = saved_offset
+
     def stream(self):
         """
         Stream structured fields from the AFP file one at a time (generator).
 
         This generator function opens the AFP file using memory mapping for efficient
-        access and yields each structured field as a dictionary containing the field
-        name, SFI data, and field data.
+        access and yields each structured field as an SfRecord. Its SFI data and field
+        data are only decoded when accessed (SfRecord.to_dict() gives the former dict).
 
         Yields:
-            dict: A dictionary with the following keys:
+            SfRecord: Structured field with the following fields:
                 - sf_name (str): Short name of the structured field (e.g., "BDT", "EPG").
                 - sfi_data (dict): Parsed Structured Field Introducer data.
                 - sf_data (dict or bytes): Parsed structured field data.
@@ -90,71 +383,213 @@ class SfStreamer(FileParser):
             ValueError: If an AFP structure error is detected.
             OSError: If a file access error occurs.
         """
+        self.sf_scanned = 0
+
+        if self._follow is not None:
+            yield from self._stream_follow()
+            return
 
         try:
             with open(self._path, "rb") as f:
-                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mmapped_file:
-                    while self.afp_offset < self.afp_len:
-                        try:
-                            sf_data = self.read_sf(mmapped_file)
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mmapped_file, \
+                        memoryview(mmapped_file) as view:
+                    if self.sf_index is not None:
+                        yield from self._stream_indexed(view)
+                        return
+
+                    record = None
+                    try:
+                        while self.afp_offset < self.afp_len:
+                            try:
+                                record = self.read_sf(view)
+                            except EOFError:
+                                raise EOFError(f"Unexpected end of file at offset {self.afp_offset}")
+                            except ValueError as e:
+                                raise ValueError(f"AFP structure error at offset {self.afp_offset}: {e}")
+
                             # Only yield if the SF was not filtered out
-                            if sf_data is not None:
-                                yield sf_data
-                        except EOFError:
-                            raise EOFError(f"Unexpected end of file at offset {self.afp_offset}")
-                        except ValueError as e:
-                            raise ValueError(f"AFP structure error at offset {self.afp_offset}: {e}")
+                            if record is not None:
+                                yield record
+                                # The consumer may keep the record: copy its data out of the file
+                                record.detach()
+                    finally:
+                        if record is not None:
+                            record.detach()
 
         except OSError as e:
             raise OSError(f"File access error: {e}")
 
-    def read_sf(self, f) -> dict | None:
+    def _stream_indexed(self, view):
         """
-        Read the next structured field from the file.
+        Stream the structured fields listed by the index.
+
+        Only the rows of SF types that pass the filter are visited, the bytes of
+        all other structured fields are never touched.
+        """
+        index = self.sf_index
+        first, last = index.row_range(self.afp_offset, self.afp_len)
+        offsets = index.offsets
+
+        record = None
+        try:
+            for row in index.find_rows(self.wanted_sf_ids(), first, last):
+                self.afp_offset = offsets[row]
+                # The rows of the other SF types are passed over, counted as scanned
+                self.sf_scanned = row - first
+                try:
+                    record = self.read_sf(view)
+                except EOFError:
+                    raise EOFError(f"Unexpected end of file at offset {offsets[row]}")
+                except ValueError as e:
+                    raise ValueError(f"AFP structure error at offset {offsets[row]}: {e}")
+
+                if record is not None:
+                    yield record
+                    record.detach()
+        finally:
+            if record is not None:
+                record.detach()
+
+        self.sf_scanned = last - first
+        self.afp_offset = self.afp_len
+
+    def _stream_follow(self):
+        """
+        Stream the structured fields of a file being written (see follow()).
+
+        The file is mapped again each time it grows; the offset of the first
+        incomplete structured field is kept in afp_offset.
+        """
+        idle_timeout, poll_interval = self._follow
+        mapped_len = 0
+
+        try:
+            with open(self._path, "rb") as f:
+                last_growth = time.monotonic()
+
+                while True:
+                    size = os.fstat(f.fileno()).st_size
+
+                    if size > mapped_len:
+                        mapped_len = self.afp_len = size
+                        last_growth = time.monotonic()
+
+                        with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mmapped_file, \
+                                memoryview(mmapped_file) as view:
+                            end_of_file = yield from self._stream_available(view)
+
+                        if end_of_file:
+                            return
+                        if self.on_wait is not None:
+                            self.on_wait()
+
+                    elif time.monotonic() - last_growth >= idle_timeout:
+                        if self.afp_offset < mapped_len:
+                            # As a complete run of a truncated file: the output ends before it
+                            get_logger(__name__).warning(
+                                f"Unexpected end of file at offset {self.afp_offset}: "
+                                f"structured field still incomplete after the idle timeout, not parsed"
+                            )
+                        return
+
+                    else:
+                        time.sleep(poll_interval)
+
+        except OSError as e:
+            raise OSError(f"File access error: {e}")
+
+    def _stream_available(self, view):
+        """
+        Stream the complete structured fields of the mapped part of a growing file.
 
         Returns:
-            dict: Parsed SF data if it should be processed, None if filtered out.
+            bool: True if EPF was read, False if the end of the mapped data was reached.
         """
-        f.seek(self.afp_offset, 0)
+        end = self.afp_len
 
-        # All structured fields are delimited by a line control
-        control = f.read(1)
-        if control != CARRIAGE_CONTROL:
-            raise ValueError("The file is not a valid AFP file")
+        record = None
+        try:
+            while self.afp_offset < end:
+                offset = self.afp_offset
+                try:
+                    sf_len, sf_id, _, _ = SfParser.unpack_sfi(view, offset)
+                except EOFError:
+                    # Introducer not completely written yet
+                    break
+                except ValueError as e:
+                    raise ValueError(f"AFP structure error at offset {offset}: {e}")
+
+                if offset + sf_len + 1 > end:
+                    # Data not completely written yet
+                    break
+
+                record = self.read_sf(view)
+                if record is not None:
+                    yield record
+                    record.detach()
+
+                if sf_id == EPF_ID:
+                    return True
+        finally:
+            if record is not None:
+                record.detach()
+
+        return False
+
+    def wanted_sf_ids(self) -> list[bytes]:
+        """Return the raw IDs of the known structured fields that pass the filter."""
+        return list(self._decoders)
+
+    def read_sf(self, f) -> SfRecord | None:
+        """
+        Read the next structured field from the file.
 
-        # A structured field starts with an SFI (Structured Field Introducer)
-        sfi_data = SfParser.parse_sfi(f)
+        The SFI is decoded straight from the memory map; the SFI dictionary and the
+        data are only decoded when accessed on the returned record.
 
-        # update the offset for next SF
-        self.afp_offset += sfi_data['sf_len'] + 1
+        Args:
+            f: Memoryview over the AFP file.
 
-        # Use the bytes version for lookups
-        sf_id_bytes = sfi_data['sf_id_bytes']
+        Returns:
+            SfRecord: Structured field if it should be processed, None if filtered out.
+        """
+        # A structured field starts with an SFI (Structured Field Introducer)
+        offset = self.afp_offset
+        sf_len, sf_id, flags, extension_len = SfParser.unpack_sfi(f, offset)
 
-        # Get SF name by ID (using bytes)
-        sf_name = SfParser.get_sf_name(sf_id_bytes)
+        # update the offset for next SF
+        self.afp_offset += sf_len + 1
+        self.sf_scanned += 1
 
-        # Check if this SF should be parsed.
+        # Get the compiled decoder of the SF (using bytes).
         # The SF must be referenced in sf_config.SF_STRUCTURES and not filtered out.
-        should_parse = sf_name != "NA" and self.sf_filter.should_parse(sf_name)
+        decoder = self._decoders.get(sf_id)
 
-        if not should_parse:
+        if decoder is None:
             # Skip the data entirely without reading it into memory
-            f.seek(sfi_data['sf_data_len'], 1)  # 1 = SEEK_CUR (relative to current position)
+            if sf_id in self._containers:
+                self._skip_container(f, offset, sf_len, sf_id)
             return None
 
-        # Parse the data according to its structure (using bytes)
-        sf_data = SfParser.parse_sf_data(f, sfi_data['sf_data_len'], sf_id_bytes)
+        data_offset = offset + 1 + SFI_HEADER_LEN + extension_len
+        return SfRecord(offset, sf_id, sf_len, flags, extension_len, decoder, f, data_offset, self.afp_offset)
 
-        # Remove the internal bytes version before returning (keep only hex string)
-        del sfi_data['sf_id_bytes']
+    def _skip_container(self, f, offset: int, sf_len: int, sf_id: bytes) -> None:
+        """
+        Move the offset past the unwanted subtree of a filtered-out container.
 
-        # Return data for SFs that should be parsed
-        return {
-            'sf_name': sf_name,
-            'sfi_data': sfi_data,
-            'sf_data': sf_data
-        }
+        Reading resumes at the End SF of the container (read as any other SF) or at
+        the first wanted SF inside it.
+        """
+        if self.sf_index is not None:
+            end_offset = find_container_end_indexed(self.sf_index, offset, sf_id, self.afp_len, list(self._decoders))
+            if end_offset is not None:
+                first, last = self.sf_index.row_range(offset + 1, end_offset)
+                self.sf_scanned += last - first
+                self.afp_offset = end_offset
+        else:
+            self.afp_offset, skipped = skip_container(f, offset, sf_len, sf_id, self.afp_len, self._decoders)
+            self.sf_scanned += skipped
 
 class SfParser:
     """Utility class for parsing AFP structured field components."""
@@ -195,6 +630,71 @@ class SfParser:
 
         return sfi_parsed
 
+    @staticmethod
+    def unpack_sfi(buf, offset: int) -> tuple[int, bytes, int, int]:
+        """
+        Decode the SFI of the structured field starting at the given offset.
+
+        The carriage control byte and the fixed 8 bytes of the introducer are
+        unpacked in a single SFI_HEADER call; the extension length is only read
+        when the extension flag is set.
+
+        Args:
+            buf: Buffer (mmap or memoryview) holding the AFP data.
+            offset: Offset of the carriage control byte of the structured field.
+
+        Returns:
+            tuple: (sf_len, sf_id, flags, extension_len) where sf_id is the raw 3-byte ID.
+
+        Raises:
+            ValueError: If the carriage control byte is missing.
+            EOFError: If the introducer is truncated.
+        """
+        try:
+            control, sf_len, sf_id, flags = SFI_HEADER.unpack_from(buf, offset)
+            extension_len = buf[offset + 1 + SFI_HEADER_LEN] if flags & SFI_FLAG_EXTENSION else 0
+        except (struct.error, IndexError):
+            raise EOFError("Truncated structured field introducer")
+
+        # All structured fields are delimited by a line control
+        if control != CARRIAGE_CONTROL[0]:
+            raise ValueError("The file is not a valid AFP file")
+
+        return sf_len, sf_id, flags, extension_len
+
+    @staticmethod
+    def build_sfi_data(buf, data_offset: int, sfi: tuple[int, bytes, int, int]) -> dict:
+        """
+        Build the SFI dictionary from an unpacked introducer.
+
+        The result is identical to parse_sfi() without the internal 'sf_id_bytes' key.
+
+        Args:
+            buf: Buffer (mmap or memoryview) holding the AFP data.
+            data_offset: Offset of the structured field data (right after the SFI).
+            sfi: Introducer as returned by unpack_sfi().
+
+        Returns:
+            dict: Parsed SFI data.
+        """
+        sf_len, sf_id, flags, extension_len = sfi
+
+        sfi_data = {
+            'sf_len': sf_len,
+            'sf_id': sf_id.hex().upper(),
+            'flags': f"{flags:08b}",
+        }
+
+        if flags & SFI_FLAG_EXTENSION:
+            sfi_data['extension_len'] = extension_len
+            if extension_len > 1:
+                sfi_data['extension_data'] = buf[data_offset - extension_len + 1:data_offset].hex().upper()
+
+        sfi_data['has_extension'] = bool(flags & SFI_FLAG_EXTENSION)
+        sfi_data['sf_data_len'] = sf_len - SFI_HEADER_LEN - extension_len
+
+        return sfi_data
+
     @staticmethod
     def parse_sf_data(f, data_len: int, sf_id: bytes) -> dict | bytes:
         """
@@ -2,6 +2,7 @@
 Module for defining structured field syntax, types, and related constants.
 """
 
+import struct
 from typing import NamedTuple
 
 CARRIAGE_CONTROL: bytes = b'\x5a' # Échappements hexadécimaux
@@ -51,4 +52,16 @@ List of components defining the structure of an SFI:
     - reserved: Reserved bytes (mandatory)
     - extension_len: Extension data length (optional)
     - extension_data: Extension data (optional)
-"""
\ No newline at end of file
+"""
+SFI_HEADER: struct.Struct = struct.Struct('>BH3sBxx')
+"""
+Precompiled layout of the carriage control byte followed by the fixed part of the SFI.
+
+Unpacks in one call into (control, sf_len, sf_id, flags); the reserved bytes are skipped.
+"""
+
+SFI_HEADER_LEN: int = 8
+"""Length of the fixed part of the SFI (without carriage control and extension)."""
+
+SFI_FLAG_EXTENSION: int = 0x80
+"""Flags bit 0 (most significant): the SFI is followed by an extension."""
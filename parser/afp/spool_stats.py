@@ -0,0 +1,234 @@
+"""
+Module for summarizing an AFP file from its structured field introducers.
+
+SpoolStats walks the introducers only: no payload is decoded and no model is built.
+It counts the structured fields and their bytes per SF type, the documents (BNG) and
+pages (BPG), and the pages printed with each medium map (IMM), whose 8-byte name is
+the only data read outside the introducers.
+"""
+
+import mmap
+import struct
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional
+
+import orjson
+
+from parser.afp.document_table import BNG_ID, BPG_ID, IMM_ID
+from parser.afp.ebcdic import DECODE_CACHE
+from parser.afp.sf_config import SF_CONFIGS
+from parser.afp.sfi_config import CARRIAGE_CONTROL, SFI_FLAG_EXTENSION, SFI_HEADER, SFI_HEADER_LEN
+
+IMAGE_DATA_IDS: frozenset[bytes] = frozenset({
+    b'\xD3\xEE\xFB',  # IPD: Image Picture Data
+    b'\xD3\xEE\x92',  # OCD: Object Container Data (JPEG, TIFF... objects)
+})
+"""Structured fields whose data is counted as image bytes."""
+
+IMM_NAME_LEN: int = 8
+"""Length of the medium map name (MMPName) starting the IMM data."""
+
+STATS_CHUNK_SIZE: int = 16 * 1024 * 1024
+"""Bytes walked between two aggregations of the SF lengths (bounds the memory used)."""
+
+NO_MEDIUM_MAP: str = "(none)"
+"""Medium map of the pages preceded by no IMM."""
+
+
+class SpoolStats:
+    """
+    Counters of an AFP file built in one header-only pass.
+
+    Attributes:
+        file_len: Size of the file in bytes.
+        sf_counts: Number of structured fields of each SF ID.
+        sf_bytes: Bytes of the structured fields of each SF ID (carriage control included).
+        extension_bytes: Bytes of the SFI extensions of each SF ID.
+        media_pages: Pages printed with each medium map (raw IMM name, None before any IMM).
+        media_invocations: IMMs of each medium map (raw name).
+        truncated_at: Offset of a last structured field ending past the end of the file
+            (not counted), None if the file is complete.
+        elapsed: Duration of the walk in seconds.
+    """
+
+    def __init__(self, file_len: int) -> None:
+        self.file_len = file_len
+        self.sf_counts: dict[bytes, int] = defaultdict(int)
+        self.sf_bytes: dict[bytes, int] = defaultdict(int)
+        self.extension_bytes: dict[bytes, int] = defaultdict(int)
+        self.media_pages: dict[Optional[bytes], int] = defaultdict(int)
+        self.media_invocations: dict[bytes, int] = defaultdict(int)
+        self.truncated_at: Optional[int] = None
+        self.elapsed = 0.0
+
+    @classmethod
+    def build(cls, afp_path, chunk_size: int = STATS_CHUNK_SIZE) -> 'SpoolStats':
+        """
+        Walk the structured field introducers of a file.
+
+        The lengths of each SF type are collected in lists, summed every chunk_size
+        bytes: the loop does a single append per structured field besides the
+        introducer unpacking.
+
+        A structured field (or introducer) ending past the end of the file is not
+        counted: the walk stops there and sets truncated_at.
+
+        Raises:
+            ValueError: If an AFP structure error is detected.
+        """
+        start_time = time.perf_counter()
+        file_len = Path(afp_path).stat().st_size
+        stats = cls(file_len)
+        if file_len == 0:
+            return stats
+
+        control_byte = CARRIAGE_CONTROL[0]
+        unpack_from = SFI_HEADER.unpack_from
+        extension_at = 1 + SFI_HEADER_LEN
+        lengths = defaultdict(list)
+        extension_bytes = stats.extension_bytes
+        media_pages = stats.media_pages
+        media_invocations = stats.media_invocations
+        media = None
+
+        with open(afp_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mmapped_file:
+            if hasattr(mmapped_file, "madvise"):
+                # Larger read-ahead: the file is read once from start to end
+                mmapped_file.madvise(mmap.MADV_SEQUENTIAL)
+
+            offset = 0
+            while offset < file_len and stats.truncated_at is None:
+                chunk_end = min(offset + chunk_size, file_len)
+                while offset < chunk_end:
+                    try:
+                        control, sf_len, sf_id, sf_flags = unpack_from(mmapped_file, offset)
+                    except struct.error:
+                        stats.truncated_at = offset
+                        break
+                    if control != control_byte:
+                        raise ValueError(f"AFP structure error at offset {offset}: The file is not a valid AFP file")
+                    if offset + sf_len >= file_len:
+                        stats.truncated_at = offset
+                        break
+
+                    lengths[sf_id].append(sf_len)
+                    extension_len = 0
+                    if sf_flags & SFI_FLAG_EXTENSION:
+                        extension_len = mmapped_file[offset + extension_at]
+                        extension_bytes[sf_id] += extension_len
+
+                    if sf_id == BPG_ID:
+                        media_pages[media] += 1
+                    elif sf_id == IMM_ID:
+                        name_offset = offset + extension_at + extension_len
+                        media = mmapped_file[name_offset:name_offset + IMM_NAME_LEN]
+                        media_invocations[media] += 1
+
+                    offset += sf_len + 1
+
+                stats._add_lengths(lengths)
+                lengths.clear()
+
+        stats.elapsed = time.perf_counter() - start_time
+        return stats
+
+    def _add_lengths(self, lengths: dict[bytes, list[int]]) -> None:
+        for sf_id, values in lengths.items():
+            self.sf_counts[sf_id] += len(values)
+            # The length does not count the carriage control byte
+            self.sf_bytes[sf_id] += sum(values) + len(values)
+
+    @property
+    def sf_count(self) -> int:
+        return sum(self.sf_counts.values())
+
+    @property
+    def nb_of_docs(self) -> int:
+        return self.sf_counts.get(BNG_ID, 0)
+
+    @property
+    def nb_of_pages(self) -> int:
+        return self.sf_counts.get(BPG_ID, 0)
+
+    @property
+    def image_bytes(self) -> int:
+        """Data bytes of the image SFs (see IMAGE_DATA_IDS), without introducers."""
+        return sum(
+            self.sf_bytes[sf_id] - self.sf_counts[sf_id] * (1 + SFI_HEADER_LEN) - self.extension_bytes.get(sf_id, 0)
+            for sf_id in IMAGE_DATA_IDS if sf_id in self.sf_counts
+        )
+
+    def report(self) -> dict:
+        """Return the statistics of the file as a dictionary."""
+        sf_types = sorted(self.sf_counts.items(), key=lambda item: self.sf_bytes[item[0]], reverse=True)
+        media = sorted(self.media_pages.items(), key=lambda item: item[1], reverse=True)
+
+        return {
+            "file_size": self.file_len,
+            "elapsed": round(self.elapsed, 4),
+            "mb_per_s": round(self.file_len / 1e6 / self.elapsed, 1) if self.elapsed else None,
+            "nb_of_docs": self.nb_of_docs,
+            "nb_of_pages": self.nb_of_pages,
+            "sf_count": self.sf_count,
+            "image_bytes": self.image_bytes,
+            "truncated_at": self.truncated_at,
+            "sf_types": [
+                {
+                    "sf_name": SF_CONFIGS[sf_id].short_name if sf_id in SF_CONFIGS else "UNKNOWN",
+                    "sf_id": sf_id.hex().upper(),
+                    "count": count,
+                    "bytes": self.sf_bytes[sf_id],
+                }
+                for sf_id, count in sf_types
+            ],
+            "medium_maps": [
+                {
+                    "bac_papier": DECODE_CACHE.decode(name) if name is not None else NO_MEDIUM_MAP,
+                    "pages": pages,
+                    "invocations": self.media_invocations.get(name, 0),
+                }
+                for name, pages in media
+            ],
+        }
+
+    def format_table(self, report: Optional[dict] = None) -> str:
+        """Format the counters and distributions of the report as text tables."""
+        report = report or self.report()
+
+        speed = f" ({report['mb_per_s']} MB/s)" if report["mb_per_s"] is not None else ""
+        lines = [
+            f"Stats : {report['file_size']} bytes in {report['elapsed']:.3f}s{speed}",
+            f"Documents : {report['nb_of_docs']}, pages : {report['nb_of_pages']}, "
+            f"SF : {report['sf_count']}, image bytes : {report['image_bytes']}",
+        ]
+        if report["truncated_at"] is not None:
+            lines.append(f"Truncated : the structured field at offset {report['truncated_at']} ends past the end "
+                         f"of the file, the statistics stop before it")
+        lines += [
+            "",
+            f"{'SF':<8}{'id':<8}{'count':>12}{'bytes':>16}",
+        ]
+        for sf_type in report["sf_types"]:
+            lines.append(f"{sf_type['sf_name']:<8}{sf_type['sf_id']:<8}{sf_type['count']:>12}{sf_type['bytes']:>16}")
+
+        if report["medium_maps"]:
+            lines.append("")
+            lines.append(f"{'medium map':<12}{'pages':>12}{'share':>8}{'IMM':>10}")
+            total = report["nb_of_pages"] or 1
+            for medium_map in report["medium_maps"]:
+                lines.append(
+                    f"{medium_map['bac_papier']:<12}{medium_map['pages']:>12}{medium_map['pages'] / total:>8.1%}"
+                    f"{medium_map['invocations']:>10}"
+                )
+
+        return "\n".join(lines)
+
+    def write_report(self, path: str) -> None:
+        """Write the report: JSON if the path ends with .json, text tables otherwise."""
+        report = self.report()
+        if Path(path).suffix.lower() == ".json":
+            Path(path).write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+        else:
+            Path(path).write_text(self.format_table(report), encoding="utf-8")
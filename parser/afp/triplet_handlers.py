@@ -4,10 +4,18 @@
 from abc import ABC, abstractmethod
 from typing import Any, Optional
 
+from parser.afp.ebcdic import DECODE_CACHE, DEFAULT_CCSID, decode_ebcdic
+
 
 class TripletComponentHandler(ABC):
     """Base class for triplet component handlers."""
 
+    discards_value: bool = False
+    """True if decode() always returns None (the component is skipped by compiled decoders)."""
+
+    uses_ccsid: bool = False
+    """True if decode() takes the CCSID of the character data (see compile_triplet_table())."""
+
     @abstractmethod
     def parse(self, f, component_length) -> Optional[Any]:
         """
@@ -22,6 +30,19 @@ class TripletComponentHandler(ABC):
         """
         pass
 
+    @abstractmethod
+    def decode(self, data) -> Optional[Any]:
+        """
+        Decode a triplet component from its data buffer.
+
+        Args:
+            data: Component bytes (bytes or memoryview slice of the file)
+
+        Returns:
+            Parsed value or None
+        """
+        pass
+
 
 class HexaHandler(TripletComponentHandler):
     """Handler for hexadecimal data."""
@@ -31,19 +52,31 @@ class HexaHandler(TripletComponentHandler):
             return f.read(component_length).hex().upper()
         return None
 
+    def decode(self, data) -> Optional[str]:
+        if len(data) > 0:
+            return data.hex().upper()
+        return None
+
 
 class BytesHandler(TripletComponentHandler):
     """Handler for raw bytes data."""
 
+    discards_value = True
+
     def parse(self, f, component_length) -> Optional[str]:
         if component_length > 0:
             # Convert to hex string for JSON serialization
             f.read(component_length).hex().upper()
         return None
 
+    def decode(self, data) -> Optional[str]:
+        return None
+
 
 class GidHandler(TripletComponentHandler):
-    """Handler for GID (Global Identifier) data."""
+    """Handler for GID (Global Identifier) data, names decoded through the cache."""
+
+    uses_ccsid = True
 
     def parse(self, f, component_length) -> Optional[str]:
         if component_length > 0:
@@ -51,26 +84,44 @@ class GidHandler(TripletComponentHandler):
             return data.decode('cp500', errors='replace').rstrip()
         return None
 
+    def decode(self, data, ccsid: int = DEFAULT_CCSID) -> Optional[str]:
+        if len(data) > 0:
+            return DECODE_CACHE.decode(data, ccsid)
+        return None
+
 
 class ReservedHandler(TripletComponentHandler):
     """Handler for reserved/unused data."""
 
+    discards_value = True
+
     def parse(self, f, component_length) -> Optional[None]:
         # Skip reserved bytes
         if component_length > 0:
             f.read(component_length)
         return None
 
+    def decode(self, data) -> Optional[None]:
+        return None
+
 
 class CharHandler(TripletComponentHandler):
     """Handler for character/text data."""
 
+    uses_ccsid = True
+
     def parse(self, f, component_length) -> Optional[str]:
         if component_length > 0:
             data = f.read(component_length)
             return data.decode('cp500', errors='replace').rstrip()
         return None
 
+    def decode(self, data, ccsid: int = DEFAULT_CCSID) -> Optional[str]:
+        # Values are mostly unique (account numbers, amounts...): not cached
+        if len(data) > 0:
+            return decode_ebcdic(data, ccsid)
+        return None
+
 
 # Registry
 TRIPLET_HANDLERS = {
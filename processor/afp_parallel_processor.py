@@ -0,0 +1,201 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, NamedTuple, Optional
+
+from logger import get_logger
+from parser.afp import SfStreamer
+from parser.afp.document_table import BNG_ID, BPG_ID, IMM_ID
+from parser.afp.sf_filter import SfFilter
+from processor.afp_stream_processor import AFPStreamProcessor
+from writer.writer import Writer
+
+
+class ChunkTask(NamedTuple):
+    """Byte range of the AFP file parsed by one worker, aligned on BNG boundaries."""
+
+    index: int
+    afp_path: str
+    sf_filter: SfFilter
+    start: int
+    end: int
+    doc_offset: int
+    page_offset: int
+    media_offset: Optional[int]
+    use_index: bool
+    writer_factory: Callable[[str], Writer]
+    fragment_path: str
+
+
+class ChunkResult(NamedTuple):
+    """Outcome of a worker, merged by the main process in chunk order."""
+
+    index: int
+    fragment_path: str
+    summary: dict
+    sf_scanned: int
+    sf_count: int
+    error_count: int
+
+
+def parse_chunk(task: ChunkTask) -> ChunkResult:
+    """
+    Parse one chunk of the AFP file into a writer fragment (runs in a worker process).
+
+    The medium map in force at the start of the chunk is restored by replaying the
+    last IMM preceding the chunk, so 'bac_papier' values match a sequential run.
+    """
+    streamer = SfStreamer(task.afp_path)
+    streamer.set_config(task.sf_filter)
+    streamer.set_range(task.start, task.end)
+    if task.use_index:
+        # Saved by the main process: loaded through mmap, never rebuilt per chunk
+        streamer.use_index(build=False)
+
+    logger = get_logger(__name__)
+
+    writer = task.writer_factory(task.fragment_path)
+    writer.set_fragment_state(task.doc_offset, task.page_offset)
+
+    sf_count = 0
+    error_count = 0
+
+    with writer:
+        if task.media_offset is not None:
+            writer.write(streamer.read_at(task.media_offset))
+
+        for sf in streamer.stream():
+            try:
+                sf_count += 1
+                writer.write(sf)
+            except Exception as e:
+                error_count += 1
+                logger.warning(f"Error processing SF #{sf_count} of chunk {task.index}: {e}")
+
+    return ChunkResult(task.index, task.fragment_path, writer.fragment_summary(), streamer.sf_scanned, sf_count,
+                       error_count)
+
+
+class ParallelAFPStreamProcessor(AFPStreamProcessor):
+    """
+    AFP stream processor splitting the file at document (BNG) boundaries and parsing
+    the chunks in a pool of worker processes.
+
+    A header-only pass first locates the BNG, BPG and IMM structured fields. Each
+    chunk then carries the number of documents and pages preceding it and the offset
+    of the IMM in force, so numbering and media are identical to a sequential run.
+    """
+
+    CHUNKS_PER_JOB = 4
+    MIN_CHUNK_SIZE = 8 * 1024 * 1024
+
+    def __init__(self, sf_streamer: SfStreamer, config_path: str = None, jobs: int = None,
+                 decode_all: bool = False) -> None:
+        super().__init__(sf_streamer, config_path, decode_all)
+        self.jobs = jobs or os.cpu_count() or 1
+        # Bytes of the chunks merged so far, see bytes_scanned()
+        self._scanned = 0
+
+    def bytes_scanned(self) -> int:
+        """Bytes of the input in the chunks merged so far (the workers do not report their progress)."""
+        return self._scanned
+
+    def plan_chunks(self, fragment_prefix: str) -> list[ChunkTask]:
+        """
+        Split the AFP file into byte ranges starting on BNG structured fields.
+
+        Only the structured fields the writer will receive (not filtered out) are
+        counted, so the offsets match what the sequential writer sees.
+
+        Args:
+            fragment_prefix: Prefix of the fragment output paths.
+
+        Returns:
+            list[ChunkTask]: Tasks in file order covering the whole file.
+        """
+        sf_filter = self.parser.sf_filter
+        afp_len = self.parser.afp_len
+        target_size = max(afp_len // (self.jobs * self.CHUNKS_PER_JOB), self.MIN_CHUNK_SIZE)
+
+        count_docs = sf_filter.should_parse("BNG")
+        count_pages = sf_filter.should_parse("BPG")
+        track_media = sf_filter.should_parse("IMM")
+
+        # (start, doc_offset, page_offset, media_offset) of each chunk
+        starts = [(0, 0, 0, None)]
+        doc_count = 0
+        page_count = 0
+        media_offset = None
+
+        if count_docs:
+            for offset, sf_id, _, _ in self.parser.iter_sf_headers():
+                if sf_id == BNG_ID:
+                    if offset - starts[-1][0] >= target_size:
+                        starts.append((offset, doc_count, page_count, media_offset))
+                    doc_count += 1
+                elif sf_id == BPG_ID and count_pages:
+                    page_count += 1
+                elif sf_id == IMM_ID and track_media:
+                    media_offset = offset
+
+        writer_factory = self.writer.fragment_factory()
+        use_index = self.parser.sf_index is not None
+        ends = [start for start, _, _, _ in starts[1:]] + [afp_len]
+
+        return [
+            ChunkTask(
+                index, str(self.parser.path), sf_filter, start, end,
+                doc_offset, page_offset, media, use_index, writer_factory,
+                f"{fragment_prefix}.part{index}",
+            )
+            for index, ((start, doc_offset, page_offset, media), end) in enumerate(zip(starts, ends))
+        ]
+
+    def run(self, cli_output_path):
+        """Process the AFP stream in parallel and merge the fragments in file order."""
+
+        if self.writer is None:
+            raise ValueError("Writer not set. Call set_writer() before run().")
+
+        start_time = time.perf_counter()
+        sf_scanned = 0
+        sf_count = 0
+        error_count = 0
+        tasks = []
+        failed = False
+        self._scanned = 0
+
+        self.logger.info(f"Processing AFP stream : {cli_output_path} ({self.jobs} jobs)")
+        self._start_metrics()
+
+        try:
+            tasks = self.plan_chunks(cli_output_path)
+            self.logger.info(
+                f"{len(tasks)} chunks planned in {time.perf_counter() - start_time:.3f}s"
+            )
+
+            with self.writer as writer, ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                for result in executor.map(parse_chunk, tasks):
+                    writer.merge_fragment(result.fragment_path, result.summary)
+                    os.remove(result.fragment_path)
+                    sf_scanned += result.sf_scanned
+                    sf_count += result.sf_count
+                    error_count += result.error_count
+                    self._scanned += tasks[result.index].end - tasks[result.index].start
+
+        except Exception as e:
+            failed = True
+            self.logger.error(f"Fatal error during processing: {e}")
+            raise
+        finally:
+            for task in tasks:
+                if os.path.exists(task.fragment_path):
+                    os.remove(task.fragment_path)
+
+            self.sf_scanned = sf_scanned
+            self.sf_count = sf_count
+            self.error_count = error_count
+
+            elapsed_time = time.perf_counter() - start_time
+            self._log_end(elapsed_time)
+            self._end_metrics(elapsed_time, failed)
@@ -0,0 +1,126 @@
+import queue
+import threading
+import time
+
+from parser.afp import SfStreamer
+from processor.afp_stream_processor import AFPStreamProcessor
+
+
+class PipelinedAFPStreamProcessor(AFPStreamProcessor):
+    """
+    AFP stream processor running the writer on a background thread.
+
+    The main thread streams the structured fields and hands them over in batches
+    through a bounded queue; the writer thread decodes, serializes and writes them.
+    A full queue blocks the parser (backpressure), an empty one blocks the writer:
+    the time blocked on each side tells whether the run is parser-bound or
+    writer-bound (CPU or disk).
+    """
+
+    BATCH_SIZE = 512
+    QUEUE_BATCHES = 8
+
+    def __init__(self, sf_streamer: SfStreamer, config_path: str = None, decode_all: bool = False) -> None:
+        super().__init__(sf_streamer, config_path, decode_all)
+
+        # Filled by run()
+        self.parser_blocked = 0.0
+        self.writer_blocked = 0.0
+        self._writer_error = None
+
+    def run(self, cli_output_path):
+        """Process the AFP stream, writing on a background thread."""
+
+        if self.writer is None:
+            raise ValueError("Writer not set. Call set_writer() before run().")
+
+        start_time = time.perf_counter()
+        self.sf_scanned = 0
+        self.sf_count = 0
+        self.error_count = 0
+        self.parser_blocked = 0.0
+        self.writer_blocked = 0.0
+        self._writer_error = None
+        failed = False
+
+        self.logger.info(f"Processing AFP stream : {cli_output_path} (pipelined)")
+        self._start_metrics()
+
+        batches = queue.Queue(maxsize=self.QUEUE_BATCHES)
+        writer_thread = threading.Thread(target=self._write_batches, args=(batches,), name="afp-writer")
+        writer_thread.start()
+
+        try:
+            batch = []
+            for sf in self.parser.stream():
+                # Copied out of the file before the writer thread sees it: the streamer
+                # detaches the record again when it moves on, a no-op once detached
+                sf.detach()
+                batch.append(sf)
+                if len(batch) >= self.BATCH_SIZE:
+                    self._put(batches, batch)
+                    batch = []
+                    if self._writer_error is not None:
+                        break
+
+            if batch and self._writer_error is None:
+                self._put(batches, batch)
+
+        except Exception as e:
+            failed = True
+            self.logger.error(f"Fatal error during processing: {e}")
+            raise
+        finally:
+            # End of stream: the writer thread completes the output and exits
+            self._put(batches, None)
+            writer_thread.join()
+            self.sf_scanned = self.parser.sf_scanned
+
+            elapsed_time = time.perf_counter() - start_time
+            self._log_end(elapsed_time)
+            self.logger.info(
+                f"Pipeline : parser blocked {self.parser_blocked:.3f}s on a full queue, "
+                f"writer blocked {self.writer_blocked:.3f}s on an empty queue "
+                f"({'writer' if self.parser_blocked > self.writer_blocked else 'parser'}-bound)"
+            )
+            self._end_metrics(elapsed_time, failed or self._writer_error is not None)
+
+        if self._writer_error is not None:
+            self.logger.error(f"Fatal error during processing: {self._writer_error}")
+            raise self._writer_error
+
+    def _put(self, batches: queue.Queue, batch) -> None:
+        start = time.perf_counter()
+        batches.put(batch)
+        self.parser_blocked += time.perf_counter() - start
+
+    def _write_batches(self, batches: queue.Queue) -> None:
+        """Writer thread: write the batches until the end-of-stream marker (None)."""
+        done = False
+
+        try:
+            with self.writer as writer:
+                while True:
+                    start = time.perf_counter()
+                    batch = batches.get()
+                    self.writer_blocked += time.perf_counter() - start
+
+                    if batch is None:
+                        done = True
+                        break
+
+                    for sf in batch:
+                        try:
+                            self.sf_count += 1
+                            writer.write(sf)
+                        except Exception as e:
+                            self.error_count += 1
+                            self.logger.warning(f"Error processing SF #{self.sf_count}: {e}")
+
+        except BaseException as e:
+            # Reported by run(), the parser stops at its next batch
+            self._writer_error = e
+
+        # Keep consuming so the parser never blocks on a full queue
+        while not done:
+            done = batches.get() is None
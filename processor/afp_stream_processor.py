@@ -1,22 +1,98 @@
+from __future__ import annotations
+
 import time
+from typing import TYPE_CHECKING
 
 from parser.afp import SfStreamer
 from parser.afp.sf_filter import SfFilter
 from processor.file_processor import Processor
+from writer.writer import Writer
+
+if TYPE_CHECKING:
+    # Injected by the caller when the option is given: not loaded otherwise
+    from metrics import ParserMetrics
+    from processor.profiler import RunProfiler
 
 class AFPStreamProcessor(Processor):
 
-    def __init__(self, sf_streamer: SfStreamer, config_path: str = None) -> None:
+    def __init__(self, sf_streamer: SfStreamer, config_path: str = None, decode_all: bool = False) -> None:
+        """
+        Args:
+            sf_streamer: Streamer of the AFP file
+            config_path: Optional JSON configuration selecting the SFs to parse
+            decode_all: Decode every SF passing the configuration, even those the writer ignores
+        """
         super().__init__(sf_streamer)
+        self.decode_all = decode_all
+
+        # Filter from the configuration, narrowed to the writer's SFs in set_writer()
+        self._config_filter = sf_streamer.sf_filter
+
+        # Filled by run(): SFs walked by the streamer, SFs decoded and handed to the writer
+        self.sf_scanned = 0
+        self.sf_count = 0
+        self.error_count = 0
+
+        # Optional instrumented run, see set_profiler()
+        self.profiler: RunProfiler | None = None
+        # Optional metrics fed at the start and end of each run, see set_metrics()
+        self.metrics: ParserMetrics | None = None
 
         if config_path:
             try:
                 sf_filter = SfFilter(config_path)
                 self.parser.set_config(sf_filter)
+                self._config_filter = sf_filter
                 self.logger.info(f"SF filter loaded : {sf_filter.get_filter_info()}")
             except (ValueError, FileNotFoundError) as e:
                 self.logger.error(f"Error in charging the filter : {e}")
 
+        sf_index = self.parser.sf_index
+        if sf_index is not None:
+            self.logger.info(
+                f"SF index {'loaded' if sf_index.loaded else 'built'} : {len(sf_index)} structured fields"
+            )
+
+    def set_writer(self, writer: Writer) -> None:
+        """Inject the writer and only decode the structured fields it consumes."""
+        super().set_writer(writer)
+
+        if self.decode_all:
+            return
+
+        consumed = writer.consumed_sf_names()
+        if consumed is not None:
+            sf_filter = self._config_filter.restrict(consumed)
+            self.parser.set_config(sf_filter)
+            self.logger.info(f"SF decoded for {writer.__class__.__name__} : {sf_filter.get_filter_info()}")
+
+    def set_profiler(self, profiler: RunProfiler) -> None:
+        """Profile the next run: time per SF type and per stage (see processor.profiler)."""
+        self.profiler = profiler
+
+    def set_metrics(self, metrics: ParserMetrics) -> None:
+        """Report the runs to the metrics; the per-SF loop is unchanged (see metrics.parser_metrics)."""
+        self.metrics = metrics
+
+    def bytes_scanned(self) -> int:
+        """Bytes of the input scanned so far by the streamer."""
+        return self.parser.afp_offset
+
+    def _start_metrics(self) -> None:
+        if self.metrics is not None:
+            self.metrics.start_run(self)
+
+    def _end_metrics(self, elapsed_time: float, failed: bool) -> None:
+        if self.metrics is not None:
+            self.metrics.end_run(self, elapsed_time, failed)
+
+    def _log_end(self, elapsed_time: float) -> None:
+        """Log the SFs scanned (all those of the file, as before the writer filter) and decoded."""
+        self.logger.info(
+            f"Traitement terminé : {self.sf_scanned} SF en {elapsed_time:.3f}s "
+            f"({self.sf_scanned / elapsed_time:.0f} SF/s) - {self.sf_count} SF décodés - {self.error_count} erreurs"
+        )
+
     def run(self, cli_output_path):
         """Process the AFP stream and build the document structure."""
 
@@ -26,26 +102,44 @@ class AFPStreamProcessor(Processor):
         start_time = time.perf_counter()
         sf_count = 0
         error_count = 0
+        profiler = self.profiler
+        failed = False
 
         self.logger.info(f"Processing AFP stream : {cli_output_path}")
+        self._start_metrics()
 
         try:
             with self.writer as writer:
-                for sf in self.parser.stream():
-                    try:
-                        sf_count += 1
-                        writer.write(sf)
-                    except Exception as e:
-                        error_count += 1
-                        self.logger.warning(f"Error processing SF #{sf_count}: {e}")
-                        # Continue processing or raise based on config
+                if self.parser.following:
+                    # Completed documents are written out while waiting for the file to grow
+                    self.parser.on_wait = writer.flush
+
+                if profiler is not None:
+                    profiler.start(writer)
+                    sf_count, error_count = profiler.consume(self.parser.stream(), writer, self.logger)
+                    finish_start = time.perf_counter()
+                else:
+                    for sf in self.parser.stream():
+                        try:
+                            sf_count += 1
+                            writer.write(sf)
+                        except Exception as e:
+                            error_count += 1
+                            self.logger.warning(f"Error processing SF #{sf_count}: {e}")
+                            # Continue processing or raise based on config
+
+            if profiler is not None:
+                profiler.stop(time.perf_counter() - finish_start)
 
         except Exception as e:
+            failed = True
             self.logger.error(f"Fatal error during processing: {e}")
             raise
         finally:
+            self.sf_scanned = self.parser.sf_scanned
+            self.sf_count = sf_count
+            self.error_count = error_count
+
             elapsed_time = time.perf_counter() - start_time
-            self.logger.info(
-                f"Traitement terminé : {sf_count} SF en {elapsed_time:.3f}s "
-                f"({sf_count / elapsed_time:.0f} SF/s) - {error_count} erreurs"
-            )
\ No newline at end of file
+            self._log_end(elapsed_time)
+            self._end_metrics(elapsed_time, failed)
\ No newline at end of file
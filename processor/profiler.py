@@ -0,0 +1,295 @@
+"""
+Module for the opt-in profiling of a processing run.
+
+The profiler replaces the processing loop of AFPStreamProcessor with an instrumented
+one: two clock reads per stage and per structured field, no per-call tracing. It reports
+the count, bytes and cumulative decode time per SF type, and the time split across
+stages, with the hit rate of the name decode cache. A cProfile or tracemalloc capture
+of the whole run can be added for deeper investigation.
+"""
+
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Optional
+
+import orjson
+
+from parser.afp.ebcdic import DECODE_CACHE
+from parser.afp.sf_config import SF_CONFIGS
+
+CAPTURES = {"cprofile", "tracemalloc"}
+
+TOP_ENTRIES = 25
+"""Functions (cProfile) or lines (tracemalloc) kept in the report."""
+
+STAGES = {
+    "header": "Header decode: SFI unpacking and skipping of filtered-out SFs (streamer)",
+    "payload": "Payload decode of the SF data",
+    "writer": "Writer handling: document structure and serialization",
+    "io": "Output I/O: writes to the output file",
+    "finish": "Writer completion: last document, trailer, flush (without I/O)",
+}
+
+
+class SfTypeProfile:
+    """Counters of one structured field type."""
+
+    __slots__ = ('count', 'bytes', 'decode_time')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.bytes = 0
+        self.decode_time = 0.0
+
+
+class TimedOutput:
+    """File object proxy adding the time spent in write/flush/close to a profiler."""
+
+    __slots__ = ('_file', '_profiler')
+
+    def __init__(self, file, profiler: 'RunProfiler') -> None:
+        self._file = file
+        self._profiler = profiler
+
+    def write(self, data) -> int:
+        start = time.perf_counter()
+        written = self._file.write(data)
+        self._profiler.io_time += time.perf_counter() - start
+        return written
+
+    def flush(self) -> None:
+        start = time.perf_counter()
+        self._file.flush()
+        self._profiler.io_time += time.perf_counter() - start
+
+    def close(self) -> None:
+        start = time.perf_counter()
+        self._file.close()
+        self._profiler.io_time += time.perf_counter() - start
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+class RunProfiler:
+    """
+    Profiler of a processing run (see AFPStreamProcessor.set_profiler()).
+
+    Only the structured fields yielded by the streamer are counted per type: the
+    filtered-out ones are skipped without being read, their time is in the header stage.
+    """
+
+    def __init__(self, capture: Optional[str] = None) -> None:
+        """
+        Args:
+            capture: None, 'cprofile' or 'tracemalloc' for a capture of the whole run.
+        """
+        if capture is not None and capture not in CAPTURES:
+            raise ValueError(f"Unknown profiling capture '{capture}' ({', '.join(sorted(CAPTURES))})")
+
+        self.capture = capture
+        self.sf_types: dict[bytes, SfTypeProfile] = {}
+        self.sf_count = 0
+        self.error_count = 0
+
+        self.header_time = 0.0
+        self.payload_time = 0.0
+        self.writer_time = 0.0
+        self.io_time = 0.0
+        self.finish_time = 0.0
+        self.elapsed = 0.0
+        self.cache_lookups = 0
+        self.cache_misses = 0
+
+        self._io_in_loop = 0.0
+        self._start = 0.0
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._peak_memory = 0
+
+    def start(self, writer) -> None:
+        """Start the run: time the output I/O of the (entered) writer and start the capture."""
+        writer.wrap_output(lambda file: TimedOutput(file, self))
+
+        if self.capture == "cprofile":
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        elif self.capture == "tracemalloc":
+            tracemalloc.start()
+
+        DECODE_CACHE.track()
+        self.cache_lookups = DECODE_CACHE.lookups
+        self.cache_misses = DECODE_CACHE.misses
+        self._start = time.perf_counter()
+
+    def consume(self, records, writer, logger) -> tuple[int, int]:
+        """
+        Write the records, timing each stage.
+
+        Returns:
+            tuple: (SF count, error count)
+        """
+        perf_counter = time.perf_counter
+        sf_types = self.sf_types
+        iterator = iter(records)
+
+        while True:
+            start = perf_counter()
+            sf = next(iterator, None)
+            decoded = perf_counter()
+            self.header_time += decoded - start
+            if sf is None:
+                break
+
+            self.sf_count += 1
+            try:
+                sf.decode()
+                written = perf_counter()
+                writer.write(sf)
+                end = perf_counter()
+            except Exception as e:
+                self.error_count += 1
+                logger.warning(f"Error processing SF #{self.sf_count}: {e}")
+                continue
+
+            profile = sf_types.get(sf.sf_id)
+            if profile is None:
+                profile = sf_types[sf.sf_id] = SfTypeProfile()
+            profile.count += 1
+            profile.bytes += sf.sf_len + 1
+            profile.decode_time += written - decoded
+
+            self.payload_time += written - decoded
+            self.writer_time += end - written
+
+        self._io_in_loop = self.io_time
+        return self.sf_count, self.error_count
+
+    def stop(self, finish_time: float) -> None:
+        """
+        End the run and stop the capture.
+
+        Args:
+            finish_time: Time spent completing the writer (its __exit__).
+        """
+        self.elapsed = time.perf_counter() - self._start
+        self.finish_time = finish_time
+
+        DECODE_CACHE.track(False)
+        self.cache_lookups = DECODE_CACHE.lookups - self.cache_lookups
+        self.cache_misses = DECODE_CACHE.misses - self.cache_misses
+
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        elif self.capture == "tracemalloc" and tracemalloc.is_tracing():
+            self._snapshot = tracemalloc.take_snapshot()
+            self._peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    def stages(self) -> dict[str, float]:
+        """Return the time of each stage (see STAGES), the I/O being taken out of its caller."""
+        return {
+            "header": self.header_time,
+            "payload": self.payload_time,
+            "writer": self.writer_time - self._io_in_loop,
+            "io": self.io_time,
+            "finish": self.finish_time - (self.io_time - self._io_in_loop),
+        }
+
+    def report(self) -> dict:
+        """Return the profile of the run as a dictionary."""
+        stages = self.stages()
+        total = sum(stages.values()) or 1.0
+
+        sf_types = sorted(self.sf_types.items(), key=lambda item: item[1].decode_time, reverse=True)
+        report = {
+            "sf_count": self.sf_count,
+            "error_count": self.error_count,
+            "elapsed": round(self.elapsed, 4),
+            "stages": {
+                name: {"time": round(value, 4), "share": round(value / total, 4), "description": STAGES[name]}
+                for name, value in stages.items()
+            },
+            "sf_types": [
+                {
+                    "sf_name": SF_CONFIGS[sf_id].short_name if sf_id in SF_CONFIGS else "UNKNOWN",
+                    "sf_id": sf_id.hex().upper(),
+                    "count": profile.count,
+                    "bytes": profile.bytes,
+                    "decode_time": round(profile.decode_time, 4),
+                    "decode_us": round(profile.decode_time / profile.count * 1e6, 2),
+                }
+                for sf_id, profile in sf_types
+            ],
+            "decode_cache": {
+                "lookups": self.cache_lookups,
+                "misses": self.cache_misses,
+                "hit_rate": round(1 - self.cache_misses / self.cache_lookups, 4) if self.cache_lookups else 0.0,
+                "entries": DECODE_CACHE.stats()["entries"],
+            },
+        }
+
+        if self._cprofile is not None:
+            report["cprofile"] = self._cprofile_top()
+        if self._snapshot is not None:
+            report["tracemalloc"] = {
+                "peak_bytes": self._peak_memory,
+                "top_lines": [
+                    {"line": str(stat.traceback), "size": stat.size, "count": stat.count}
+                    for stat in self._snapshot.statistics("lineno")[:TOP_ENTRIES]
+                ],
+            }
+
+        return report
+
+    def format_table(self, report: Optional[dict] = None) -> str:
+        """Format the stages and SF types of the report as text tables."""
+        report = report or self.report()
+
+        lines = [f"Profile : {report['sf_count']} SF in {report['elapsed']:.3f}s - {report['error_count']} errors", ""]
+        lines.append(f"{'stage':<10}{'time (s)':>10}{'share':>8}  description")
+        for name, stage in report["stages"].items():
+            lines.append(f"{name:<10}{stage['time']:>10.3f}{stage['share']:>8.1%}  {stage['description']}")
+
+        lines.append("")
+        lines.append(f"{'SF':<8}{'id':<8}{'count':>10}{'bytes':>14}{'decode (s)':>12}{'us/SF':>8}")
+        for sf_type in report["sf_types"]:
+            lines.append(
+                f"{sf_type['sf_name']:<8}{sf_type['sf_id']:<8}{sf_type['count']:>10}{sf_type['bytes']:>14}"
+                f"{sf_type['decode_time']:>12.4f}{sf_type['decode_us']:>8.2f}"
+            )
+
+        cache = report["decode_cache"]
+        lines.append("")
+        lines.append(
+            f"Name decode cache : {cache['lookups']} lookups, {cache['hit_rate']:.1%} hits, "
+            f"{cache['entries']} strings cached"
+        )
+
+        if "cprofile" in report:
+            lines.append("")
+            lines.append(report["cprofile"])
+        if "tracemalloc" in report:
+            lines.append("")
+            lines.append(f"tracemalloc peak : {report['tracemalloc']['peak_bytes']} bytes")
+            for line in report["tracemalloc"]["top_lines"]:
+                lines.append(f"{line['size']:>12} B {line['count']:>8}  {line['line']}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path: str) -> None:
+        """Write the report: JSON if the path ends with .json, text tables otherwise."""
+        report = self.report()
+        if Path(path).suffix.lower() == ".json":
+            Path(path).write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+        else:
+            Path(path).write_text(self.format_table(report), encoding="utf-8")
+
+    def _cprofile_top(self) -> str:
+        output = io.StringIO()
+        pstats.Stats(self._cprofile, stream=output).sort_stats("cumulative").print_stats(TOP_ENTRIES)
+        return output.getvalue()
@@ -0,0 +1,47 @@
+"""
+TLE names and values decode the same through the fast path (decode_tle) and sf_data,
+in the code page of the CCSID triplet (0x01) wherever it is.
+
+Usage:
+    python -m unittest discover -s tests
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from parser.afp.sf_handlers import SF_DECODERS, TLE_ID, decode_tle  # noqa: E402
+
+
+def triplet(t_id: int, content: bytes) -> bytes:
+    return bytes([len(content) + 2, t_id]) + content
+
+
+# Brackets and '!' are encoded differently in code pages 37 and 500
+FQN = triplet(0x02, b'\x0B\x00' + 'A[B]!'.encode('cp037'))
+ATTR_VAL = triplet(0x36, b'\x00\x00' + 'x[1]!'.encode('cp037'))
+CCSID_37 = triplet(0x01, b'\x00\x00\x00\x25')
+
+
+class TleCcsidTest(unittest.TestCase):
+
+    def assert_decoded(self, data: bytes, name: str, value: str) -> None:
+        self.assertEqual(decode_tle(data), (name, value))
+        triplets = SF_DECODERS[TLE_ID].decode(data)['TRIPLETS']
+        self.assertIn({'FQN': {'fqn_name': name}}, triplets)
+        self.assertIn({'AttrVal': {'att_val': value}}, triplets)
+
+    def test_ccsid_first(self) -> None:
+        self.assert_decoded(CCSID_37 + FQN + ATTR_VAL, 'A[B]!', 'x[1]!')
+
+    def test_ccsid_last(self) -> None:
+        self.assert_decoded(FQN + ATTR_VAL + CCSID_37, 'A[B]!', 'x[1]!')
+
+    def test_no_ccsid(self) -> None:
+        self.assert_decoded(FQN + ATTR_VAL, 'A¬B|]', 'x¬1|]')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""
+The pipelined processor (--pipeline) writes the same output as the sequential one.
+
+Usage:
+    python -m unittest discover -s tests
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.afp_generator import GeneratorConfig, generate  # noqa: E402
+from parser.afp import SfStreamer  # noqa: E402
+from processor.afp_pipelined_processor import PipelinedAFPStreamProcessor  # noqa: E402
+from processor.afp_stream_processor import AFPStreamProcessor  # noqa: E402
+from writer.writer_factory import create_writer  # noqa: E402
+
+PIPELINE_FILE = GeneratorConfig(documents=300, pages=3, document_tles=4, page_tles=3)
+"""Generated file of several batches of structured fields (PipelinedAFPStreamProcessor.BATCH_SIZE)."""
+
+
+class PipelineOutputTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        logging.disable(logging.INFO)
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.afp_path = os.path.join(cls.tmp_dir.name, "spool.afp")
+        generate(cls.afp_path, PIPELINE_FILE)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp_dir.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def run_processor(self, processor_class, output_format: str, name: str) -> bytes:
+        output_path = os.path.join(self.tmp_dir.name, f"{name}.{output_format}")
+        processor = processor_class(SfStreamer(self.afp_path))
+        processor.set_writer(create_writer(output_format, Path(self.afp_path).name, output_path))
+        processor.run(output_path)
+        self.assertEqual(processor.error_count, 0)
+        return Path(output_path).read_bytes()
+
+    def test_json_matches_sequential(self) -> None:
+        sequential = self.run_processor(AFPStreamProcessor, "json", "sequential")
+        pipelined = self.run_processor(PipelinedAFPStreamProcessor, "json", "pipelined")
+        self.assertEqual(pipelined, sequential)
+
+    def test_ndjson_matches_sequential(self) -> None:
+        sequential = self.run_processor(AFPStreamProcessor, "ndjson", "sequential")
+        pipelined = self.run_processor(PipelinedAFPStreamProcessor, "ndjson", "pipelined")
+        self.assertEqual(pipelined, sequential)
+
+
+if __name__ == "__main__":
+    unittest.main()
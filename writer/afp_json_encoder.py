@@ -0,0 +1,160 @@
+from typing import Callable, Optional
+
+import orjson
+
+from domain.afp_builder import AfpBuilder
+
+
+class AfpJsonEncoder(AfpBuilder):
+    """
+    Encodes the AFP document structure straight to JSON bytes as structured fields arrive.
+
+    No document, page or TLE object is built: the JSON of the current page and document
+    is appended to reusable byte buffers, and each document is handed over as bytes when
+    it is complete (next BNG or finish()). The bytes are identical to orjson.dumps() of
+    the DocumentData built by AfpBuilder.
+
+    The AFP-level NOPs and counters are kept in self.afp, as in AfpBuilder.
+    """
+
+    # Current object receiving TLE and NOP
+    AFP_LEVEL = 0
+    DOCUMENT_LEVEL = 1
+    PAGE_LEVEL = 2
+
+    def __init__(
+        self,
+        afp_file_name: Optional[str] = None,
+        doc_offset: int = 0,
+        page_offset: int = 0,
+        on_document: Optional[Callable[[bytearray], None]] = None,
+    ) -> None:
+        """
+        Initialize the encoder.
+
+        Args:
+            afp_file_name: Name of the AFP file
+            doc_offset: Number of documents preceding the first BNG handled
+            page_offset: Number of pages preceding the first BPG handled
+            on_document: Called with the JSON of each completed document. The buffer is
+                reused for the next document: it must be copied, not kept.
+        """
+        super().__init__(afp_file_name, doc_offset, page_offset)
+        self._on_document = on_document
+
+        self._level = self.AFP_LEVEL
+        self._media = b'"NA"'
+
+        # JSON prefix '{"name":<name>,"value":' of each TLE name met
+        self._tle_prefixes: dict[str, bytes] = {}
+
+        self._doc_number: Optional[int] = None
+        self._doc = bytearray()
+        self._pages = bytearray()
+        self._doc_tle = bytearray()
+        self._doc_nop = bytearray()
+
+        self._page_head = b''
+        self._page_tle = bytearray()
+        self._page_nop = bytearray()
+
+    def begin_document(self) -> None:
+        """Handle BNG (Begin Named Group) - start of document."""
+        self.finish()
+
+        self.doc_count += 1
+        self._doc_number = self.doc_count
+        self._level = self.DOCUMENT_LEVEL
+
+    def begin_page(self) -> None:
+        """Handle BPG (Begin Page) - start of page."""
+        self.page_count += 1
+
+        if self._doc_number is None:
+            raise ValueError("BPG outside of a document (no preceding BNG)")
+
+        self._close_page()
+        self._page_head = b'{"page_number":"%d","bac_papier":%b,"tle":[' % (self.page_count, self._media)
+        self._level = self.PAGE_LEVEL
+
+    def invoke_medium_map(self, record) -> None:
+        """Handle IMM (Invoke Medium Map) - paper tray info."""
+        super().invoke_medium_map(record)
+        self._media = orjson.dumps(self.cur_media)
+
+    def add_tle(self, name: str, value: str) -> None:
+        """Append a TLE to the JSON of the current object."""
+        if self._level == self.PAGE_LEVEL:
+            buffer = self._page_tle
+        elif self._level == self.DOCUMENT_LEVEL:
+            buffer = self._doc_tle
+        else:
+            super().add_tle(name, value)
+            return
+
+        prefix = self._tle_prefixes.get(name)
+        if prefix is None:
+            # Escaped once per distinct name
+            prefix = self._tle_prefixes[name] = b'{"name":' + orjson.dumps(name) + b',"value":'
+
+        if buffer:
+            buffer += b','
+        buffer += prefix
+        buffer += orjson.dumps(value)
+        buffer += b'}'
+
+    def add_nop(self, value: str) -> None:
+        """Append a NOP to the JSON of the current object."""
+        if self._level == self.PAGE_LEVEL:
+            buffer = self._page_nop
+        elif self._level == self.DOCUMENT_LEVEL:
+            buffer = self._doc_nop
+        else:
+            super().add_nop(value)
+            return
+
+        if buffer:
+            buffer += b','
+        buffer += orjson.dumps(value)
+
+    def finish(self) -> None:
+        """Complete the current document and hand it over."""
+        if self._doc_number is None:
+            return
+
+        self._close_page()
+
+        doc = self._doc
+        doc.clear()
+        doc += b'{"doc_number":"%d","pages":[' % self._doc_number
+        doc += self._pages
+        doc += b'],"tle":['
+        doc += self._doc_tle
+        doc += b'],"nop":['
+        doc += self._doc_nop
+        doc += b']}'
+
+        self._pages.clear()
+        self._doc_tle.clear()
+        self._doc_nop.clear()
+        self._doc_number = None
+
+        if self._on_document:
+            self._on_document(doc)
+
+    def _close_page(self) -> None:
+        if self._level != self.PAGE_LEVEL:
+            return
+
+        pages = self._pages
+        if pages:
+            pages += b','
+        pages += self._page_head
+        pages += self._page_tle
+        pages += b'],"nop":['
+        pages += self._page_nop
+        pages += b']}'
+
+        self._page_tle.clear()
+        self._page_nop.clear()
+        self._level = self.DOCUMENT_LEVEL
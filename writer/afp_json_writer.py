@@ -1,129 +1,188 @@
+import shutil
+from functools import partial
+from typing import Optional
+
 import orjson
-from domain.afp import Afp, Document, Page, Tle
+from domain.afp_compact import CompactDocument
+from domain.afp_builder import AfpBuilder
 
+from writer.afp_json_encoder import AfpJsonEncoder
+from writer.compressed_output import DEFAULT_BLOCK_SIZE, open_output
 from writer.writer import Writer
 
+ENCODERS = {"stream", "objects"}
+
 
 class AFPJsonWriter(Writer):
-    """Efficient streaming JSON writer for AFP documents."""
+    """
+    Efficient streaming JSON writer for AFP documents.
+
+    Encoders:
+        stream: documents are encoded straight to bytes as structured fields arrive
+            (AfpJsonEncoder) and written to the file in blocks of block_size bytes.
+        objects: documents are built as compact objects (AfpBuilder, see
+            domain.afp_compact) and serialized with orjson every buffer_size documents.
+
+    With a compression ('gz' or 'xz'), the output is compressed in independent blocks
+    of compression_block_size bytes by a pool of threads (see writer.compressed_output).
+    """
+
+    def __init__(self, afp_file_name, output_path: str, buffer_size: int = 100,
+                 encoder: str = "stream", block_size: int = 256 * 1024,
+                 compression: Optional[str] = None, compression_level: Optional[int] = None,
+                 compression_block_size: int = DEFAULT_BLOCK_SIZE, compression_threads: Optional[int] = None):
+        super().__init__(
+            output_path, buffer_size=buffer_size, encoder=encoder, block_size=block_size,
+            compression=compression, compression_level=compression_level,
+            compression_block_size=compression_block_size, compression_threads=compression_threads,
+        )
+        if encoder not in ENCODERS:
+            raise ValueError(f"Unknown JSON encoder '{encoder}' ({', '.join(sorted(ENCODERS))})")
 
-    def __init__(self, afp_file_name, output_path: str, buffer_size: int = 100):
-        super().__init__(output_path, buffer_size=buffer_size)
         self._buffer_size = buffer_size
         self._buffer = []
         self._file = None
         self._is_first = True
+        # Set by __exit__: the last document is complete and written by the final flush
+        self._closing = False
 
         self._afp_file_name = afp_file_name
 
         # State tracking
-        self._afp = None
-        self._curr_doc = None
-        self._doc_count = 0
-        self._curr_page = None
-        self._page_count = 0
-        self._curr_obj = None
-        self._cur_media = "NA"
+        self._streaming = encoder == "stream"
+        if self._streaming:
+            self._block_size = block_size
+            self._block = bytearray()
+            self._builder = AfpJsonEncoder(afp_file_name, on_document=self._write_document)
+        else:
+            self._builder = AfpBuilder(afp_file_name, on_begin_document=self._buffer_document)
+
+        # Fragment mode (parallel processing): numbering starts after the preceding chunks
+        self._fragment = False
+        self._doc_offset = 0
+        self._page_offset = 0
 
     def __enter__(self):
-        self._file = open(self.output_path, 'wb')
-        self._file.write(b'{\n  "documents": [\n')
-
-        self._afp = Afp(name=self._afp_file_name)
-        self._curr_obj = self._afp
+        self._file = open_output(
+            self.output_path,
+            self.options['compression'],
+            self.options['compression_level'],
+            self.options['compression_block_size'],
+            self.options['compression_threads'],
+        )
+        if not self._fragment:
+            self._file.write(b'{\n  "documents": [\n')
 
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._streaming:
+            self._builder.finish()
+        self._closing = True
         self.flush()
 
+        if self._fragment:
+            self._file.close()
+            return
+
         self._file.write(b'\n  ],\n  "afp": ')
-        self._afp.set_nb_of_docs(self._doc_count)
-        self._afp.set_nb_of_pages(self._page_count)
-        self._file.write(orjson.dumps(self._afp.model_dump()))
+        self._file.write(orjson.dumps(self._builder.finalize()))
 
         self._file.write(b'\n}')
         self._file.close()
 
-    def write(self, data: dict) -> None:
-        """Process and write AFP structured field data."""
-        sf_name = data.get('sf_name')
-
-        if sf_name == 'BNG':
-            self._handle_begin_document()
-        elif sf_name == 'BPG':
-            self._handle_begin_page()
-        elif sf_name == 'TLE':
-            self._handle_tag_logical_element(data)
-        elif sf_name == 'NOP':
-            self._handle_no_operation(data)
-        elif sf_name == 'IMM':
-            self._handle_invoke_medium_map(data)
-
-    def _handle_begin_document(self):
-        """Handle BNG (Begin Named Group) - start of document."""
-        self._doc_count += 1
-
-        if self._doc_count % self._buffer_size == 0:
-            self.flush()
-
-        self._curr_doc = Document(doc_number=f"{self._doc_count}")
-        self._curr_obj = self._curr_doc
-        self._buffer.append(self._curr_doc)
-
-    def _handle_begin_page(self):
-        """Handle BPG (Begin Page) - start of page."""
-        self._page_count += 1
-        self._curr_page = Page(
-            page_number=f"{self._page_count}",
-            bac_papier=self._cur_media
-        )
-        self._curr_doc.add_page(self._curr_page)
-        self._curr_obj = self._curr_page
-
-    def _handle_tag_logical_element(self, data: dict):
-        """Handle TLE (Tag Logical Element) - metadata."""
-        tle_data = data.get('sf_data', {}).get('TRIPLETS', [])
+    def write(self, data) -> None:
+        """Process and write AFP structured field data (SfRecord)."""
+        self._builder.handle(data)
 
-        tle_name = next(
-            (item['FQN'].get('fqn_name', '')
-             for item in tle_data if 'FQN' in item),
-            None
-        )
+    def consumed_sf_names(self) -> frozenset[str]:
+        """Only the SFs building the document structure are written."""
+        return AfpBuilder.SF_NAMES
 
-        tle_value = next(
-            (item['AttrVal'].get('att_val', '')
-             for item in tle_data if 'AttrVal' in item),
-            ''
-        )
+    def _buffer_document(self, document: CompactDocument) -> None:
+        """Buffer a new document, flushing the previous ones every buffer_size documents."""
+        if self._builder.doc_count % self._buffer_size == 0:
+            self.flush()
 
-        if tle_name:
-            self._curr_obj.add_tle(Tle(name=tle_name, value=tle_value))
+        self._buffer.append(document)
 
-    def _handle_no_operation(self, data: dict):
-        """Handle NOP (No Operation) - comment/annotation."""
-        nop_value = data.get('sf_data', {}).get('UndfData')
-        if nop_value:
-            self._curr_obj.add_nop(nop_value)
+    def _write_document(self, document: bytearray) -> None:
+        """Append an encoded document to the output block, writing the block when full."""
+        self._block += b'    ' if self._is_first else b',\n    '
+        self._block += document
+        self._is_first = False
 
-    def _handle_invoke_medium_map(self, data: dict):
-        """Handle IMM (Invoke Medium Map) - paper tray info."""
-        self._cur_media = data.get('sf_data', {}).get('MMPName', 'NA')
+        if len(self._block) >= self._block_size:
+            self._file.write(self._block)
+            self._block.clear()
 
     def flush(self) -> None:
-        """Write buffered documents to file."""
-        if not self._buffer:
+        """Write the buffered documents that are complete to file."""
+        if self._streaming:
+            if self._block:
+                self._file.write(self._block)
+                self._block.clear()
             return
 
-        serialized = [
-            orjson.dumps(doc.model_dump())
-            for doc in self._buffer
-        ]
-
-        prefix = b'    ' if self._is_first else b',\n    '
-        content = prefix + b',\n    '.join(serialized)
+        if not self._buffer:
+            return
 
-        self._file.write(content)
-        self._buffer.clear()
-        self._is_first = False
+        # The document being built may still receive pages (flush while --follow waits):
+        # it stays in the buffer until the next BNG or the end of the input
+        current = None if self._closing else self._builder.curr_doc
+
+        # Expanded and serialized one document at a time (orjson serializes the slotted
+        # dataclasses natively): a single document is held in its expanded form and as JSON
+        pending = []
+        for doc in self._buffer:
+            if doc is current:
+                pending.append(doc)
+                continue
+            self._file.write(b'    ' if self._is_first else b',\n    ')
+            self._file.write(orjson.dumps(doc.to_data()))
+            self._is_first = False
+
+        self._buffer = pending
+
+    def wrap_output(self, wrapper) -> None:
+        """Replace the output file object with wrapper(file)."""
+        self._file = wrapper(self._file)
+
+    def progress(self) -> tuple[int, int]:
+        return self._builder.doc_count, self._builder.page_count
+
+    def fragment_factory(self):
+        """Return a picklable factory creating a JSON writer with the same options (uncompressed)."""
+        # Fragments are copied into the output, which compresses them
+        return partial(type(self), self._afp_file_name, **{**self.options, 'compression': None})
+
+    def set_fragment_state(self, doc_offset: int, page_offset: int) -> None:
+        """Write only the documents (no envelope), numbered after the given counts."""
+        self._fragment = True
+        self._doc_offset = self._builder.doc_count = doc_offset
+        self._page_offset = self._builder.page_count = page_offset
+
+    def fragment_summary(self) -> dict:
+        """Return the document/page counts and AFP-level NOPs of the fragment."""
+        return {
+            'nb_of_docs': self._builder.doc_count - self._doc_offset,
+            'nb_of_pages': self._builder.page_count - self._page_offset,
+            'nop': list(self._builder.afp.nop),
+        }
+
+    def merge_fragment(self, fragment_path: str, summary: dict) -> None:
+        """Append the documents of a fragment and add its counters."""
+        self.flush()
 
+        if summary['nb_of_docs']:
+            # The fragment starts with the indentation of its first document
+            if not self._is_first:
+                self._file.write(b',\n')
+            with open(fragment_path, 'rb') as fragment:
+                shutil.copyfileobj(fragment, self._file)
+            self._is_first = False
+
+        self._builder.doc_count += summary['nb_of_docs']
+        self._builder.page_count += summary['nb_of_pages']
+        for nop in summary['nop']:
+            self._builder.afp.add_nop(nop)
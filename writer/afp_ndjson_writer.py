@@ -0,0 +1,116 @@
+import shutil
+import sys
+from functools import partial
+
+import orjson
+
+from domain.afp_builder import AfpBuilder
+from writer.afp_json_encoder import AfpJsonEncoder
+from writer.writer import Writer
+
+STDOUT = "-"
+"""Output path writing to the standard output."""
+
+
+class AFPNdjsonWriter(Writer):
+    """
+    Newline-delimited JSON writer for AFP documents.
+
+    Each document is written as one JSON line as soon as it is complete (next BNG),
+    followed at the end by a trailer line {"afp": {...}} holding the AFP-level NOPs
+    and the document/page counts. Lines are identical to the document entries and
+    the "afp" object of the JSON writer. On the standard output, each line is flushed
+    as soon as it is written, for the consumer reading the pipe.
+    """
+
+    def __init__(self, afp_file_name, output_path: str, **options):
+        """
+        Raises:
+            ValueError: If options are given (e.g. compression options): NDJSON has none.
+        """
+        if options:
+            raise ValueError(f"Options not supported by the ndjson output: {', '.join(sorted(options))}")
+
+        super().__init__(output_path)
+        self._file = None
+        self._afp_file_name = afp_file_name
+        self._flush_lines = output_path == STDOUT
+
+        self._encoder = AfpJsonEncoder(afp_file_name, on_document=self._write_document)
+
+        # Fragment mode (parallel processing): numbering starts after the preceding chunks
+        self._fragment = False
+        self._doc_offset = 0
+        self._page_offset = 0
+
+    def __enter__(self):
+        if self.output_path == STDOUT:
+            self._file = sys.stdout.buffer
+        else:
+            self._file = open(self.output_path, 'wb')
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._encoder.finish()
+
+        if not self._fragment:
+            self._file.write(orjson.dumps({'afp': self._encoder.finalize()}))
+            self._file.write(b'\n')
+
+        self.flush()
+        if self.output_path != STDOUT:
+            self._file.close()
+
+    def write(self, data) -> None:
+        """Process AFP structured field data (SfRecord)."""
+        self._encoder.handle(data)
+
+    def consumed_sf_names(self) -> frozenset[str]:
+        """Only the SFs building the document structure are written."""
+        return AfpBuilder.SF_NAMES
+
+    def _write_document(self, document: bytearray) -> None:
+        self._file.write(document)
+        self._file.write(b'\n')
+        if self._flush_lines:
+            # Not left in the 8 KiB buffer of sys.stdout until the next documents
+            self._file.flush()
+
+    def flush(self) -> None:
+        """Push written lines to the output."""
+        self._file.flush()
+
+    def wrap_output(self, wrapper) -> None:
+        """Replace the output file object with wrapper(file)."""
+        self._file = wrapper(self._file)
+
+    def progress(self) -> tuple[int, int]:
+        return self._encoder.doc_count, self._encoder.page_count
+
+    def fragment_factory(self):
+        """Return a picklable factory creating an NDJSON writer."""
+        return partial(type(self), self._afp_file_name)
+
+    def set_fragment_state(self, doc_offset: int, page_offset: int) -> None:
+        """Write only the document lines (no trailer), numbered after the given counts."""
+        self._fragment = True
+        self._doc_offset = self._encoder.doc_count = doc_offset
+        self._page_offset = self._encoder.page_count = page_offset
+
+    def fragment_summary(self) -> dict:
+        """Return the document/page counts and AFP-level NOPs of the fragment."""
+        return {
+            'nb_of_docs': self._encoder.doc_count - self._doc_offset,
+            'nb_of_pages': self._encoder.page_count - self._page_offset,
+            'nop': list(self._encoder.afp.nop),
+        }
+
+    def merge_fragment(self, fragment_path: str, summary: dict) -> None:
+        """Append the document lines of a fragment and add its counters."""
+        with open(fragment_path, 'rb') as fragment:
+            shutil.copyfileobj(fragment, self._file)
+
+        self._encoder.doc_count += summary['nb_of_docs']
+        self._encoder.page_count += summary['nb_of_pages']
+        for nop in summary['nop']:
+            self._encoder.afp.add_nop(nop)
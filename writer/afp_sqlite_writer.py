@@ -0,0 +1,230 @@
+import os
+import sqlite3
+from functools import partial
+from typing import Optional
+
+from domain.afp_builder import AfpBuilder
+from writer.writer import Writer
+
+SCHEMA = """
+CREATE TABLE afp (
+    name TEXT,
+    nb_of_docs INTEGER NOT NULL,
+    nb_of_pages INTEGER NOT NULL
+);
+CREATE TABLE documents (
+    doc_number INTEGER PRIMARY KEY
+);
+CREATE TABLE pages (
+    page_number INTEGER PRIMARY KEY,
+    doc_number INTEGER NOT NULL,
+    bac_papier TEXT NOT NULL
+);
+CREATE TABLE tles (
+    doc_number INTEGER,
+    page_number INTEGER,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE TABLE nops (
+    doc_number INTEGER,
+    page_number INTEGER,
+    value TEXT NOT NULL
+);
+"""
+"""Tables of the AFP structure. TLE and NOP rows of the AFP (resp. document) level have
+a NULL doc_number (resp. page_number); rowids keep the file order."""
+
+INDEXES = """
+CREATE INDEX tles_name_value ON tles (name, value);
+CREATE INDEX tles_doc_page ON tles (doc_number, page_number);
+CREATE INDEX nops_doc_page ON nops (doc_number, page_number);
+CREATE INDEX pages_doc ON pages (doc_number);
+"""
+"""Query indexes, built once the tables are loaded."""
+
+PRAGMAS = (
+    # Generated output: a failed run is rerun, no rollback journal needed
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA locking_mode = EXCLUSIVE",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",
+)
+
+
+class AfpRowBuilder(AfpBuilder):
+    """
+    Builds the rows of the AFP structure tables as structured fields arrive.
+
+    No document, page or TLE object is built: each BNG, BPG, TLE and NOP appends a
+    tuple to the rows of its table, referencing the current document and page.
+    """
+
+    def __init__(self, afp_file_name: Optional[str] = None, doc_offset: int = 0, page_offset: int = 0) -> None:
+        super().__init__(afp_file_name, doc_offset, page_offset)
+
+        self._doc_number: Optional[int] = None
+        self._page_number: Optional[int] = None
+
+        self.documents: list[tuple] = []
+        self.pages: list[tuple] = []
+        self.tles: list[tuple] = []
+        self.nops: list[tuple] = []
+
+    def begin_document(self) -> None:
+        """Handle BNG (Begin Named Group) - start of document."""
+        self.doc_count += 1
+        self._doc_number = self.doc_count
+        self._page_number = None
+        self.documents.append((self._doc_number,))
+
+    def begin_page(self) -> None:
+        """Handle BPG (Begin Page) - start of page."""
+        self.page_count += 1
+
+        if self._doc_number is None:
+            raise ValueError("BPG outside of a document (no preceding BNG)")
+
+        self._page_number = self.page_count
+        self.pages.append((self._page_number, self._doc_number, self.cur_media))
+
+    def add_tle(self, name: str, value: str) -> None:
+        """Add a TLE row for the current object."""
+        self.tles.append((self._doc_number, self._page_number, name, value))
+
+    def add_nop(self, value: str) -> None:
+        """Add a NOP row for the current object."""
+        self.nops.append((self._doc_number, self._page_number, value))
+
+    def row_count(self) -> int:
+        """Return the number of pending rows."""
+        return len(self.documents) + len(self.pages) + len(self.tles) + len(self.nops)
+
+    def clear(self) -> None:
+        """Drop the pending rows, once inserted."""
+        self.documents.clear()
+        self.pages.clear()
+        self.tles.clear()
+        self.nops.clear()
+
+
+class AFPSqliteWriter(Writer):
+    """
+    SQLite writer for AFP documents.
+
+    Writes the structure into the afp, documents, pages, tles and nops tables (see SCHEMA),
+    so that TLE values can be looked up through an index instead of scanning a JSON file:
+
+        SELECT doc_number, page_number FROM tles WHERE name = 'ACCOUNT_1' AND value = '0162347073'
+
+    Rows are inserted with executemany, batch_size rows per transaction, and the indexes
+    are built after the load. An existing output file is replaced.
+    """
+
+    def __init__(self, afp_file_name, output_path: str, batch_size: int = 50_000):
+        super().__init__(output_path, batch_size=batch_size)
+        self._batch_size = batch_size
+        self._connection: Optional[sqlite3.Connection] = None
+        self._afp_file_name = afp_file_name
+
+        self._builder = AfpRowBuilder(afp_file_name)
+
+        # Fragment mode (parallel processing): numbering starts after the preceding chunks
+        self._fragment = False
+        self._doc_offset = 0
+        self._page_offset = 0
+
+    def __enter__(self):
+        if os.path.exists(self.output_path):
+            os.remove(self.output_path)
+
+        # Transactions are explicit (flush)
+        self._connection = sqlite3.connect(self.output_path, isolation_level=None)
+        for pragma in PRAGMAS:
+            self._connection.execute(pragma)
+        self._connection.executescript(SCHEMA)
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            self.flush()
+
+            if not self._fragment:
+                afp = self._builder.finalize()
+                self._connection.execute(
+                    "INSERT INTO afp (name, nb_of_docs, nb_of_pages) VALUES (?, ?, ?)",
+                    (afp.name, afp.nb_of_docs, afp.nb_of_pages),
+                )
+                self._connection.executescript(INDEXES)
+                self._connection.execute("ANALYZE")
+        finally:
+            self._connection.close()
+
+    def write(self, data) -> None:
+        """Process AFP structured field data (SfRecord)."""
+        self._builder.handle(data)
+
+        if self._builder.row_count() >= self._batch_size:
+            self.flush()
+
+    def consumed_sf_names(self) -> frozenset[str]:
+        """Only the SFs building the document structure are written."""
+        return AfpBuilder.SF_NAMES
+
+    def flush(self) -> None:
+        """Insert the pending rows in one transaction."""
+        builder = self._builder
+        if not builder.row_count():
+            return
+
+        connection = self._connection
+        connection.execute("BEGIN")
+        connection.executemany("INSERT INTO documents (doc_number) VALUES (?)", builder.documents)
+        connection.executemany("INSERT INTO pages (page_number, doc_number, bac_papier) VALUES (?, ?, ?)",
+                               builder.pages)
+        connection.executemany("INSERT INTO tles (doc_number, page_number, name, value) VALUES (?, ?, ?, ?)",
+                               builder.tles)
+        connection.executemany("INSERT INTO nops (doc_number, page_number, value) VALUES (?, ?, ?)",
+                               builder.nops)
+        connection.execute("COMMIT")
+
+        builder.clear()
+
+    def progress(self) -> tuple[int, int]:
+        return self._builder.doc_count, self._builder.page_count
+
+    def fragment_factory(self):
+        """Return a picklable factory creating an SQLite writer with the same options."""
+        return partial(type(self), self._afp_file_name, **self.options)
+
+    def set_fragment_state(self, doc_offset: int, page_offset: int) -> None:
+        """Write only the structure tables (no afp row, no index), numbered after the given counts."""
+        self._fragment = True
+        self._doc_offset = self._builder.doc_count = doc_offset
+        self._page_offset = self._builder.page_count = page_offset
+
+    def fragment_summary(self) -> dict:
+        """Return the document/page counts of the fragment."""
+        return {
+            'nb_of_docs': self._builder.doc_count - self._doc_offset,
+            'nb_of_pages': self._builder.page_count - self._page_offset,
+        }
+
+    def merge_fragment(self, fragment_path: str, summary: dict) -> None:
+        """Copy the rows of a fragment database and add its counters."""
+        self.flush()
+
+        connection = self._connection
+        connection.execute("ATTACH DATABASE ? AS fragment", (fragment_path,))
+        try:
+            connection.execute("BEGIN")
+            for table in ("documents", "pages", "tles", "nops"):
+                connection.execute(f"INSERT INTO main.{table} SELECT * FROM fragment.{table} ORDER BY rowid")
+            connection.execute("COMMIT")
+        finally:
+            connection.execute("DETACH DATABASE fragment")
+
+        self._builder.doc_count += summary['nb_of_docs']
+        self._builder.page_count += summary['nb_of_pages']
@@ -0,0 +1,153 @@
+"""
+Module for compressed output files with multi-threaded block compression.
+
+The output is cut into independent blocks compressed in a thread pool (zlib and
+lzma release the GIL) and written in order. Each block is a complete gzip member
+or xz stream: concatenated, they form a valid .gz or .xz file that gzip, xz and
+Python's gzip/lzma modules decompress as a whole.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+# gzip and lzma are imported by the first block compressed: plain outputs never load them
+
+
+def _gzip_block(data: bytes, level: int) -> bytes:
+    import gzip
+    # mtime=0: identical input gives identical output
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _xz_block(data: bytes, level: int) -> bytes:
+    import lzma
+    return lzma.compress(data, format=lzma.FORMAT_XZ, preset=level)
+
+
+COMPRESSIONS = {
+    "gz": _gzip_block,
+    "xz": _xz_block,
+}
+"""Compression name -> function compressing a block into a complete member/stream."""
+
+DEFAULT_LEVELS = {
+    "gz": 6,
+    "xz": 3,
+}
+
+LEVEL_RANGES = {
+    "gz": range(0, 10),
+    "xz": range(0, 10),
+}
+
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+class BlockCompressedFile:
+    """
+    Write-only binary file compressing its content in independent blocks.
+
+    Blocks are compressed by a pool of threads while the caller keeps writing;
+    at most 2 blocks per thread are in flight, writes block beyond that.
+    """
+
+    def __init__(self, path: str, compression: str, level: Optional[int] = None,
+                 block_size: int = DEFAULT_BLOCK_SIZE, threads: Optional[int] = None) -> None:
+        """
+        Open the output file.
+
+        Args:
+            path: Path of the compressed file.
+            compression: Compression name (a key of COMPRESSIONS).
+            level: Compression level (default: DEFAULT_LEVELS[compression]).
+            block_size: Size of the uncompressed blocks.
+            threads: Number of compression threads (default: number of CPUs).
+
+        Raises:
+            ValueError: If the compression, level or block size is invalid.
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}' ({', '.join(sorted(COMPRESSIONS))})")
+
+        level = DEFAULT_LEVELS[compression] if level is None else level
+        if level not in LEVEL_RANGES[compression]:
+            raise ValueError(f"Invalid {compression} compression level: {level}")
+        if block_size <= 0:
+            raise ValueError(f"Invalid compression block size: {block_size}")
+
+        self._compress = COMPRESSIONS[compression]
+        self._level = level
+        self._block_size = block_size
+
+        threads = threads or os.cpu_count() or 1
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="compress")
+        self._max_in_flight = 2 * threads
+        self._in_flight = deque()
+        self._pending = bytearray()
+        self._blocks = 0
+
+        self._raw = open(path, "wb")
+
+    def write(self, data) -> int:
+        """Buffer data, compressing a block each time block_size bytes are buffered."""
+        self._pending += data
+        if len(self._pending) >= self._block_size:
+            self._submit()
+        return len(data)
+
+    def close(self) -> None:
+        """Compress the last block, write all blocks and close the file."""
+        if self._raw.closed:
+            return
+
+        try:
+            # An empty output is still a valid compressed file
+            if self._pending or not self._blocks:
+                self._submit()
+            while self._in_flight:
+                self._raw.write(self._in_flight.popleft().result())
+        finally:
+            self._executor.shutdown(cancel_futures=True)
+            self._raw.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._raw.closed
+
+    def _submit(self) -> None:
+        block = bytes(self._pending)
+        self._pending.clear()
+        self._blocks += 1
+        self._in_flight.append(self._executor.submit(self._compress, block, self._level))
+
+        # Backpressure: write the oldest blocks, in order
+        while len(self._in_flight) > self._max_in_flight:
+            self._raw.write(self._in_flight.popleft().result())
+
+    def __enter__(self) -> 'BlockCompressedFile':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+def open_output(path: str, compression: Optional[str] = None, level: Optional[int] = None,
+                block_size: int = DEFAULT_BLOCK_SIZE, threads: Optional[int] = None):
+    """
+    Open an output file for binary writing, compressed if a compression is given.
+
+    Args:
+        path: Path of the output file.
+        compression: None for a plain file, or a key of COMPRESSIONS.
+        level: Compression level.
+        block_size: Size of the uncompressed blocks.
+        threads: Number of compression threads.
+
+    Returns:
+        File object supporting write() and close().
+    """
+    if compression is None:
+        return open(path, "wb")
+    return BlockCompressedFile(path, compression, level, block_size, threads)
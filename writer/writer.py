@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Any, Callable, Optional
 
 class Writer(ABC):
     """Abstract base class for all output writers."""
@@ -30,18 +31,89 @@ class Writer(ABC):
         pass
 
     @abstractmethod
-    def write(self, data: dict) -> None:
+    def write(self, data) -> None:
         """
         Write a single data item.
 
         Args:
-            data: Dictionary containing data to write
+            data: Item to write (SfRecord for AFP files)
         """
         pass
 
     @abstractmethod
     def flush(self) -> None:
-        """Flush buffered data to output."""
+        """
+        Flush buffered data to output.
+
+        Also called during the run (while --follow waits for the file to grow): a
+        document still being built must not be written before it is complete.
+        """
         pass
 
+    def consumed_sf_names(self) -> Optional[frozenset[str]]:
+        """
+        Return the short names of the structured fields used by the writer.
+
+        The parser skips the other structured fields without decoding them.
+
+        Returns:
+            Short names of the consumed SFs, None if the writer uses all of them
+        """
+        return None
+
+    def progress(self) -> Optional[tuple[int, int]]:
+        """
+        Return the number of documents and pages handled so far (read by the metrics).
 
+        Returns:
+            (documents, pages), None if the writer does not count them
+        """
+        return None
+
+    def wrap_output(self, wrapper: Callable[[Any], Any]) -> None:
+        """
+        Replace the output file object of the entered writer with wrapper(file).
+
+        Used to time the output I/O. Writers without a file object ignore it.
+
+        Args:
+            wrapper: Called with the file object, returns the object to write to
+        """
+        pass
+
+    # ===== Fragment output (parallel processing) =====
+    # A fragment writer handles a slice of the input in a worker process and
+    # writes a partial output that the main writer merges in input order.
+
+    def fragment_factory(self) -> Callable[[str], 'Writer']:
+        """
+        Return a picklable factory creating a writer of the same kind for a fragment.
+
+        Raises:
+            NotImplementedError: If the writer does not support fragments.
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} does not support parallel processing")
+
+    def set_fragment_state(self, doc_offset: int, page_offset: int) -> None:
+        """
+        Turn the writer into a fragment writer starting after the given counts.
+
+        Args:
+            doc_offset: Number of documents preceding the fragment
+            page_offset: Number of pages preceding the fragment
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} does not support parallel processing")
+
+    def fragment_summary(self) -> dict:
+        """Return the counters of a completed fragment, passed to merge_fragment()."""
+        raise NotImplementedError(f"{self.__class__.__name__} does not support parallel processing")
+
+    def merge_fragment(self, fragment_path: str, summary: dict) -> None:
+        """
+        Append a fragment written by a fragment writer to the output.
+
+        Args:
+            fragment_path: Path of the fragment output
+            summary: Counters returned by fragment_summary()
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} does not support parallel processing")
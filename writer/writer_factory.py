@@ -1,5 +1,9 @@
-from writer.afp_json_writer import AFPJsonWriter
-from writer.writer import Writer
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from writer.writer import Writer
 
 
 def create_writer(output_format: str, file_name: str, output_path: str, **options) -> Writer:
@@ -19,7 +23,21 @@ def create_writer(output_format: str, file_name: str, output_path: str, **option
     Raises:
         ValueError: If the format is not supported
     """
+    # Only the writer of the requested format is imported (sqlite3, compression modules...)
     if output_format == 'json':
+        from writer.afp_json_writer import AFPJsonWriter
         return AFPJsonWriter(file_name, output_path, **options)
+    elif output_format == 'json.gz':
+        from writer.afp_json_writer import AFPJsonWriter
+        return AFPJsonWriter(file_name, output_path, compression='gz', **options)
+    elif output_format == 'json.xz':
+        from writer.afp_json_writer import AFPJsonWriter
+        return AFPJsonWriter(file_name, output_path, compression='xz', **options)
+    elif output_format == 'ndjson':
+        from writer.afp_ndjson_writer import AFPNdjsonWriter
+        return AFPNdjsonWriter(file_name, output_path, **options)
+    elif output_format == 'sqlite':
+        from writer.afp_sqlite_writer import AFPSqliteWriter
+        return AFPSqliteWriter(file_name, output_path, **options)
     else:
         raise ValueError(f"Unsupported output format: {output_format}")
\ No newline at end of file